@@ -0,0 +1,43 @@
+"""create backtest jobs
+
+Revision ID: 5f2c9d1e7a34
+Revises: aabc5a9b099f
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c9d1e7a34'
+down_revision: Union[str, None] = 'aabc5a9b099f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'backtest_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('total_runs', sa.Integer(), nullable=False),
+        sa.Column('completed_runs', sa.Integer(), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_backtest_jobs_user_id', 'backtest_jobs', ['user_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_backtest_jobs_user_id', table_name='backtest_jobs')
+    op.drop_table('backtest_jobs')
@@ -0,0 +1,39 @@
+"""add trade history indexes
+
+Revision ID: 8e41b07c2d5a
+Revises: 5f2c9d1e7a34
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41b07c2d5a'
+down_revision: Union[str, None] = '5f2c9d1e7a34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Each trade-history query's filter columns, then its (created_at, id) page order
+INDEXES = {
+    'ix_trades_user_id_created_at': ['user_id', 'created_at', 'id'],
+    'ix_trades_trading_account_id_created_at': ['trading_account_id', 'created_at', 'id'],
+    'ix_trades_user_id_symbol_created_at': ['user_id', 'symbol', 'created_at', 'id'],
+    'ix_trades_user_id_ai_suggested_created_at': ['user_id', 'ai_suggested', 'created_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps trades writable while a large table is indexed; it can't run in a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'trades', columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='trades', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,26 @@
+"""add backtest job heartbeat
+
+Revision ID: c3d8a61f4b90
+Revises: 8e41b07c2d5a
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8a61f4b90'
+down_revision: Union[str, None] = '8e41b07c2d5a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('backtest_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('backtest_jobs', 'heartbeat_at')
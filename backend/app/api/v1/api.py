@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, trading, websocket
+from app.api.v1.endpoints import auth, users, trading, websocket, metrics
 
 api_router = APIRouter()
 
@@ -8,4 +8,5 @@ api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(trading.router, prefix="/trading", tags=["trading"])
-api_router.include_router(websocket.router, prefix="/ws", tags=["websocket"]) 
\ No newline at end of file
+api_router.include_router(websocket.router, prefix="/ws", tags=["websocket"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"]) 
\ No newline at end of file
@@ -0,0 +1,37 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app import models
+from app.core.deps import get_current_active_superuser
+from app.database import pool_stats, session_router
+from app.services.ai_trading import ai_trading_service
+from app.services.bar_cache import bar_cache
+from app.services.bar_store import bar_store
+from app.services.single_flight import single_flight_stats
+from app.services.trading import trading_service
+from app.services.user_cache import user_cache
+
+router = APIRouter()
+
+@router.get("/")
+async def read_metrics(
+    current_user: models.User = Depends(get_current_active_superuser),
+) -> Any:
+    """
+    Connection pool, replica, single-flight and cache statistics. Superusers
+    only: they describe the deployment's internals.
+    """
+    return {
+        "database_pool": pool_stats(),
+        "database_replica": session_router.stats(),
+        "single_flight": single_flight_stats(),
+        "caches": {
+            "bars": bar_cache.stats(),
+            "bar_store": bar_store.stats(),
+            "quotes": trading_service.quote_stats(),
+            "assets": trading_service.assets.stats(),
+            "analysis": ai_trading_service.analysis_cache.stats() if ai_trading_service else None,
+            "users": user_cache.stats(),
+        },
+    }
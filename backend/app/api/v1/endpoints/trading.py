@@ -1,24 +1,36 @@
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, File, HTTPException, Query, BackgroundTasks, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
 from app import crud, models, schemas
-from app.core.deps import get_current_active_user, get_db, get_current_user
+from app.config import settings
+from app.core.deps import get_current_active_user, get_db, get_current_user, get_read_db
+from app.database import AsyncSessionLocal
+from app.crud.pagination import NEXT_CURSOR_HEADER, Cursor, decode_cursor, encode_cursor
 from app.services.trading import trading_service
 from app.services.ai_trading import ai_trading_service
-from app.schemas.trading import OrderCreate, Order, Position, Portfolio
-from app.crud.trading import trading_crud
+from app.services.backtest_jobs import backtest_job_queue
+from app.services.fill_import import fill_format, parse_fills
+from app.schemas.trading import OrderCreate, Order, Position, Portfolio, BatchAnalysisRequest, BacktestGridRequest, BacktestJobResponse, TradeImportResult
+import asyncio
 import logging
+import math
+import time
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Broker order statuses and the trade status they leave an order in; anything else is still open
+ORDER_STATUSES = {"filled": "filled", "canceled": "cancelled", "expired": "cancelled", "rejected": "failed"}
+
 # Trading Account endpoints
 @router.get("/accounts", response_model=List[schemas.TradingAccount])
 async def read_trading_accounts(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_user),
@@ -61,7 +73,7 @@ async def create_trading_account(
 @router.get("/accounts/{account_id}", response_model=schemas.TradingAccount)
 async def read_trading_account(
     account_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -75,19 +87,39 @@ async def read_trading_account(
     return account
 
 # Trade endpoints
+def trade_cursor(cursor: Optional[str] = None) -> Optional[Cursor]:
+    """
+    Keyset page position from the ``cursor`` query parameter
+    """
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _set_next_cursor(response: Response, trades: List[models.Trade], limit: int):
+    """A full page may have more after it; point the client at its last row"""
+    if trades and len(trades) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(trades[-1].created_at, trades[-1].id)
+
 @router.get("/trades", response_model=List[schemas.Trade])
 async def read_trades(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[Cursor] = Depends(trade_cursor),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Retrieve trades for the current user.
+    Retrieve trades for the current user, newest first. Pass the
+    X-Next-Cursor header of a page as ``cursor`` to get the next one.
     """
     trades = await crud.trade.get_by_user(
-        db, user_id=current_user.id, skip=skip, limit=limit
+        db, user_id=current_user.id, skip=skip, limit=limit, after=after
     )
+    _set_next_cursor(response, trades, limit)
     return trades
 
 @router.post("/trades", response_model=schemas.Trade)
@@ -108,8 +140,9 @@ async def create_trade(
             detail="Not enough permissions",
         )
     
-    # Execute trade with broker if available
-    if trading_service and account.broker == "alpaca":
+    # Execute trade with broker if available; otherwise it is recorded as filled
+    status = "filled"
+    if trading_service.api and account.broker == "alpaca":
         try:
             order = await trading_service.place_order(
                 symbol=trade_in.symbol,
@@ -118,7 +151,7 @@ async def create_trade(
                 type=trade_in.type,
             )
             # Update trade with order details
-            trade_in.status = order["status"]
+            status = ORDER_STATUSES.get(order["status"], "pending")
             if order["filled_avg_price"]:
                 trade_in.price = order["filled_avg_price"]
         except Exception as e:
@@ -127,13 +160,74 @@ async def create_trade(
                 detail=f"Failed to execute trade: {str(e)}",
             )
     
-    trade = await crud.trade.create(db, obj_in=trade_in, user_id=current_user.id)
+    trade = await crud.trade.create(db, obj_in=trade_in, user_id=current_user.id, status=status)
     return trade
 
+@router.post("/trades/import", response_model=TradeImportResult)
+async def import_trades(
+    *,
+    db: AsyncSession = Depends(get_db),
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Bulk-load a CSV or JSON export of fills as trades of the current user.
+    Every row is validated before anything is written; the rows are then
+    inserted in chunks within one transaction, so a failed import writes
+    nothing and can be retried as is.
+    """
+    if file.size is not None and file.size > settings.TRADE_IMPORT_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Fill export is {file.size} bytes; the limit is {settings.TRADE_IMPORT_MAX_BYTES}",
+        )
+    try:
+        # Parsed from the spooled upload rather than read into memory whole, in a
+        # worker thread: validating up to TRADE_IMPORT_MAX_ROWS rows takes seconds
+        fills = await asyncio.to_thread(parse_fills, file.file, fill_format(file.filename, file.content_type))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False)[:20])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Verify every trading account belongs to user
+    account_ids = {fill.trading_account_id for fill in fills}
+    owned = await crud.trading_account.get_ids_for_user(db, user_id=current_user.id, ids=account_ids)
+    if len(owned) != len(account_ids):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    started = time.perf_counter()
+    ids = await crud.trade.create_many(db, objs_in=fills, user_id=current_user.id)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Imported {len(ids)} trades for user {current_user.id} in {elapsed:.2f}s")
+    return TradeImportResult(
+        imported=len(ids),
+        chunks=math.ceil(len(ids) / settings.BULK_INSERT_CHUNK_SIZE),
+        elapsed=elapsed,
+    )
+
+@router.get("/trades/ai-suggested", response_model=List[schemas.Trade])
+async def read_ai_suggested_trades(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Cursor] = Depends(trade_cursor),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get AI-suggested trades, newest first.
+    """
+    trades = await crud.trade.get_ai_suggested(
+        db, user_id=current_user.id, skip=skip, limit=limit, after=after
+    )
+    _set_next_cursor(response, trades, limit)
+    return trades
+
 @router.get("/trades/{trade_id}", response_model=schemas.Trade)
 async def read_trade(
     trade_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -149,13 +243,15 @@ async def read_trade(
 @router.get("/trades/account/{account_id}", response_model=List[schemas.Trade])
 async def read_account_trades(
     account_id: int,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[Cursor] = Depends(trade_cursor),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Get trades for a specific trading account.
+    Get trades for a specific trading account, newest first.
     """
     # Verify account belongs to user
     account = await crud.trading_account.get(db, id=account_id)
@@ -166,39 +262,28 @@ async def read_account_trades(
         )
     
     trades = await crud.trade.get_by_account(
-        db, account_id=account_id, skip=skip, limit=limit
+        db, account_id=account_id, skip=skip, limit=limit, after=after
     )
+    _set_next_cursor(response, trades, limit)
     return trades
 
 @router.get("/trades/symbol/{symbol}", response_model=List[schemas.Trade])
 async def read_symbol_trades(
     symbol: str,
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[Cursor] = Depends(trade_cursor),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Get trades for a specific symbol.
+    Get trades for a specific symbol, newest first.
     """
     trades = await crud.trade.get_by_symbol(
-        db, user_id=current_user.id, symbol=symbol, skip=skip, limit=limit
-    )
-    return trades
-
-@router.get("/trades/ai-suggested", response_model=List[schemas.Trade])
-async def read_ai_suggested_trades(
-    db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: models.User = Depends(get_current_active_user),
-) -> Any:
-    """
-    Get AI-suggested trades.
-    """
-    trades = await crud.trade.get_ai_suggested(
-        db, user_id=current_user.id, skip=skip, limit=limit
+        db, user_id=current_user.id, symbol=symbol, skip=skip, limit=limit, after=after
     )
+    _set_next_cursor(response, trades, limit)
     return trades
 
 @router.get("/market/analysis/{symbol}")
@@ -263,33 +348,50 @@ async def get_market_data(
             detail=f"Failed to get market data: {str(e)}",
         )
 
-@router.get("/positions")
-async def get_positions(
+@router.get("/assets/search")
+async def search_assets(
+    q: str = Query(..., min_length=1, max_length=10),
+    limit: int = Query(10, ge=1, le=50),
     current_user: models.User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Get current positions from the broker.
+    Symbol autocomplete: tradable assets whose symbol starts with ``q``.
     """
-    if not trading_service:
-        raise HTTPException(
-            status_code=503,
-            detail="Trading service is not available",
-        )
-    
-    try:
-        positions = await trading_service.get_positions()
-        return positions
-    except Exception as e:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Failed to get positions: {str(e)}",
-        )
+    return trading_service.assets.search(q, limit)
+
+async def _execute_order(order_id: int):
+    """Send a stored order to the broker and record the outcome"""
+    async with AsyncSessionLocal() as db:
+        order = await crud.trade.get(db, id=order_id)
+        if order is None:
+            logger.error(f"Order {order_id} not found for execution")
+            return
+        try:
+            placed = await trading_service.place_order(
+                symbol=order.symbol,
+                qty=order.quantity,
+                side=order.side,
+                type=order.type,
+                limit_price=order.price if order.type == "limit" else None,
+                stop_price=order.price if order.type == "stop" else None,
+                client_order_id=f"trade-{order.id}",  # Stable, so executing it again can't place it twice
+            )
+        except Exception as e:
+            logger.error(f"Error executing order {order_id}: {str(e)}")
+            await crud.trade.update(db, db_obj=order, obj_in={"status": "failed"})
+            return
+        update = {"status": ORDER_STATUSES.get(placed["status"], "pending")}
+        if update["status"] == "filled":
+            update["executed_at"] = datetime.utcnow()
+            if placed["filled_avg_price"]:
+                update["price"] = placed["filled_avg_price"]
+        await crud.trade.update(db, db_obj=order, obj_in=update)
 
 @router.post("/orders", response_model=Order)
 async def create_order(
     order: OrderCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
     """
@@ -299,14 +401,32 @@ async def create_order(
         # Validate order parameters
         if order.quantity <= 0:
             raise HTTPException(status_code=400, detail="Order quantity must be positive")
-            
+
+        # Verify trading account belongs to user, or use their default one
+        if order.trading_account_id is None:
+            account = await crud.trading_account.get_default(db, user_id=current_user.id)
+            if not account:
+                raise HTTPException(status_code=400, detail="No trading account to place the order in")
+            order.trading_account_id = account.id
+        else:
+            account_ids = await crud.trading_account.get_ids_for_user(
+                db, user_id=current_user.id, ids=[order.trading_account_id]
+            )
+            if not account_ids:
+                raise HTTPException(status_code=403, detail="Not enough permissions")
+
+        # Market orders are priced at the current market price
+        price = order.price
+        if order.side == "buy" or price is None:
+            quotes = await trading_service.get_quotes([order.symbol])
+            if order.symbol.upper() not in quotes:
+                raise HTTPException(status_code=400, detail=f"No market price for {order.symbol}")
+            price = price or quotes[order.symbol.upper()]["price"]
+
         # Check if we have sufficient buying power
-        portfolio = await trading_crud.get_portfolio(db, current_user.id)
         if order.side == "buy":
-            # Get current market price
-            market_data = await trading_service.get_quote(order.symbol)
-            required_funds = order.quantity * market_data.price
-            
+            portfolio = await crud.trading_account.get_portfolio(db, user_id=current_user.id)
+            required_funds = order.quantity * price
             if required_funds > portfolio.buying_power:
                 raise HTTPException(
                     status_code=400,
@@ -314,21 +434,20 @@ async def create_order(
                 )
 
         # Create order in database
-        db_order = await trading_crud.create_order(
+        db_order = await crud.trade.create_order(
             db,
-            order=order,
-            user_id=current_user.id
+            obj_in=order,
+            user_id=current_user.id,
+            price=price,
         )
 
-        # Execute order in background
-        background_tasks.add_task(
-            trading_service.execute_order,
-            db=db,
-            order_id=db_order.id
-        )
+        # Execute order in background, in a session of its own
+        background_tasks.add_task(_execute_order, db_order.id)
 
         return db_order
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating order: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -337,14 +456,14 @@ async def create_order(
 async def get_orders(
     status: Optional[str] = None,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """
     Get user's orders with optional status filter
     """
     try:
-        orders = await trading_crud.get_orders(
+        orders = await crud.trade.get_orders(
             db,
             user_id=current_user.id,
             status=status,
@@ -355,26 +474,35 @@ async def get_orders(
         logger.error(f"Error fetching orders: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _get_quotes(symbols: List[str]) -> dict:
+    """Batch quote lookup for valuations; a failed lookup values nothing rather than failing the request"""
+    try:
+        return await trading_service.get_quotes(symbols)
+    except Exception as e:
+        logger.error(f"Error fetching quotes for {len(symbols)} symbols: {str(e)}")
+        return {}
+
 @router.get("/positions", response_model=List[Position])
 async def get_positions(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """
     Get user's current positions
     """
     try:
-        positions = await trading_crud.get_positions(db, user_id=current_user.id)
+        positions = await crud.trade.get_positions(db, user_id=current_user.id)
         
-        # Enrich positions with current market data
+        # Enrich positions with current market data, fetched for all symbols at once
+        quotes = await _get_quotes([position.symbol for position in positions])
         for position in positions:
-            try:
-                market_data = await trading_service.get_quote(position.symbol)
-                position.current_price = market_data.price
-                position.market_value = position.quantity * market_data.price
-                position.unrealized_pl = position.market_value - (position.quantity * position.average_entry_price)
-            except Exception as e:
-                logger.error(f"Error enriching position data for {position.symbol}: {str(e)}")
+            quote = quotes.get(position.symbol.upper())
+            if quote is None:
+                logger.error(f"No market price to enrich position data for {position.symbol}")
+                continue
+            position.current_price = quote["price"]
+            position.market_value = position.quantity * quote["price"]
+            position.unrealized_pl = position.market_value - (position.quantity * position.average_entry_price)
                 
         return positions
     except Exception as e:
@@ -383,26 +511,26 @@ async def get_positions(
 
 @router.get("/portfolio", response_model=Portfolio)
 async def get_portfolio(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """
     Get user's portfolio summary
     """
     try:
-        portfolio = await trading_crud.get_portfolio(db, user_id=current_user.id)
+        portfolio = await crud.trading_account.get_portfolio(db, user_id=current_user.id)
         
         # Calculate total equity and other metrics
-        positions = await trading_crud.get_positions(db, user_id=current_user.id)
+        positions = await crud.trade.get_positions(db, user_id=current_user.id)
         total_position_value = 0
         
+        quotes = await _get_quotes([position.symbol for position in positions])
         for position in positions:
-            try:
-                market_data = await trading_service.get_quote(position.symbol)
-                position_value = position.quantity * market_data.price
-                total_position_value += position_value
-            except Exception as e:
-                logger.error(f"Error calculating position value for {position.symbol}: {str(e)}")
+            quote = quotes.get(position.symbol.upper())
+            if quote is None:
+                logger.error(f"No market price to calculate position value for {position.symbol}")
+                continue
+            total_position_value += position.quantity * quote["price"]
         
         portfolio.equity = portfolio.buying_power + total_position_value
         return portfolio
@@ -410,6 +538,27 @@ async def get_portfolio(
         logger.error(f"Error fetching portfolio: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/analyze/batch")
+async def analyze_batch(
+    request: BatchAnalysisRequest,
+    current_user = Depends(get_current_user)
+):
+    """
+    Get trading signals for a list of symbols, streamed as newline-delimited
+    JSON (one TradingSignal per line) as each batch of symbols is ready
+    """
+    if not ai_trading_service:
+        raise HTTPException(
+            status_code=503,
+            detail="AI trading service is not available"
+        )
+
+    async def stream():
+        async for signal in ai_trading_service.analyze_batch(request.symbols):
+            yield signal.model_dump_json() + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.post("/analyze/{symbol}")
 async def analyze_symbol(
     symbol: str,
@@ -432,6 +581,62 @@ async def analyze_symbol(
         logger.error(f"Error analyzing symbol {symbol}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# /backtest/grid used to run the grid in the request; it now queues a job too
+@router.post("/backtest/grid", response_model=BacktestJobResponse, status_code=202)
+@router.post("/backtest/jobs", response_model=BacktestJobResponse, status_code=202)
+async def submit_backtest_job(
+    request: BacktestGridRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Queue a grid backtest; poll the job or watch it over the websocket
+    """
+    return await backtest_job_queue.submit(db, current_user.id, request)
+
+@router.get("/backtest/jobs", response_model=List[BacktestJobResponse])
+async def read_backtest_jobs(
+    db: AsyncSession = Depends(get_db),
+    skip: int = 0,
+    limit: int = 20,
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    The current user's backtest jobs, newest first
+    """
+    return await crud.backtest_job.get_by_user(db, user_id=current_user.id, skip=skip, limit=limit)
+
+@router.get("/backtest/jobs/{job_id}", response_model=BacktestJobResponse)
+async def read_backtest_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    A backtest job's status and progress, with its results once completed
+    """
+    job = await crud.backtest_job.get_for_user(db, id=job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    return job
+
+@router.delete("/backtest/jobs/{job_id}", response_model=BacktestJobResponse)
+async def cancel_backtest_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Cancel a queued or running backtest job
+    """
+    job = await crud.backtest_job.get_for_user(db, id=job_id, user_id=current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest job not found")
+    if not await backtest_job_queue.cancel(db, job):
+        raise HTTPException(status_code=409, detail=f"Backtest job is already {job.status}")
+    await db.refresh(job)
+    return job
+
 @router.post("/backtest/{symbol}")
 async def backtest_strategy(
     symbol: str,
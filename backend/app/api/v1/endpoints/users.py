@@ -9,6 +9,7 @@ from app.core.deps import (
     get_current_active_superuser,
     get_current_active_user,
     get_db,
+    get_read_db,
 )
 
 router = APIRouter()
@@ -34,7 +35,12 @@ async def update_user_me(
     """
     Update own user.
     """
-    current_user_data = jsonable_encoder(current_user)
+    # The authenticated user may come from the user cache, whose columns can
+    # be stale; update the current row so other changes aren't written over
+    user = await crud.user.get(db, id=current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    current_user_data = jsonable_encoder(user)
     user_in = schemas.UserUpdate(**current_user_data)
     if password is not None:
         user_in.password = password
@@ -42,12 +48,13 @@ async def update_user_me(
         user_in.email = email
     if username is not None:
         user_in.username = username
-    user = await crud.user.update(db, db_obj=current_user, obj_in=user_in)
+    # update also drops the cached user
+    user = await crud.user.update(db, db_obj=user, obj_in=user_in)
     return user
 
 @router.get("/", response_model=List[schemas.User])
 async def read_users(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: models.User = Depends(get_current_active_superuser),
@@ -62,13 +69,13 @@ async def read_users(
 async def read_user_by_id(
     user_id: int,
     current_user: models.User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> Any:
     """
     Get a specific user by id.
     """
     user = await crud.user.get(db, id=user_id)
-    if user == current_user:
+    if user is not None and user.id == current_user.id:
         return user
     if not crud.user.is_superuser(current_user):
         raise HTTPException(
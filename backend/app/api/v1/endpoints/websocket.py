@@ -1,14 +1,13 @@
 import logging
 from typing import List
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, status
-from app.services.websocket import ConnectionManager
+from app.services.websocket import websocket_manager as manager
 from app.core.deps import get_current_user
 from app.models import User
 import asyncio
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-manager = ConnectionManager()
 
 @router.websocket("/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
@@ -17,7 +16,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     
     try:
         # First connect to the manager
-        await manager.connect(websocket)
+        await manager.connect(websocket, client_id)
         logger.info(f"WebSocket connection accepted for client_id: {client_id}")
         
         # Send the connection success message
@@ -37,13 +36,28 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 if data["type"] == "subscribe":
                     symbols = data.get("symbols", [])
                     logger.info(f"Client {client_id} subscribing to symbols: {symbols}")
-                    await manager.subscribe(websocket, symbols)
+                    manager.subscribe(
+                        websocket,
+                        symbols,
+                        throttle_ms=data.get("throttle_ms"),
+                        mode=data.get("mode"),
+                    )
                     
                 elif data["type"] == "unsubscribe":
                     symbols = data.get("symbols", [])
                     logger.info(f"Client {client_id} unsubscribing from symbols: {symbols}")
-                    await manager.unsubscribe(websocket, symbols)
+                    manager.unsubscribe(websocket, symbols)
                     
+                elif data["type"] == "resnapshot":
+                    # Sent by compact-mode clients that detected a sequence gap
+                    manager.resnapshot(websocket, data.get("symbols"))
+
+                elif data["type"] == "watch_backtest":
+                    manager.watch_job(websocket, str(data.get("job_id")))
+
+                elif data["type"] == "unwatch_backtest":
+                    manager.unwatch_job(websocket, str(data.get("job_id")))
+
                 elif data["type"] == "ping":
                     await manager.send_personal_message({"type": "pong"}, websocket)
                 
@@ -81,7 +95,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     
     finally:
         # Always ensure we disconnect from the manager
-        await manager.disconnect(websocket)
+        manager.disconnect(websocket, client_id)
         logger.info(f"Cleaned up connection for client {client_id}")
 
 @router.post("/broadcast")
@@ -97,6 +111,16 @@ async def broadcast_message(
     await manager.broadcast(message)
     return {"message": "Broadcast successful"}
 
+@router.get("/stats")
+async def connection_stats(
+    current_user: User = Depends(get_current_user),
+) -> dict:
+    """Per-client outbound queue and drop counters."""
+    if not current_user.is_superuser:
+        return {"error": "Not authorized"}
+
+    return manager.client_stats()
+
 @router.get("/test")
 async def test_websocket():
     """Test endpoint to verify WebSocket route is accessible."""
@@ -106,6 +130,9 @@ async def test_websocket():
         "websocket_url": "ws://localhost:8000/api/v1/ws/{client_id}",
         "supported_messages": {
             "subscribe": {"type": "subscribe", "symbols": ["AAPL", "GOOGL"]},
+            "subscribe_conflated": {"type": "subscribe", "symbols": ["AAPL", "GOOGL"], "throttle_ms": 250},
+            "subscribe_compact": {"type": "subscribe", "symbols": ["AAPL", "GOOGL"], "mode": "compact"},
+            "resnapshot": {"type": "resnapshot", "symbols": ["AAPL"]},
             "unsubscribe": {"type": "unsubscribe", "symbols": ["AAPL", "GOOGL"]}
         }
     } 
\ No newline at end of file
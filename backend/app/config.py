@@ -7,6 +7,8 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = "your-secret-key-here"  # Change in production
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    USER_CACHE_TTL: float = 30.0  # Seconds an authenticated user's record is reused without a lookup (0 = off)
+    USER_CACHE_MAX_ENTRIES: int = 10_000
     DEBUG: bool = True  # Enable debug mode
     
     # Database
@@ -19,15 +21,62 @@ class Settings(BaseSettings):
     TESTING: bool = False
     DATABASE_URL: str = ""
     REDIS_URL: str = "redis://localhost:6379/0"
+    DB_ECHO: bool = False  # Log every SQL statement (independent of DEBUG)
+    DB_POOL_SIZE: int = 10  # Connections each process keeps open
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load, closed once returned
+    DB_POOL_TIMEOUT: float = 10.0  # Seconds a request waits for a free connection before failing
+    DB_POOL_RECYCLE: int = 30 * 60  # Seconds before a connection is replaced (-1 = never)
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection (0 behind PgBouncer)
+    DATABASE_REPLICA_URL: str = ""  # Read replica for read-only endpoints ("" = read from the primary)
+    DB_REPLICA_MAX_LAG: float = 5.0  # Seconds of replication lag before reads fall back to the primary
+    DB_REPLICA_CHECK_INTERVAL: float = 5.0  # Seconds between replica lag checks
 
     # Alpaca API
     ALPACA_API_KEY: Optional[str] = None
     ALPACA_SECRET_KEY: Optional[str] = None
     ALPACA_PAPER: bool = True
+    BROKER_MAX_CONCURRENCY: int = 8  # Concurrent broker REST calls (and pooled connections)
+    BROKER_TIMEOUT: float = 10.0  # Seconds before a broker call is abandoned
+    QUOTE_CACHE_TTL: float = 2.0  # Seconds a latest-trade price is reused for valuations
+    ASSET_CATALOG_REFRESH_INTERVAL: float = 6 * 60 * 60  # Seconds between full asset catalog reloads
+
+    # LLM analysis cache
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 512
 
     # OpenAI API
     OPENAI_API_KEY: Optional[str] = None
 
+    # Market data stream
+    MARKET_DATA_WORKERS: int = 8  # Concurrent upstream fetches per tick
+    WS_CLIENT_QUEUE_SIZE: int = 256  # Outbound messages buffered per socket
+    WS_SEND_TIMEOUT: float = 5.0  # Seconds a single send may take before the client is dropped
+    WS_SLOW_CLIENT_TIMEOUT: float = 10.0  # Seconds a client may stay over its queue limit
+    WS_BACKPLANE: str = "memory"  # "redis" to share ticks and broadcasts across workers via REDIS_URL
+    WS_PRODUCER_LEASE_TTL: float = 5.0  # Seconds before another worker may take over a silent symbol producer
+
+    # Historical bar cache
+    BAR_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 256 MB
+    BAR_CACHE_INTRADAY_TTL: int = 60  # Seconds before the live edge of intraday bars is refetched
+    BAR_CACHE_DAILY_TTL: int = 60 * 60
+
+    # Grid backtests
+    BACKTEST_WORKERS: int = 0  # Worker processes (0 = one per CPU core)
+    BACKTEST_MAX_RUNS: int = 100_000  # Symbol x parameter combinations per request
+    BACKTEST_WORKER_NICE: int = 10  # Added to worker process niceness so live trading keeps priority
+    BACKTEST_MAX_CONCURRENT_JOBS: int = 1  # Queued jobs run by each API process at once
+    BACKTEST_PROGRESS_INTERVAL: float = 1.0  # Seconds between persisted progress updates
+    BACKTEST_HEARTBEAT_INTERVAL: float = 10.0  # Seconds between heartbeats of a process's queued and running jobs
+    BACKTEST_STALE_AFTER: float = 60.0  # Seconds without a heartbeat before a job is failed as orphaned
+
+    # On-disk bar store
+    BAR_STORE_DIR: str = "data/bars"
+    BAR_STORE_MAX_SEGMENTS: int = 32  # Segments per symbol/interval before they are compacted into one
+
+    # Bulk trade ingestion
+    BULK_INSERT_CHUNK_SIZE: int = 5_000  # Rows per multi-row INSERT statement
+    TRADE_IMPORT_MAX_ROWS: int = 1_000_000  # Fills accepted per uploaded file
+    TRADE_IMPORT_MAX_BYTES: int = 128 * 1024 * 1024  # Size of an uploaded fill export
+
     # Allow all origins in development
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
 
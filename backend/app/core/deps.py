@@ -9,20 +9,38 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app import crud, models, schemas
 from app.core.security import ALGORITHM
 from app.config import settings
-from app.database import get_async_session
+from app.database import session_router
+from app.services.user_cache import user_cache
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with get_async_session() as session:
+    async with session_router.primary() as session:
+        yield session
+
+async def get_read_db(db: AsyncSession = Depends(get_db)) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only work: the replica while it is caught up, otherwise
+    the request's primary session (which only connects if it is used).
+    """
+    factory = await session_router.read_factory()
+    if factory is session_router.primary:
+        yield db
+        return
+    async with factory() as session:
         yield session
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(reusable_oauth2)
 ) -> models.User:
+    """
+    The user a token belongs to. Cache misses are loaded from the primary:
+    a replica can still hold the row an invalidation just replaced, and
+    caching it would serve the stale user for the whole TTL.
+    """
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[ALGORITHM]
@@ -33,7 +51,7 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = await crud.user.get(db, id=token_data.sub)
+    user = await user_cache.get(token_data.sub, lambda: crud.user.get(db, id=token_data.sub))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
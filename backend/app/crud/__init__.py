@@ -1,4 +1,5 @@
 from app.crud.user import user
 from app.crud.trading import trading_account, trade
+from app.crud.backtest_job import backtest_job
 
-__all__ = ["user", "trading_account", "trade"] 
\ No newline at end of file
+__all__ = ["user", "trading_account", "trade", "backtest_job"] 
\ No newline at end of file
@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import Any, Iterable, List, Optional
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.base import CRUDBase
+from app.models import BacktestJob
+from app.schemas.trading import BacktestGridRequest
+
+ACTIVE_STATUSES = ("queued", "running")
+
+class CRUDBacktestJob(CRUDBase[BacktestJob, BacktestGridRequest, BacktestGridRequest]):
+    async def get_for_user(self, db: AsyncSession, *, id: str, user_id: int) -> Optional[BacktestJob]:
+        """
+        Get a job, only if it belongs to the user.
+        """
+        result = await db.execute(
+            select(BacktestJob)
+            .filter(BacktestJob.id == id)
+            .filter(BacktestJob.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_by_user(
+        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100
+    ) -> List[BacktestJob]:
+        """
+        Get a user's jobs, newest first.
+        """
+        result = await db.execute(
+            select(BacktestJob)
+            .filter(BacktestJob.user_id == user_id)
+            .order_by(BacktestJob.created_at.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def create(
+        self, db: AsyncSession, *, id: str, obj_in: BacktestGridRequest, user_id: int, total_runs: int
+    ) -> BacktestJob:
+        """
+        Create a queued job.
+        """
+        db_obj = BacktestJob(
+            id=id,
+            user_id=user_id,
+            status="queued",
+            params=obj_in.model_dump(),
+            total_runs=total_runs,
+            completed_runs=0,
+            heartbeat_at=datetime.utcnow(),
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def transition(
+        self, db: AsyncSession, *, id: str, from_statuses: Iterable[str], **values: Any
+    ) -> bool:
+        """
+        Update a job only while its status is one of ``from_statuses``, in a
+        single statement. Returns False if the job had already moved on,
+        e.g. because it was cancelled by another worker.
+        """
+        if values.get("status") in ("completed", "failed", "cancelled"):
+            values.setdefault("finished_at", datetime.utcnow())
+        result = await db.execute(
+            update(BacktestJob)
+            .where(BacktestJob.id == id)
+            .where(BacktestJob.status.in_(tuple(from_statuses)))
+            .values(**values)
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def heartbeat(self, db: AsyncSession, *, ids: Iterable[str]) -> None:
+        """
+        Mark queued or running jobs as still held by a live process.
+        """
+        await db.execute(
+            update(BacktestJob)
+            .where(BacktestJob.id.in_(tuple(ids)))
+            .where(BacktestJob.status.in_(ACTIVE_STATUSES))
+            .values(heartbeat_at=datetime.utcnow())
+        )
+        await db.commit()
+
+    async def fail_stale(self, db: AsyncSession, *, before: datetime, error: str) -> List[BacktestJob]:
+        """
+        Fail queued or running jobs with no heartbeat since ``before`` (or
+        none at all), in a single statement; returns the jobs failed.
+        """
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(BacktestJob)
+            .where(BacktestJob.status.in_(ACTIVE_STATUSES))
+            .where(or_(BacktestJob.heartbeat_at < before, BacktestJob.heartbeat_at.is_(None)))
+            .values(status="failed", error=error, finished_at=now)
+            .returning(BacktestJob)
+        )
+        jobs = result.scalars().all()
+        await db.commit()
+        return jobs
+
+backtest_job = CRUDBacktestJob(BacktestJob)
@@ -1,9 +1,10 @@
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -44,6 +45,28 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def create_many(
+        self, db: AsyncSession, *, rows: List[Dict[str, Any]], chunk_size: int = settings.BULK_INSERT_CHUNK_SIZE
+    ) -> List[Any]:
+        """
+        Insert many records with multi-row INSERT ... RETURNING, executed in
+        chunks of ``chunk_size`` rows; returns the new IDs. All chunks are
+        committed together, so a failure leaves none of the records written
+        and the whole batch can simply be retried.
+        """
+        # Executed with a list of rows, this is batched into multi-row VALUES statements
+        statement = insert(self.model).returning(self.model.id)
+        ids: List[Any] = []
+        try:
+            for start in range(0, len(rows), chunk_size):
+                result = await db.execute(statement, rows[start:start + chunk_size])
+                ids.extend(result.scalars().all())
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return ids
+
     async def update(
         self,
         db: AsyncSession,
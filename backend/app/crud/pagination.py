@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional, Tuple
+import base64
+
+from sqlalchemy import Select, tuple_
+
+Cursor = Tuple[datetime, int]  # (created_at, id) of the last row of the previous page
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Opaque cursor pointing just past a row in (created_at DESC, id DESC) order"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of ``encode_cursor``; raises ValueError for anything else"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(id)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def newest_first(query: Select, model, after: Optional[Cursor] = None) -> Select:
+    """
+    Order a query newest first and, with a cursor, start right after it.
+
+    Rows are ordered by (created_at, id) so ties on created_at still have a
+    stable order, and the cursor condition is a row comparison that an index
+    ending in (created_at, id) answers without scanning the skipped rows.
+    """
+    if after is not None:
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(*after))
+    return query.order_by(model.created_at.desc(), model.id.desc())
@@ -1,13 +1,19 @@
-from typing import List, Optional
-from sqlalchemy import select
+from datetime import datetime
+from typing import Iterable, List, Optional
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.base import CRUDBase
+from app.crud.pagination import Cursor, newest_first
 from app.models import TradingAccount, Trade
 from app.schemas.trading import (
+    OrderCreate,
+    Portfolio,
+    Position,
     TradingAccountCreate,
     TradingAccountUpdate,
     TradeCreate,
+    TradeImport,
     TradeUpdate,
 )
 
@@ -26,6 +32,18 @@ class CRUDTradingAccount(CRUDBase[TradingAccount, TradingAccountCreate, TradingA
         )
         return result.scalars().all()
 
+    async def get_default(self, db: AsyncSession, *, user_id: int) -> Optional[TradingAccount]:
+        """
+        The account orders go to when none is named: the user's first one.
+        """
+        result = await db.execute(
+            select(TradingAccount)
+            .filter(TradingAccount.user_id == user_id)
+            .order_by(TradingAccount.id)
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
     async def get_by_broker(
         self, db: AsyncSession, *, user_id: int, broker: str
     ) -> Optional[TradingAccount]:
@@ -50,79 +68,144 @@ class CRUDTradingAccount(CRUDBase[TradingAccount, TradingAccountCreate, TradingA
         await db.refresh(db_obj)
         return db_obj
 
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Iterable[TradingAccountCreate], user_id: int
+    ) -> List[int]:
+        """
+        Bulk-create trading accounts for a user; returns their IDs.
+        """
+        rows = [{**obj_in.model_dump(), "user_id": user_id} for obj_in in objs_in]
+        return await super().create_many(db, rows=rows)
+
+    async def get_ids_for_user(self, db: AsyncSession, *, user_id: int, ids: Iterable[int]) -> List[int]:
+        """
+        The subset of ``ids`` that are trading accounts of the user.
+        """
+        result = await db.execute(
+            select(TradingAccount.id)
+            .filter(TradingAccount.user_id == user_id)
+            .filter(TradingAccount.id.in_(set(ids)))
+        )
+        return result.scalars().all()
+
+    async def get_portfolio(self, db: AsyncSession, *, user_id: int) -> Portfolio:
+        """
+        Portfolio summary of a user: the combined balance of their trading accounts.
+        """
+        result = await db.execute(
+            select(func.coalesce(func.sum(TradingAccount.balance), 0.0))
+            .filter(TradingAccount.user_id == user_id)
+        )
+        return Portfolio(buying_power=result.scalar_one())
+
 class CRUDTrade(CRUDBase[Trade, TradeCreate, TradeUpdate]):
     async def get_by_user(
-        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100, after: Optional[Cursor] = None
     ) -> List[Trade]:
         """
-        Get trades for a specific user.
+        Get trades for a specific user, newest first.
         """
-        result = await db.execute(
-            select(Trade)
-            .filter(Trade.user_id == user_id)
-            .order_by(Trade.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
+        query = select(Trade).filter(Trade.user_id == user_id)
+        result = await db.execute(newest_first(query, Trade, after).offset(skip).limit(limit))
         return result.scalars().all()
 
     async def get_by_account(
-        self, db: AsyncSession, *, account_id: int, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, account_id: int, skip: int = 0, limit: int = 100, after: Optional[Cursor] = None
     ) -> List[Trade]:
         """
-        Get trades for a specific trading account.
+        Get trades for a specific trading account, newest first.
         """
-        result = await db.execute(
-            select(Trade)
-            .filter(Trade.trading_account_id == account_id)
-            .order_by(Trade.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
+        query = select(Trade).filter(Trade.trading_account_id == account_id)
+        result = await db.execute(newest_first(query, Trade, after).offset(skip).limit(limit))
         return result.scalars().all()
 
     async def get_by_symbol(
-        self, db: AsyncSession, *, user_id: int, symbol: str, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, user_id: int, symbol: str, skip: int = 0, limit: int = 100, after: Optional[Cursor] = None
     ) -> List[Trade]:
         """
-        Get trades for a specific symbol.
+        Get trades for a specific symbol, newest first.
         """
-        result = await db.execute(
-            select(Trade)
-            .filter(Trade.user_id == user_id)
-            .filter(Trade.symbol == symbol)
-            .order_by(Trade.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
+        query = select(Trade).filter(Trade.user_id == user_id).filter(Trade.symbol == symbol)
+        result = await db.execute(newest_first(query, Trade, after).offset(skip).limit(limit))
         return result.scalars().all()
 
     async def get_ai_suggested(
-        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100, after: Optional[Cursor] = None
     ) -> List[Trade]:
         """
-        Get AI-suggested trades for a user.
+        Get AI-suggested trades for a user, newest first.
         """
-        result = await db.execute(
-            select(Trade)
-            .filter(Trade.user_id == user_id)
-            .filter(Trade.ai_suggested == True)
-            .order_by(Trade.created_at.desc())
-            .offset(skip)
-            .limit(limit)
-        )
+        query = select(Trade).filter(Trade.user_id == user_id).filter(Trade.ai_suggested == True)
+        result = await db.execute(newest_first(query, Trade, after).offset(skip).limit(limit))
         return result.scalars().all()
 
-    async def create(self, db: AsyncSession, *, obj_in: TradeCreate, user_id: int) -> Trade:
+    async def create(self, db: AsyncSession, *, obj_in: TradeCreate, user_id: int, status: str = "filled") -> Trade:
         """
-        Create a new trade.
+        Create a new trade; ``status`` applies unless ``obj_in`` has its own.
         """
-        obj_in_data = obj_in.model_dump()
+        obj_in_data = {"status": status, **obj_in.model_dump()}
         db_obj = Trade(**obj_in_data, user_id=user_id)
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
 
+    async def create_order(self, db: AsyncSession, *, obj_in: OrderCreate, user_id: int, price: float) -> Trade:
+        """
+        Store an order as a pending trade at ``price`` until the broker fills it.
+        """
+        db_obj = Trade(
+            **obj_in.model_dump(exclude={"price"}), price=price, status="pending", user_id=user_id
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def get_orders(
+        self, db: AsyncSession, *, user_id: int, status: Optional[str] = None, limit: int = 100
+    ) -> List[Trade]:
+        """
+        Get orders for a user, optionally only those with ``status``, newest first.
+        """
+        query = select(Trade).filter(Trade.user_id == user_id)
+        if status is not None:
+            query = query.filter(Trade.status == status)
+        result = await db.execute(newest_first(query, Trade).limit(limit))
+        return result.scalars().all()
+
+    async def get_positions(self, db: AsyncSession, *, user_id: int) -> List[Position]:
+        """
+        Open positions of a user, netted from their filled trades in one
+        aggregate query. The entry price is the average price paid.
+        """
+        bought = case((Trade.side == "buy", Trade.quantity), else_=0.0)
+        net = func.sum(case((Trade.side == "buy", Trade.quantity), else_=-Trade.quantity))
+        result = await db.execute(
+            select(Trade.symbol, net, func.sum(bought * Trade.price) / func.nullif(func.sum(bought), 0))
+            .filter(Trade.user_id == user_id)
+            .filter(Trade.status == "filled")
+            .group_by(Trade.symbol)
+            .having(net != 0)
+            .order_by(Trade.symbol)
+        )
+        return [
+            Position(symbol=symbol, quantity=quantity, average_entry_price=entry_price or 0.0)
+            for symbol, quantity, entry_price in result.all()
+        ]
+
+    async def create_many(self, db: AsyncSession, *, objs_in: Iterable[TradeImport], user_id: int) -> List[int]:
+        """
+        Bulk-create trades for a user; returns their IDs. Trades with an
+        execution time are dated by it, so history lists them where they
+        happened rather than at import time.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {**obj_in.model_dump(), "user_id": user_id, "created_at": obj_in.executed_at or now}
+            for obj_in in objs_in
+        ]
+        return await super().create_many(db, rows=rows)
+
 trading_account = CRUDTradingAccount(TradingAccount)
 trade = CRUDTrade(Trade) 
\ No newline at end of file
@@ -7,6 +7,7 @@ from passlib.context import CryptContext
 from app.crud.base import CRUDBase
 from app.models import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.user_cache import user_cache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -57,7 +58,17 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
 
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        db_obj = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        user_cache.invalidate(db_obj.id)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> User:
+        """
+        Delete a user.
+        """
+        obj = await super().remove(db, id=id)
+        user_cache.invalidate(id)
+        return obj
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
@@ -1,18 +1,91 @@
-from typing import AsyncGenerator, Optional
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from app.config import settings
 from app.models import Base
 
+logger = logging.getLogger(__name__)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that also records how long checkouts take: waiting
+    for a free connection, or opening a new one while under the overflow
+    limit.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def stats(self) -> Dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
 # Create async engine with configurable pooling
-def create_engine(url: Optional[str] = None, poolclass=None):
+def create_engine(url: Optional[str] = None, poolclass=None, **pool_options) -> AsyncEngine:
+    """
+    Engine for ``url`` (default: the configured database). Unless another
+    ``poolclass`` is given, connections come from a TimedQueuePool sized by
+    the DB_POOL_* settings; ``pool_options`` override them.
+    """
+    url = make_url(url or settings.DATABASE_URL)
+    options = {}
+    if poolclass is None:
+        poolclass = TimedQueuePool
+        options = {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            **pool_options,
+        }
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        # SQLAlchemy's prepared statement cache and asyncpg's own one
+        connect_args = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
     return create_async_engine(
-        url or settings.DATABASE_URL,
+        url,
         pool_pre_ping=True,
-        echo=settings.DEBUG,
+        echo=settings.DB_ECHO,
         poolclass=poolclass,
+        connect_args=connect_args,
+        **options,
     )
 
 # Create default engine
@@ -27,6 +100,102 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Read replica, when configured
+replica_engine = create_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+ReplicaSessionLocal = async_sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+) if replica_engine is not None else None
+
+# Seconds the standby is behind; 0 on a server that isn't replaying WAL, or has replayed all it received
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+async def replica_lag(session_factory: async_sessionmaker) -> float:
+    """Replication lag of the database behind ``session_factory``, in seconds"""
+    async with session_factory() as db:
+        if db.bind.dialect.name != "postgresql":
+            return 0.0  # Stand-ins such as SQLite don't replicate
+        return float(await db.scalar(REPLICA_LAG_SQL))
+
+class SessionRouter:
+    """
+    Picks the database for read-only work.
+
+    Reads go to the replica while its replication lag is within
+    ``max_lag`` seconds; when it falls further behind, or can't be reached,
+    they fall back to the primary until a later check finds it caught up.
+    Lag is checked at most every ``check_interval`` seconds. Writes always
+    use the primary.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replica: Optional[async_sessionmaker] = None,
+        max_lag: float = settings.DB_REPLICA_MAX_LAG,
+        check_interval: float = settings.DB_REPLICA_CHECK_INTERVAL,
+        lag_probe: Callable[[async_sessionmaker], Awaitable[float]] = replica_lag,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._probe = lag_probe
+        self._lock = asyncio.Lock()
+        self._checked_at: Optional[float] = None
+        self.lag: Optional[float] = None  # None until checked, or while the replica is unreachable
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def _check_due(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    async def replica_usable(self) -> bool:
+        """Whether reads should go to the replica right now"""
+        if self.replica is None:
+            return False
+        if self._check_due():
+            async with self._lock:
+                if self._check_due():
+                    try:
+                        self.lag = await self._probe(self.replica)
+                    except Exception as e:
+                        logger.warning(f"Read replica unavailable, reading from the primary: {str(e)}")
+                        self.lag = None
+                    self._checked_at = time.monotonic()
+        return self.lag is not None and self.lag <= self.max_lag
+
+    async def read_factory(self) -> async_sessionmaker:
+        """Session factory for a read-only request"""
+        if await self.replica_usable():
+            self.replica_reads += 1
+            return self.replica
+        self.primary_reads += 1
+        return self.primary
+
+    def stats(self) -> Dict:
+        return {
+            "configured": self.replica is not None,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "pool": pool_stats(self.replica.kw["bind"]) if self.replica is not None else None,
+        }
+
+def pool_stats(db_engine: AsyncEngine = None) -> Optional[Dict]:
+    """Connection pool usage of an engine (default: the app's), if it keeps a TimedQueuePool"""
+    pool = (db_engine or engine).pool
+    return pool.stats() if isinstance(pool, TimedQueuePool) else None
+
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting async database sessions."""
     async with AsyncSessionLocal() as session:
@@ -35,14 +204,19 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+# Create global session router instance
+session_router = SessionRouter(AsyncSessionLocal, ReplicaSessionLocal)
+
 async def init_db() -> None:
     """Initialize database with required tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 async def dispose_db() -> None:
-    """Dispose of the database engine."""
+    """Dispose of the database engines."""
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 # Test utilities
 def get_test_engine():
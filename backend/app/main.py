@@ -1,9 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api.v1.api import api_router
 from app.config import settings
+from app.crud.pagination import NEXT_CURSOR_HEADER
+from app.database import dispose_db
+from app.services.backtest_jobs import backtest_job_queue
+from app.services.backtest_runner import backtest_runner
+from app.services.trading import trading_service
+from app.services.websocket import websocket_manager
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Preload the asset catalog and keep it fresh in the background
+    if trading_service.api:
+        trading_service.assets.start()
+    # Heartbeat this process's backtest jobs and fail those left by a stopped one
+    backtest_job_queue.start()
+    yield
+    trading_service.assets.stop()
+    await backtest_job_queue.shutdown()
+    backtest_runner.shutdown()
+    await websocket_manager.close()
+    # Last, once nothing above needs a connection: close the primary and replica pools
+    await dispose_db()
 
 app = FastAPI(
     title="AI Trader Pro API",
@@ -12,6 +35,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -21,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Add Gzip compression
@@ -47,4 +72,4 @@ async def health_check():
             "redis": "connected",
             "trading_api": "connected"
         }
-    } 
\ No newline at end of file
+    }
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Boolean, Column, DateTime, Enum, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Boolean, Column, DateTime, Enum, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.ext.asyncio import AsyncAttrs
 
@@ -23,6 +23,7 @@ class User(Base):
     trading_accounts = relationship("TradingAccount", back_populates="user")
     trades = relationship("Trade", back_populates="user")
     api_keys = relationship("APIKey", back_populates="user")
+    backtest_jobs = relationship("BacktestJob", back_populates="user")
 
 class TradingAccount(Base):
     __tablename__ = "trading_accounts"
@@ -42,6 +43,13 @@ class TradingAccount(Base):
 
 class Trade(Base):
     __tablename__ = "trades"
+    __table_args__ = (
+        # One per trade-history query: its filters, then the (created_at, id) page order
+        Index("ix_trades_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_trades_trading_account_id_created_at", "trading_account_id", "created_at", "id"),
+        Index("ix_trades_user_id_symbol_created_at", "user_id", "symbol", "created_at", "id"),
+        Index("ix_trades_user_id_ai_suggested_created_at", "user_id", "ai_suggested", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -78,4 +86,23 @@ class APIKey(Base):
     # Relationships
     user = relationship("User", back_populates="api_keys")
 
+class BacktestJob(Base):
+    __tablename__ = "backtest_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)  # uuid4 hex
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    status: Mapped[str] = mapped_column(String(20), default="queued")  # "queued", "running", "completed", "failed", "cancelled"
+    params: Mapped[dict] = mapped_column(JSON)  # The submitted BacktestGridRequest
+    total_runs: Mapped[int] = mapped_column(Integer, default=0)
+    completed_runs: Mapped[int] = mapped_column(Integer, default=0)
+    result: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # Last touched by the process holding the job
+
+    # Relationships
+    user = relationship("User", back_populates="backtest_jobs")
+
 # Models will be added here 
\ No newline at end of file
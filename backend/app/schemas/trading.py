@@ -1,8 +1,11 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Annotated, Dict, Optional, List
 from decimal import Decimal
+import math
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+
+from app.config import settings
 
 # Trading Account Schemas
 class TradingAccountBase(BaseModel):
@@ -42,6 +45,16 @@ class TradeBase(BaseModel):
 class TradeCreate(TradeBase):
     trading_account_id: int
 
+class TradeImport(TradeCreate):
+    """A broker fill or replayed trade, as loaded by bulk import"""
+    status: str = Field("filled", pattern="^(pending|filled|cancelled|failed)$")
+    executed_at: Optional[datetime] = None
+
+class TradeImportResult(BaseModel):
+    imported: int
+    chunks: int
+    elapsed: float  # Seconds spent inserting
+
 class TradeUpdate(BaseModel):
     status: Optional[str] = Field(None, pattern="^(pending|filled|cancelled|failed)$")
     executed_at: Optional[datetime] = None
@@ -58,6 +71,32 @@ class TradeResponse(TradeBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+# Order Schemas
+class OrderCreate(BaseModel):
+    trading_account_id: Optional[int] = None  # The user's default account if not given
+    symbol: str = Field(..., min_length=1, max_length=20)
+    side: str = Field(..., pattern="^(buy|sell)$")
+    quantity: float
+    type: str = Field("market", pattern="^(market|limit|stop)$")
+    price: Optional[float] = Field(None, gt=0)  # Limit or stop price
+
+class Order(TradeResponse):
+    """An order is stored as a trade, pending until the broker fills it"""
+    pass
+
+# Portfolio Schemas
+class Position(BaseModel):
+    symbol: str
+    quantity: float
+    average_entry_price: float
+    current_price: Optional[float] = None
+    market_value: Optional[float] = None
+    unrealized_pl: Optional[float] = None
+
+class Portfolio(BaseModel):
+    buying_power: float
+    equity: Optional[float] = None
+
 # API Key Schemas
 class APIKeyBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
@@ -80,4 +119,78 @@ class APIKeyResponse(APIKeyBase):
     created_at: datetime
     updated_at: datetime
 
-    model_config = ConfigDict(from_attributes=True) 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
+
+# Market Data Schemas
+class TradingSignal(BaseModel):
+    symbol: str
+    signal: str = Field(..., pattern="^(BUY|SELL|HOLD)$")
+    confidence: float = Field(..., ge=0)
+    timestamp: datetime
+    indicators: Dict[str, float] = {}
+
+class BatchAnalysisRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=500)
+
+Period = Annotated[int, Field(ge=2)]  # Indicator window, in bars
+
+class BacktestGrid(BaseModel):
+    threshold: List[Annotated[float, Field(ge=0, le=1)]] = Field([0.6], min_length=1)
+    rsi_period: List[Period] = Field([14], min_length=1)
+    macd_fast: List[Period] = Field([12], min_length=1)
+    macd_slow: List[Period] = Field([26], min_length=1)
+    macd_signal: List[Period] = Field([9], min_length=1)
+    bb_period: List[Period] = Field([20], min_length=1)
+    bb_std: List[Annotated[float, Field(gt=0)]] = Field([2.0], min_length=1)
+
+    @model_validator(mode="after")
+    def check_macd_periods(self) -> "BacktestGrid":
+        # Every combination is run, so every fast period must be below every slow one
+        if max(self.macd_fast) >= min(self.macd_slow):
+            raise ValueError("every macd_fast period must be less than every macd_slow period")
+        return self
+
+    def combinations(self) -> int:
+        return math.prod(len(values) for values in self.model_dump().values())
+
+class BacktestGridRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, max_length=500)
+    days: int = Field(365, gt=0)
+    grid: BacktestGrid = BacktestGrid()
+    limit: int = Field(100, gt=0)  # Rows of the ranked table returned
+
+    @model_validator(mode="after")
+    def check_runs(self) -> "BacktestGridRequest":
+        if self.runs() > settings.BACKTEST_MAX_RUNS:
+            raise ValueError(f"grid has {self.runs()} runs; the limit is {settings.BACKTEST_MAX_RUNS}")
+        return self
+
+    def runs(self) -> int:
+        """Backtests in the expanded grid: one per distinct symbol and parameter combination"""
+        return len(set(s.upper() for s in self.symbols)) * self.grid.combinations()
+
+class BacktestJobResponse(BaseModel):
+    id: str
+    status: str
+    params: Dict
+    total_runs: int
+    completed_runs: int
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class MarketData(BaseModel):
+    symbol: str
+    price: float
+    volume: float
+    timestamp: datetime
+    high: float
+    low: float
+    open: float
+    trading_signal: Optional[str] = None
+    signal_confidence: Optional[float] = None
+    indicators: Optional[Dict[str, float]] = None
@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
 import openai
 from datetime import datetime, timedelta
 import numpy as np
@@ -6,20 +7,35 @@ from sklearn.preprocessing import MinMaxScaler
 import pandas as pd
 import yfinance as yf
 from app.schemas.trading import TradingSignal, MarketData
-from app.core.config import settings
+from app.config import settings
 import logging
+import time
 
 from app.services.trading import trading_service
+from app.services.indicators import IndicatorState, indicator_series, latest_indicators, panel_indicators
+from app.services.backtest import BUY, SELL, run_backtest, signal_arrays
+from app.services.market_history import daily_history
+from app.services.pipeline import StageGraph
+from app.services.analysis_cache import AnalysisCache, fingerprint
 
 logger = logging.getLogger(__name__)
 
+BATCH_DOWNLOAD_CHUNK = 50  # Symbols per batched history download
+SIGNAL_NAMES = {BUY: "BUY", SELL: "SELL"}
+PROMPT_BARS = 10  # Most recent bars included in the analysis prompt
+# How long an analysis stays valid, per bar timeframe (seconds)
+ANALYSIS_TTLS = {"1m": 60, "5m": 5 * 60, "15m": 15 * 60, "1h": 60 * 60, "1D": 4 * 60 * 60}
+
 class AITradingService:
     def __init__(self, api_key: str):
         openai.api_key = api_key
         self.model = "gpt-4-turbo-preview"  # Using the latest GPT-4 model
+        self.temperature = 0.7
         self.scaler = MinMaxScaler()
         self.lookback_period = 20  # Days of historical data to consider
         self.prediction_threshold = 0.6  # Confidence threshold for trading signals
+        self.indicator_states: Dict[str, IndicatorState] = {}  # Streaming indicators per symbol
+        self.analysis_cache = AnalysisCache()
         
     async def analyze_market(
         self,
@@ -27,42 +43,86 @@ class AITradingService:
         timeframe: str = "1D",
         lookback_days: int = 30,
     ) -> Dict:
-        """Analyze market data and generate trading suggestions."""
+        """
+        Analyze market data and generate trading suggestions.
+
+        Runs as a stage graph: bars and asset info are fetched concurrently,
+        then indicators, prompt, LLM call and parsing follow their inputs.
+        Per-stage timings (seconds) are returned under ``timings``.
+
+        Parsed analyses are cached under a fingerprint of the prompt inputs,
+        so repeat requests with no new bar skip the LLM call entirely.
+        """
         try:
-            # Get historical data
             end = datetime.now()
             start = end - timedelta(days=lookback_days)
-            bars = await trading_service.get_bars(symbol, timeframe, start, end)
-            
-            # Get asset info
-            asset = await trading_service.get_asset(symbol)
-            
-            # Prepare market data for analysis
-            market_data = {
-                "symbol": symbol,
-                "name": asset["name"],
-                "exchange": asset["exchange"],
-                "historical_data": bars[-10:],  # Last 10 data points for brevity
-                "current_price": bars[-1]["close"] if bars else None,
-            }
-            
-            # Generate analysis prompt
-            prompt = self._generate_analysis_prompt(market_data)
-            
-            # Get AI analysis
-            response = await self._get_ai_analysis(prompt)
-            
-            # Parse and structure the response
-            analysis = self._parse_ai_response(response)
-            
+            started = time.perf_counter()
+            llm_timings: Dict[str, float] = {}
+
+            async def analyze(prompt: str) -> Dict:
+                stage_started = time.perf_counter()
+                response = await self._get_ai_analysis(prompt)
+                llm_timings["llm"] = time.perf_counter() - stage_started
+                stage_started = time.perf_counter()
+                analysis = self._parse_ai_response(response)
+                llm_timings["parse"] = time.perf_counter() - stage_started
+                return analysis
+
+            source: Dict[str, str] = {}
+
+            async def cached_analysis(bars: List[Dict], prompt: str) -> Dict:
+                key = fingerprint(
+                    symbol=symbol.upper(),
+                    timeframe=timeframe,
+                    lookback_days=lookback_days,
+                    bars=bars[-PROMPT_BARS:],
+                    model=self.model,
+                    temperature=self.temperature,
+                )
+                ttl = ANALYSIS_TTLS.get(timeframe, ANALYSIS_TTLS["1D"])
+                analysis, source["analysis"] = await self.analysis_cache.lookup(key, ttl, lambda: analyze(prompt))
+                return analysis
+
+            graph = (
+                StageGraph()
+                .stage("bars", lambda: trading_service.get_bars(symbol, timeframe, start, end))
+                # Served from the in-memory asset catalog once it has loaded
+                .stage("asset", lambda: trading_service.get_asset(symbol))
+                .stage("indicators", self._bar_indicators, "bars")
+                .stage("prompt", lambda bars, asset, indicators: self._generate_analysis_prompt({
+                    "symbol": symbol,
+                    "name": asset["name"],
+                    "exchange": asset["exchange"],
+                    "historical_data": bars[-PROMPT_BARS:],  # Last few data points for brevity
+                    "current_price": bars[-1]["close"] if bars else None,
+                    "indicators": indicators,
+                }), "bars", "asset", "indicators")
+                # LLM call and parsing, unless a cached analysis matches
+                .stage("analysis", cached_analysis, "bars", "prompt")
+            )
+            results, timings = await graph.run()
+            timings.update(llm_timings)
+            timings["total"] = time.perf_counter() - started
+            bars = results["bars"]
+
             return {
                 "symbol": symbol,
                 "timestamp": datetime.now().isoformat(),
-                "current_price": market_data["current_price"],
-                "analysis": analysis,
+                "current_price": bars[-1]["close"] if bars else None,
+                "analysis": results["analysis"],
+                # Served from a stored analysis, or by joining an identical call in flight
+                "cached": source["analysis"] == "cache",
+                "shared": source["analysis"] == "shared",
+                "timings": timings,
             }
         except Exception as e:
             raise Exception(f"Failed to analyze market: {str(e)}")
+
+    def _bar_indicators(self, bars: List[Dict]) -> Dict[str, float]:
+        """Latest technical indicators over the fetched bars (NaN where the history is too short)."""
+        if not bars:
+            return {}
+        return latest_indicators(indicator_series(pd.Series([bar["close"] for bar in bars], dtype=float)))
     
     def _generate_analysis_prompt(self, market_data: Dict) -> str:
         """Generate a prompt for market analysis."""
@@ -72,6 +132,7 @@ class AITradingService:
         Asset: {market_data['symbol']} ({market_data['name']})
         Exchange: {market_data['exchange']}
         Current Price: ${market_data['current_price']}
+        Technical indicators: {self._format_indicators(market_data.get('indicators', {}))}
 
         Recent price action:
         {self._format_price_data(market_data['historical_data'])}
@@ -97,7 +158,7 @@ class AITradingService:
                     {"role": "system", "content": "You are an expert AI trading analyst."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.7,
+                temperature=self.temperature,
                 max_tokens=1000,
             )
             return response.choices[0].message.content
@@ -148,6 +209,11 @@ class AITradingService:
         
         return analysis
 
+    def _format_indicators(self, indicators: Dict[str, float]) -> str:
+        """Format the indicators that could be computed for the prompt."""
+        values = [f"{name}: {value:.2f}" for name, value in indicators.items() if np.isfinite(value)]
+        return ", ".join(values) or "not available"
+
     def _format_price_data(self, bars: List[Dict]) -> str:
         """Format price data for the prompt."""
         return "\n".join([
@@ -194,50 +260,119 @@ class AITradingService:
             logger.error(f"Error analyzing market data for {symbol}: {str(e)}")
             raise
 
-    async def _fetch_historical_data(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    async def analyze_batch(self, symbols: List[str]) -> AsyncIterator[TradingSignal]:
         """
-        Fetch historical market data using yfinance.
+        Trading signals for a whole watchlist.
+
+        History is downloaded with one batched request per
+        ``BATCH_DOWNLOAD_CHUNK`` symbols (requests run concurrently), each
+        batch's indicators are computed as one panel, and every batch's
+        signals are yielded as soon as that batch is done. The signals match
+        ``analyze_market_data`` for each symbol on its own.
         """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=self.lookback_period)
+        chunks = [symbols[i:i + BATCH_DOWNLOAD_CHUNK] for i in range(0, len(symbols), BATCH_DOWNLOAD_CHUNK)]
+        tasks = [asyncio.create_task(self._batch_signals(chunk, start_date, end_date)) for chunk in chunks]
         try:
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(start=start_date, end=end_date, interval="1d")
-            return df
+            for next_done in asyncio.as_completed(tasks):
+                for signal in await next_done:
+                    yield signal
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _batch_signals(self, symbols: List[str], start_date: datetime, end_date: datetime) -> List[TradingSignal]:
+        closes = await self._fetch_close_panel(symbols, start_date, end_date)
+        latest = panel_indicators(closes)
+        codes, confidences = signal_arrays(latest, self.prediction_threshold)
+        results = {
+            symbol: (SIGNAL_NAMES.get(code, "HOLD"), float(confidence), indicators)
+            for symbol, code, confidence, indicators in zip(
+                latest.index, codes, confidences, latest.to_dict("records")
+            )
+        }
+
+        now = datetime.now()
+        signals = []
+        for symbol in symbols:
+            if symbol not in results:
+                logger.warning(f"No historical data available for {symbol}")
+            signal, confidence, indicators = results.get(symbol, ("HOLD", 0.0, {}))
+            signals.append(TradingSignal(
+                symbol=symbol,
+                signal=signal,
+                confidence=confidence,
+                timestamp=now,
+                indicators=indicators,
+            ))
+        return signals
+
+    async def _fetch_close_panel(self, symbols: List[str], start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        Daily closes for many symbols (time x symbols) from one yfinance download.
+        """
+        try:
+            data = await asyncio.to_thread(
+                yf.download,
+                symbols,
+                start=start_date,
+                end=end_date,
+                interval="1d",
+                group_by="column",
+                auto_adjust=True,
+                progress=False,
+            )
         except Exception as e:
-            logger.error(f"Error fetching historical data: {str(e)}")
-            return pd.DataFrame()
+            logger.error(f"Error downloading historical data for {len(symbols)} symbols: {str(e)}")
+            return pd.DataFrame(columns=symbols, dtype=float)
+        if data.empty:
+            return pd.DataFrame(columns=symbols, dtype=float)
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(symbols[0])
+        return closes.reindex(columns=symbols)
+
+    async def stream_signal(self, symbol: str, close: float, timestamp: datetime) -> TradingSignal:
+        """
+        Update the streaming indicators for a symbol with its latest price.
+
+        The first call seeds the symbol's state from daily history; after that
+        each tick revises today's daily bar in O(1) instead of recomputing the
+        indicators over the whole lookback.
+        """
+        state = self.indicator_states.get(symbol)
+        if state is None:
+            start_date = timestamp - timedelta(days=self.lookback_period)
+            df = await self._fetch_historical_data(symbol, start_date, timestamp)
+            closes = df['Close'] if not df.empty else pd.Series(dtype=float)
+            closes = pd.Series(closes.to_numpy(), index=[ts.date() for ts in closes.index])
+            state = self.indicator_states[symbol] = IndicatorState.from_history(closes)
+
+        indicators = state.update(close, key=timestamp.date())
+        signal, confidence = self._generate_signal(indicators)
+
+        return TradingSignal(
+            symbol=symbol,
+            signal=signal,
+            confidence=confidence,
+            timestamp=datetime.now(),
+            indicators=indicators
+        )
+
+    async def _fetch_historical_data(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """
+        Fetch historical market data using yfinance, through the shared bar
+        cache and the on-disk bar store.
+        """
+        return await daily_history(symbol, start_date, end_date)
 
     def _calculate_indicators(self, df: pd.DataFrame) -> Dict[str, float]:
         """
         Calculate technical indicators for analysis.
         """
-        # Calculate RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-
-        # Calculate MACD
-        exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-        macd = exp1 - exp2
-        signal_line = macd.ewm(span=9, adjust=False).mean()
-
-        # Calculate Bollinger Bands
-        sma = df['Close'].rolling(window=20).mean()
-        std = df['Close'].rolling(window=20).std()
-        upper_band = sma + (std * 2)
-        lower_band = sma - (std * 2)
-
-        return {
-            'rsi': float(rsi.iloc[-1]),
-            'macd': float(macd.iloc[-1]),
-            'macd_signal': float(signal_line.iloc[-1]),
-            'bb_upper': float(upper_band.iloc[-1]),
-            'bb_lower': float(lower_band.iloc[-1]),
-            'bb_middle': float(sma.iloc[-1]),
-            'current_price': float(df['Close'].iloc[-1])
-        }
+        return latest_indicators(indicator_series(df['Close']))
 
     def _generate_signal(self, indicators: Dict[str, float]) -> tuple[str, float]:
         """
@@ -295,49 +430,7 @@ class AITradingService:
         if df.empty:
             return {'error': 'No historical data available for backtesting'}
 
-        initial_balance = 100000  # $100,000 initial capital
-        balance = initial_balance
-        position = 0
-        trades = []
-
-        for i in range(20, len(df)):
-            historical_data = df.iloc[:i+1]
-            indicators = self._calculate_indicators(historical_data)
-            signal, confidence = self._generate_signal(indicators)
-            
-            current_price = df['Close'].iloc[i]
-            
-            if signal == 'BUY' and position == 0:
-                shares = (balance * 0.95) // current_price  # Use 95% of balance
-                if shares > 0:
-                    position = shares
-                    balance -= shares * current_price
-                    trades.append({
-                        'date': df.index[i].strftime('%Y-%m-%d'),
-                        'type': 'BUY',
-                        'price': current_price,
-                        'shares': shares,
-                        'balance': balance + (position * current_price)
-                    })
-                    
-            elif signal == 'SELL' and position > 0:
-                balance += position * current_price
-                trades.append({
-                    'date': df.index[i].strftime('%Y-%m-%d'),
-                    'type': 'SELL',
-                    'price': current_price,
-                    'shares': position,
-                    'balance': balance
-                })
-                position = 0
-
-        final_balance = balance + (position * df['Close'].iloc[-1])
-        return {
-            'initial_balance': initial_balance,
-            'final_balance': final_balance,
-            'return_pct': ((final_balance - initial_balance) / initial_balance) * 100,
-            'trades': trades
-        }
+        return run_backtest(df, self.prediction_threshold)
 
 # Create default AI trading service instance
 ai_trading_service = AITradingService(settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None 
\ No newline at end of file
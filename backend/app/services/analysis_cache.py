@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import hashlib
+import json
+import logging
+import time
+
+from app.config import settings
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+def fingerprint(**inputs: Any) -> str:
+    """Stable hash of the inputs that determine an analysis"""
+    encoded = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+class AnalysisCache:
+    """
+    Cache of parsed LLM analyses keyed by a fingerprint of their inputs.
+
+    Entries expire after a per-entry TTL and the least recently used entry
+    is evicted once ``max_entries`` is reached. Concurrent callers asking for
+    the same key while it is being computed share that one computation;
+    failures are passed to every waiter and never cached.
+    """
+
+    def __init__(self, max_entries: int = settings.ANALYSIS_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()  # key -> (value, expires at)
+        self._flight = SingleFlight("analysis")
+        self.hits = 0
+        self.evictions = 0
+
+    async def get(self, key: str, ttl: float, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key``, computing it at most once"""
+        value, _ = await self.lookup(key, ttl, compute)
+        return value
+
+    async def lookup(self, key: str, ttl: float, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        ``get``, also returning where the value came from: "cache" for a
+        stored entry, "shared" for a computation another caller had already
+        started, "computed" when this call ran ``compute``
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[0], "cache"
+            del self._entries[key]
+
+        source = "shared" if self._flight.running(key) else "computed"
+        return await self._flight.do(key, lambda: self._compute(key, ttl, compute)), source
+
+    async def _compute(self, key: str, ttl: float, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = await compute()
+        self._store(key, value, ttl)
+        return value
+
+    def _store(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        flight = self._flight.stats()
+        return {
+            "hits": self.hits,
+            "shared": flight["shared"],
+            "misses": flight["upstream"],
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
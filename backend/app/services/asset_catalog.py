@@ -0,0 +1,108 @@
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+AssetLoader = Callable[[], Awaitable[List[dict]]]
+
+LAZY_LOAD_RETRY = 60.0  # Seconds between lazy load attempts after a failure
+
+class AssetCatalog:
+    """
+    In-memory catalog of tradable assets, bulk-loaded from the broker.
+
+    Lookups are dict reads and never touch the network; an unloaded catalog
+    starts loading in the background and answers ``None`` until it is ready.
+    A background task reloads the whole catalog every ``refresh_interval``
+    seconds, swapping the new data in at once. Symbols are also kept sorted
+    so prefix search is a binary search.
+    """
+
+    def __init__(self, load: AssetLoader, refresh_interval: float = settings.ASSET_CATALOG_REFRESH_INTERVAL):
+        self._load = load
+        self.refresh_interval = refresh_interval
+        self.assets: Dict[str, dict] = {}
+        self._symbols: List[str] = []  # Sorted, for prefix search
+        self.loaded_at: Optional[float] = None
+        self._loading: Optional[asyncio.Task] = None
+        self._attempted_at: Optional[float] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    async def load(self) -> int:
+        """Fetch every asset and replace the catalog; returns the asset count"""
+        assets = {asset["symbol"].upper(): asset for asset in await self._load()}
+        self.assets = assets
+        self._symbols = sorted(assets)
+        self.loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(assets)} assets into the catalog")
+        return len(assets)
+
+    def ensure_loaded(self):
+        """Start a background load unless one already ran, is running or just failed"""
+        if self.loaded_at is not None or (self._loading is not None and not self._loading.done()):
+            return
+        if self._attempted_at is not None and time.monotonic() - self._attempted_at < LAZY_LOAD_RETRY:
+            return
+        self._attempted_at = time.monotonic()
+        self._loading = asyncio.create_task(self._load_quietly())
+
+    async def _load_quietly(self):
+        try:
+            await self.load()
+        except Exception as e:
+            logger.error(f"Error loading asset catalog: {str(e)}")
+
+    def get(self, symbol: str) -> Optional[dict]:
+        """Asset metadata for a symbol, or None if unknown or not loaded yet"""
+        self.ensure_loaded()
+        return self.assets.get(symbol.upper())
+
+    def add(self, asset: dict):
+        """Record an asset fetched individually, e.g. one listed after the last refresh"""
+        symbol = asset["symbol"].upper()
+        if symbol not in self.assets:
+            index = bisect_left(self._symbols, symbol)
+            self._symbols = self._symbols[:index] + [symbol] + self._symbols[index:]
+        self.assets[symbol] = asset
+
+    def search(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Assets whose symbol starts with ``prefix``, in symbol order"""
+        self.ensure_loaded()
+        prefix = prefix.upper()
+        if not prefix:
+            return []
+        symbols = self._symbols
+        results = []
+        for i in range(bisect_left(symbols, prefix), len(symbols)):
+            if not symbols[i].startswith(prefix) or len(results) >= limit:
+                break
+            results.append(self.assets[symbols[i]])
+        return results
+
+    def start(self):
+        """Load now and keep refreshing in the background"""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            await self._load_quietly()
+            await asyncio.sleep(self.refresh_interval)
+
+    def stop(self):
+        for task in (self._refresher, self._loading):
+            if task is not None:
+                task.cancel()
+        self._refresher = None
+        self._loading = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self.assets),
+            "age": time.monotonic() - self.loaded_at if self.loaded_at is not None else None,
+        }
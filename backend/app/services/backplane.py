@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[str, str], None]  # (channel, message)
+
+class Backplane(ABC):
+    """
+    Pub/sub transport shared by every worker serving websockets.
+
+    Producers publish encoded messages to named channels and every worker's
+    handler receives them, so a tick fetched by one worker reaches the
+    sockets held by all of them. Leases elect a single owner per key (e.g.
+    one producer per symbol); an owner that stops renewing loses its lease
+    after ``ttl`` seconds and another worker can claim it.
+    """
+
+    @abstractmethod
+    async def listen(self, handler: MessageHandler):
+        """Deliver every message published on any channel to ``handler``"""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        """Send ``message`` to the handlers of every worker"""
+
+    @abstractmethod
+    async def claim(self, key: str, owner: str, ttl: float) -> bool:
+        """Take or renew the lease on ``key``; False while another owner holds it"""
+
+    @abstractmethod
+    async def release(self, key: str, owner: str):
+        """Give up the lease on ``key`` if ``owner`` holds it"""
+
+    @abstractmethod
+    async def close(self):
+        """Stop listening and release the connection"""
+
+class InProcessHub:
+    """Shared state behind in-process backplanes; one hub stands in for one Redis server"""
+
+    def __init__(self):
+        self.handlers: List[MessageHandler] = []
+        self.leases: Dict[str, Tuple[str, float]] = {}  # key -> (owner, expires at)
+
+class InProcessBackplane(Backplane):
+    """
+    Backplane for a single process and for tests. Messages are delivered to
+    handlers synchronously on publish. Pass the same hub to several
+    backplanes to simulate several workers.
+    """
+
+    def __init__(self, hub: Optional[InProcessHub] = None):
+        self.hub = hub or InProcessHub()
+        self._handler: Optional[MessageHandler] = None
+
+    async def listen(self, handler: MessageHandler):
+        if self._handler is None:
+            self._handler = handler
+            self.hub.handlers.append(handler)
+
+    async def publish(self, channel: str, message: str):
+        for handler in list(self.hub.handlers):
+            try:
+                handler(channel, message)
+            except Exception as e:
+                logger.error(f"Error handling backplane message on {channel}: {str(e)}")
+
+    async def claim(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.monotonic()
+        holder = self.hub.leases.get(key)
+        if holder is not None and holder[0] != owner and holder[1] > now:
+            return False
+        self.hub.leases[key] = (owner, now + ttl)
+        return True
+
+    async def release(self, key: str, owner: str):
+        holder = self.hub.leases.get(key)
+        if holder is not None and holder[0] == owner:
+            del self.hub.leases[key]
+
+    async def close(self):
+        if self._handler in self.hub.handlers:
+            self.hub.handlers.remove(self._handler)
+        self._handler = None
+
+# Take the lease if it is free, renew it if we already own it
+_CLAIM_SCRIPT = """
+local holder = redis.call('get', KEYS[1])
+if holder == ARGV[1] then
+    redis.call('pexpire', KEYS[1], ARGV[2])
+    return 1
+end
+if not holder then
+    redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class RedisBackplane(Backplane):
+    """
+    Backplane over Redis pub/sub, with leases stored as expiring keys.
+    All channels share one prefix so each worker needs a single pattern
+    subscription; the listener reconnects on its own after Redis errors.
+    """
+
+    def __init__(self, url: str = settings.REDIS_URL, prefix: str = "ws:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self.redis = redis.from_url(url, decode_responses=True)
+        self._claim = self.redis.register_script(_CLAIM_SCRIPT)
+        self._release = self.redis.register_script(_RELEASE_SCRIPT)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def listen(self, handler: MessageHandler):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen_loop(handler))
+
+    async def _listen_loop(self, handler: MessageHandler):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{self.prefix}*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    try:
+                        handler(message["channel"][len(self.prefix):], message["data"])
+                    except Exception as e:
+                        logger.error(f"Error handling backplane message on {message['channel']}: {str(e)}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Backplane subscription lost, reconnecting: {str(e)}")
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+
+    async def publish(self, channel: str, message: str):
+        await self.redis.publish(f"{self.prefix}{channel}", message)
+
+    async def claim(self, key: str, owner: str, ttl: float) -> bool:
+        return bool(await self._claim(keys=[f"{self.prefix}lease:{key}"], args=[owner, int(ttl * 1000)]))
+
+    async def release(self, key: str, owner: str):
+        await self._release(keys=[f"{self.prefix}lease:{key}"], args=[owner])
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        await self.redis.aclose()
+
+def create_backplane(kind: str = settings.WS_BACKPLANE) -> Backplane:
+    """Build the backplane selected by ``WS_BACKPLANE`` ("memory" or "redis")"""
+    if kind == "redis":
+        return RedisBackplane(settings.REDIS_URL)
+    if kind == "memory":
+        return InProcessBackplane()
+    raise ValueError(f"Unknown websocket backplane: {kind}")
@@ -0,0 +1,110 @@
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+
+from app.services.indicators import indicator_series
+
+INITIAL_BALANCE = 100000  # $100,000 initial capital
+POSITION_SIZE = 0.95  # Fraction of the balance used per entry
+WARMUP_BARS = 20  # Bars skipped before the first signal is evaluated
+
+BUY = 1
+SELL = -1
+HOLD = 0
+
+def signal_arrays(frame: pd.DataFrame, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized form of ``AITradingService._generate_signal``.
+
+    Returns an array of BUY/SELL/HOLD codes and the matching confidences for
+    every row of an indicator frame. Confidences are accumulated in the same
+    order as the scalar rules so the sums are bit-for-bit identical.
+    """
+    rsi = frame['rsi'].to_numpy()
+    macd = frame['macd'].to_numpy()
+    macd_signal = frame['macd_signal'].to_numpy()
+    price = frame['current_price'].to_numpy()
+    bb_lower = frame['bb_lower'].to_numpy()
+    bb_upper = frame['bb_upper'].to_numpy()
+
+    # NaN comparisons are False, matching the scalar rules during warm-up
+    rsi_buy = rsi < 30
+    rsi_sell = ~rsi_buy & (rsi > 70)
+    macd_buy = macd > macd_signal
+    macd_sell = ~macd_buy & (macd < macd_signal)
+    bb_buy = price < bb_lower
+    bb_sell = ~bb_buy & (price > bb_upper)
+
+    buy_confidence = np.zeros(len(frame))
+    buy_confidence += np.where(rsi_buy, 0.7, 0.0)
+    buy_confidence += np.where(macd_buy, 0.6, 0.0)
+    buy_confidence += np.where(bb_buy, 0.8, 0.0)
+
+    sell_confidence = np.zeros(len(frame))
+    sell_confidence += np.where(rsi_sell, 0.7, 0.0)
+    sell_confidence += np.where(macd_sell, 0.6, 0.0)
+    sell_confidence += np.where(bb_sell, 0.8, 0.0)
+
+    is_buy = (buy_confidence > sell_confidence) & (buy_confidence > threshold)
+    is_sell = (sell_confidence > buy_confidence) & (sell_confidence > threshold)
+
+    signals = np.select([is_buy, is_sell], [BUY, SELL], default=HOLD)
+    confidences = np.select([is_buy, is_sell], [buy_confidence, sell_confidence], default=0.0)
+    return signals, confidences
+
+def run_backtest(
+    df: pd.DataFrame,
+    threshold: float,
+    initial_balance: float = INITIAL_BALANCE,
+    warmup: int = WARMUP_BARS,
+    **indicator_params,
+) -> Dict:
+    """
+    Backtest the indicator strategy over a price frame in a single pass.
+
+    Indicators and signals are computed once for the whole frame; only the
+    position state machine walks the bars, and only the bars that carry a
+    BUY or SELL signal are visited.
+    """
+    frame = indicator_series(df['Close'], **indicator_params)
+    signals, _ = signal_arrays(frame, threshold)
+    close = df['Close'].to_numpy()
+
+    balance = initial_balance
+    position = 0
+    trades: List[Dict] = []
+
+    for i in np.flatnonzero(signals[warmup:]) + warmup:
+        current_price = close[i]
+
+        if signals[i] == BUY and position == 0:
+            shares = (balance * POSITION_SIZE) // current_price
+            if shares > 0:
+                position = shares
+                balance -= shares * current_price
+                trades.append({
+                    'date': df.index[i].strftime('%Y-%m-%d'),
+                    'type': 'BUY',
+                    'price': current_price,
+                    'shares': shares,
+                    'balance': balance + (position * current_price)
+                })
+
+        elif signals[i] == SELL and position > 0:
+            balance += position * current_price
+            trades.append({
+                'date': df.index[i].strftime('%Y-%m-%d'),
+                'type': 'SELL',
+                'price': current_price,
+                'shares': position,
+                'balance': balance
+            })
+            position = 0
+
+    final_balance = balance + (position * close[-1])
+    return {
+        'initial_balance': initial_balance,
+        'final_balance': final_balance,
+        'return_pct': ((final_balance - initial_balance) / initial_balance) * 100,
+        'trades': trades
+    }
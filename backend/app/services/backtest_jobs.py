@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.crud.backtest_job import ACTIVE_STATUSES, backtest_job as backtest_job_crud
+from app.database import AsyncSessionLocal
+from app.models import BacktestJob
+from app.schemas.trading import BacktestGridRequest
+from app.services.backtest_runner import backtest_runner
+from app.services.market_history import daily_history
+from app.services.websocket import websocket_manager
+
+logger = logging.getLogger(__name__)
+
+JobNotifier = Callable[[str, dict], Awaitable[None]]
+
+async def backtest_grid(
+    symbols: List[str],
+    grid: Dict[str, List[Any]],
+    days: int = 365,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict:
+    """
+    Backtest every combination of a parameter grid on every symbol's daily
+    history, on the backtest process pool. Results are ranked by return;
+    ``progress`` is passed on to ``BacktestRunner.run``.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    frames = await asyncio.gather(*(daily_history(s, start_date, end_date) for s in symbols))
+    frames = dict(zip(symbols, frames))
+
+    started = time.perf_counter()
+    results = await backtest_runner.run(frames, grid, progress)
+    return {
+        'symbols': [s for s in symbols if not frames[s].empty],
+        'skipped': [s for s in symbols if frames[s].empty],
+        'runs': len(results),
+        'elapsed': time.perf_counter() - started,
+        'results': results,
+    }
+
+class BacktestJobQueue:
+    """
+    Runs grid backtests as background jobs.
+
+    A submitted job is stored as "queued" and started once one of
+    ``max_concurrent`` slots is free; the backtest itself runs on the
+    backtest process pool, so the API's event loop only waits on it. While
+    it runs, progress is saved to the job row and published to the sockets
+    watching the job every ``progress_interval`` seconds. A job cancelled
+    from any worker is stopped at its next progress save. Finished jobs keep
+    their ranked results in the row. Once started, each process heartbeats
+    its queued and running jobs, and fails any job whose process stopped
+    heartbeating it ``stale_after`` seconds ago.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        max_concurrent: int = settings.BACKTEST_MAX_CONCURRENT_JOBS,
+        progress_interval: float = settings.BACKTEST_PROGRESS_INTERVAL,
+        heartbeat_interval: float = settings.BACKTEST_HEARTBEAT_INTERVAL,
+        stale_after: float = settings.BACKTEST_STALE_AFTER,
+        backtest: Optional[Callable[..., Awaitable[Dict]]] = None,
+        notify: Optional[JobNotifier] = None,
+    ):
+        self._session_factory = session_factory
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.progress_interval = progress_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self._backtest = backtest
+        self._notify = notify or websocket_manager.publish_job_update
+        self._tasks: Dict[str, asyncio.Task] = {}  # Jobs queued or running in this process
+        self._progress: Dict[str, Tuple[int, int]] = {}  # job id -> (completed runs, total runs)
+        self._monitor: Optional[asyncio.Task] = None
+
+    async def submit(self, db: AsyncSession, user_id: int, request: BacktestGridRequest) -> BacktestJob:
+        """Store a new job and queue it; returns the job row"""
+        job = await backtest_job_crud.create(
+            db, id=uuid.uuid4().hex, obj_in=request, user_id=user_id, total_runs=request.runs()
+        )
+        task = asyncio.create_task(self._execute(job.id, request))
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _, job_id=job.id: self._tasks.pop(job_id, None))
+        return job
+
+    async def cancel(self, db: AsyncSession, job: BacktestJob) -> bool:
+        """
+        Cancel a queued or running job. The worker running it stops at its
+        next progress save if that isn't this process.
+        """
+        cancelled = await backtest_job_crud.transition(db, id=job.id, from_statuses=ACTIVE_STATUSES, status="cancelled")
+        task = self._tasks.get(job.id)
+        if task is not None:
+            task.cancel()
+        if cancelled:
+            await self._publish(job.id, "cancelled", job.completed_runs, job.total_runs)
+        return cancelled
+
+    async def _execute(self, job_id: str, request: BacktestGridRequest):
+        try:
+            async with self._slots:
+                await self._run(job_id, request)
+        except asyncio.CancelledError:
+            # Cancelled while waiting for a slot or running, or shutting down: record it unless cancel() already did
+            if await self._transition(job_id, ACTIVE_STATUSES, status="cancelled"):
+                await self._publish(job_id, "cancelled", *self._progress.get(job_id, (0, 0)))
+            raise
+        finally:
+            self._progress.pop(job_id, None)
+
+    async def _run(self, job_id: str, request: BacktestGridRequest):
+        if not await self._transition(job_id, ("queued",), status="running", started_at=datetime.utcnow()):
+            return  # Cancelled while queued
+        backtest = self._backtest or backtest_grid
+        work = asyncio.ensure_future(backtest(
+            request.symbols,
+            request.grid.model_dump(),
+            request.days,
+            lambda done, total: self._progress.__setitem__(job_id, (done, total)),
+        ))
+        try:
+            while not (await asyncio.wait({work}, timeout=self.progress_interval))[0]:
+                if not await self._save_progress(job_id):
+                    logger.info(f"Backtest job {job_id} was cancelled")
+                    return
+            report = work.result()
+            report['results'] = report['results'][:request.limit]
+            if await self._transition(
+                job_id, ("running",),
+                status="completed", completed_runs=report['runs'], total_runs=report['runs'], result=report,
+            ):
+                await self._publish(job_id, "completed", report['runs'], report['runs'])
+        except Exception as e:
+            logger.error(f"Backtest job {job_id} failed: {str(e)}")
+            if await self._transition(job_id, ACTIVE_STATUSES, status="failed", error=str(e)):
+                await self._publish(job_id, "failed", *self._progress.get(job_id, (0, 0)))
+        finally:
+            work.cancel()
+
+    async def _save_progress(self, job_id: str) -> bool:
+        """Persist and publish progress; False once the job was cancelled"""
+        if job_id not in self._progress:
+            # Still fetching history: only check the job wasn't cancelled
+            async with self._session_factory() as db:
+                job = await backtest_job_crud.get(db, job_id)
+            return job is not None and job.status == "running"
+        done, total = self._progress[job_id]
+        if not await self._transition(job_id, ("running",), completed_runs=done, total_runs=total):
+            return False
+        await self._publish(job_id, "running", done, total)
+        return True
+
+    async def _transition(self, job_id: str, from_statuses: Tuple[str, ...], **values) -> bool:
+        async with self._session_factory() as db:
+            return await backtest_job_crud.transition(db, id=job_id, from_statuses=from_statuses, **values)
+
+    async def _publish(self, job_id: str, status: str, completed_runs: int, total_runs: int):
+        try:
+            await self._notify(job_id, {
+                "type": "backtest_job",
+                "job_id": job_id,
+                "status": status,
+                "completed_runs": completed_runs,
+                "total_runs": total_runs,
+            })
+        except Exception as e:
+            logger.error(f"Error publishing backtest job update: {str(e)}")
+
+    def start(self):
+        """Keep this process's jobs alive and fail those orphaned by a stopped process"""
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.create_task(self._monitor_loop())
+
+    async def _monitor_loop(self):
+        while True:
+            try:
+                await self.heartbeat()
+                await self.fail_orphaned()
+            except Exception as e:
+                logger.error(f"Error monitoring backtest jobs: {str(e)}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def heartbeat(self):
+        """Mark the jobs queued or running in this process as alive"""
+        if self._tasks:
+            async with self._session_factory() as db:
+                await backtest_job_crud.heartbeat(db, ids=list(self._tasks))
+
+    async def fail_orphaned(self):
+        """
+        Fail queued or running jobs whose process stopped (crashed or was
+        killed) before finishing them: no heartbeat for ``stale_after`` seconds
+        """
+        before = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        async with self._session_factory() as db:
+            jobs = await backtest_job_crud.fail_stale(db, before=before, error="The worker running this job stopped")
+        for job in jobs:
+            logger.warning(f"Backtest job {job.id} was orphaned by a stopped worker")
+            await self._publish(job.id, "failed", job.completed_runs, job.total_runs)
+
+    async def shutdown(self):
+        """Cancel this process's jobs and wait for them to record it"""
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+# Create global backtest job queue instance
+backtest_job_queue = BacktestJobQueue()
@@ -0,0 +1,179 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.services.backtest import run_backtest
+
+logger = logging.getLogger(__name__)
+
+TASKS_PER_WORKER = 4  # Enough tasks per process to even out uneven symbol lengths
+DEFAULT_THRESHOLD = 0.6  # AITradingService.prediction_threshold, when the grid doesn't vary it
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of a parameter grid, in key order"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+@dataclass(frozen=True)
+class SharedPrices:
+    """
+    Where a job's price data lives in shared memory.
+
+    The block holds every symbol's closes (float64) followed by their
+    timestamps (int64 nanoseconds), concatenated; symbol ``i`` spans
+    ``offsets[i]:offsets[i + 1]`` of each.
+    """
+    name: str
+    offsets: Tuple[int, ...]
+
+    @property
+    def length(self) -> int:
+        return self.offsets[-1]
+
+def share_prices(frames: List[pd.DataFrame]) -> Tuple[SharedPrices, SharedMemory]:
+    """Copy the close series of ``frames`` into a new shared memory block"""
+    offsets = np.concatenate([[0], np.cumsum([len(df) for df in frames])]).astype(int)
+    total = int(offsets[-1])
+    shm = SharedMemory(create=True, size=max(total * 16, 1))
+    closes = np.ndarray(total, dtype=np.float64, buffer=shm.buf)
+    times = np.ndarray(total, dtype=np.int64, buffer=shm.buf, offset=total * 8)
+    for df, lo, hi in zip(frames, offsets[:-1], offsets[1:]):
+        closes[lo:hi] = df['Close'].to_numpy(dtype=np.float64)
+        times[lo:hi] = pd.DatetimeIndex(df.index).as_unit("ns").asi8
+    del closes, times  # Views must be released before the block can be closed
+    return SharedPrices(shm.name, tuple(int(o) for o in offsets)), shm
+
+def _lower_priority(niceness: int):
+    """Worker initializer: let the API process win the CPU over backtests"""
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+# Worker-side state: the block of the job currently being run
+_attached: Dict[str, Tuple[SharedMemory, np.ndarray, np.ndarray]] = {}
+
+def _attach(prices: SharedPrices) -> Tuple[np.ndarray, np.ndarray]:
+    if prices.name not in _attached:
+        for name in list(_attached):
+            _attached.pop(name)[0].close()  # The previous job's views go with its entry
+        # Workers share the parent's resource tracker, so attaching doesn't take ownership
+        shm = SharedMemory(name=prices.name)
+        total = prices.length
+        closes = np.ndarray(total, dtype=np.float64, buffer=shm.buf)
+        times = np.ndarray(total, dtype=np.int64, buffer=shm.buf, offset=total * 8)
+        _attached[prices.name] = (shm, closes, times)
+    _, closes, times = _attached[prices.name]
+    return closes, times
+
+def _run_chunk(prices: SharedPrices, symbol_index: int, combos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Backtest one symbol for a chunk of parameter combinations (runs in a worker)"""
+    closes, times = _attach(prices)
+    lo, hi = prices.offsets[symbol_index], prices.offsets[symbol_index + 1]
+    df = pd.DataFrame({'Close': closes[lo:hi]}, index=pd.to_datetime(times[lo:hi], utc=True))
+
+    rows = []
+    for combo in combos:
+        params = dict(combo)
+        threshold = params.pop('threshold', DEFAULT_THRESHOLD)
+        result = run_backtest(df, threshold, **params)
+        rows.append({
+            **combo,
+            'final_balance': result['final_balance'],
+            'return_pct': result['return_pct'],
+            'trades': len(result['trades']),
+        })
+    return rows
+
+class BacktestRunner:
+    """
+    Runs a parameter grid over many symbols on a pool of processes.
+
+    Each job copies its price data into one shared memory block that the
+    workers map directly, so tasks only carry a symbol index and a chunk of
+    parameter combinations. The pool is started on first use and kept
+    between jobs.
+    """
+
+    def __init__(self, max_workers: int = settings.BACKTEST_WORKERS):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a threaded server is unsafe, so workers start fresh
+            self._pool = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=get_context("spawn"),
+                initializer=_lower_priority,
+                initargs=(settings.BACKTEST_WORKER_NICE,),
+            )
+        return self._pool
+
+    async def run(
+        self,
+        frames: Dict[str, pd.DataFrame],
+        grid: Dict[str, List[Any]],
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Backtest every combination of ``grid`` on every non-empty frame.
+
+        Returns one row per (symbol, combination) with its parameters and
+        results, best return first. ``progress`` is called with the number
+        of runs done and the total after every finished task.
+        """
+        combos = expand_grid(grid)
+        symbols = [symbol for symbol, df in frames.items() if not df.empty]
+        if not symbols or not combos:
+            return []
+
+        runs = len(symbols) * len(combos)
+        chunk_size = max(1, math.ceil(runs / (self.max_workers * TASKS_PER_WORKER)))
+        prices, shm = share_prices([frames[symbol] for symbol in symbols])
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        done = 0
+
+        def on_done(future: asyncio.Future, count: int):
+            nonlocal done
+            if not future.cancelled() and future.exception() is None:
+                done += count
+                progress(done, runs)
+
+        try:
+            tasks, task_symbols = [], []
+            for index, symbol in enumerate(symbols):
+                for start in range(0, len(combos), chunk_size):
+                    chunk = combos[start:start + chunk_size]
+                    task = loop.run_in_executor(pool, _run_chunk, prices, index, chunk)
+                    if progress is not None:
+                        task.add_done_callback(lambda future, count=len(chunk): on_done(future, count))
+                    tasks.append(task)
+                    task_symbols.append(symbol)
+            chunks = await asyncio.gather(*tasks)
+        finally:
+            shm.close()
+            shm.unlink()
+
+        rows = [{'symbol': symbol, **row} for symbol, chunk in zip(task_symbols, chunks) for row in chunk]
+        rows.sort(key=lambda row: row['return_pct'], reverse=True)
+        logger.debug(f"Backtested {runs} runs over {len(symbols)} symbols in {len(tasks)} tasks")
+        return rows
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+# Create global backtest runner instance
+backtest_runner = BacktestRunner()
@@ -0,0 +1,179 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import logging
+import time
+
+import pandas as pd
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+BarFetcher = Callable[[datetime, datetime], Awaitable[pd.DataFrame]]
+
+def _to_utc(value) -> pd.Timestamp:
+    """Normalize a datetime/Timestamp to a tz-aware UTC Timestamp (naive = local time)."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        return pd.Timestamp(ts.to_pydatetime().astimezone(timezone.utc))
+    return ts.tz_convert(timezone.utc)
+
+def _utc_index(frame: pd.DataFrame) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(frame.index)
+    return index.tz_localize(timezone.utc) if index.tz is None else index.tz_convert(timezone.utc)
+
+def is_intraday(interval: str) -> bool:
+    """True for minute/hour intervals such as ``1m``, ``15Min`` or ``1h``."""
+    return interval.lower().endswith(("m", "min", "h", "hour"))
+
+@dataclass
+class _Entry:
+    frame: pd.DataFrame
+    start: pd.Timestamp  # Covered range, UTC, end exclusive
+    end: pd.Timestamp
+    fetched_at: float
+    live: bool = False  # Range reached the present when fetched
+    nbytes: int = field(init=False)
+
+    def __post_init__(self):
+        self.nbytes = int(self.frame.memory_usage(index=True, deep=True).sum())
+
+class BarCache:
+    """
+    Cache of historical bars keyed by (source, symbol, interval).
+
+    Each entry holds one contiguous covered time range. Requests inside the
+    range are served from memory; requests that extend it only fetch the
+    missing head and/or tail. The live edge of a range expires after a TTL
+    (short for intraday bars), and entries are evicted least-recently-used
+    once the cache exceeds its memory cap.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = settings.BAR_CACHE_MAX_BYTES,
+        intraday_ttl: float = settings.BAR_CACHE_INTRADAY_TTL,
+        daily_ttl: float = settings.BAR_CACHE_DAILY_TTL,
+    ):
+        self.max_bytes = max_bytes
+        self.intraday_ttl = intraday_ttl
+        self.daily_ttl = daily_ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(
+        self,
+        source: str,
+        symbol: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        fetch: BarFetcher,
+    ) -> pd.DataFrame:
+        """
+        Return the bars in ``[start, end)``, calling ``fetch`` only for the
+        parts of the range not already cached.
+        """
+        key = (source, symbol.upper(), interval)
+        start_utc, end_utc = _to_utc(start), _to_utc(end)
+        now_utc = _to_utc(datetime.now(timezone.utc))
+        entry = self._entries.get(key)
+
+        ttl = self.intraday_ttl if is_intraday(interval) else self.daily_ttl
+        # A range ending within one TTL of now reaches the still-forming bar
+        live = end_utc >= now_utc - pd.Timedelta(seconds=ttl)
+
+        if entry is not None:
+            self._refresh_live_edge(entry, ttl, now_utc)
+        if entry is None or start_utc > entry.end or end_utc < entry.start:
+            # Nothing usable cached: fetch the whole range
+            self.misses += 1
+            frame = await fetch(start, end)
+            if not frame.empty:
+                self._store(key, _Entry(frame, start_utc, end_utc, time.monotonic(), live))
+            return frame
+
+        parts = []
+        if start_utc < entry.start:
+            parts.append(await fetch(start, entry.start.to_pydatetime()))
+        parts.append(entry.frame)
+        if end_utc > entry.end:
+            parts.append(await fetch(entry.end.to_pydatetime(), end))
+
+        if len(parts) == 1:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self.partial_hits += 1
+            frame = pd.concat([part for part in parts if not part.empty] or [entry.frame])
+            frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+            if end_utc > entry.end:
+                fetched_at = time.monotonic()
+            else:
+                fetched_at, live = entry.fetched_at, entry.live
+            entry = _Entry(frame, min(start_utc, entry.start), max(end_utc, entry.end), fetched_at, live)
+            self._store(key, entry)
+
+        index = _utc_index(entry.frame)
+        return entry.frame[(index >= start_utc) & (index < end_utc)]
+
+    def _refresh_live_edge(self, entry: _Entry, ttl: float, now_utc: pd.Timestamp) -> None:
+        """
+        A range fetched up to the present counts as covering "now" until its
+        TTL passes. After that it shrinks back to its last stored bar, so the
+        still-forming bar and anything newer are refetched as the tail.
+        """
+        if not entry.live:
+            return
+        if time.monotonic() - entry.fetched_at <= ttl:
+            entry.end = max(entry.end, now_utc)
+            return
+        entry.live = False
+        if not entry.frame.empty:
+            entry.end = _utc_index(entry.frame)[-1]
+            entry.frame = entry.frame.iloc[:-1]
+            self._resize(entry)
+
+    def _resize(self, entry: _Entry) -> None:
+        self.nbytes -= entry.nbytes
+        entry.__post_init__()
+        self.nbytes += entry.nbytes
+
+    def _store(self, key: Tuple[str, str, str], entry: _Entry) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self._entries[key] = entry
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+            logger.debug(f"Evicted bars for {evicted_key} ({evicted.nbytes} bytes)")
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Drop cached bars for one symbol, or everything."""
+        for key in [k for k in self._entries if symbol is None or k[1] == symbol.upper()]:
+            self.nbytes -= self._entries.pop(key).nbytes
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current memory use."""
+        requests = self.hits + self.partial_hits + self.misses
+        return {
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.partial_hits) / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+        }
+
+# Create global bar cache instance
+bar_cache = BarCache()
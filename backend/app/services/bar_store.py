@@ -0,0 +1,305 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.services.bar_cache import BarFetcher, _to_utc, _utc_index
+
+logger = logging.getLogger(__name__)
+
+_INTERVAL = re.compile(r"^(\d+)\s*(mo|month|min|m|h|hour|d|day|wk|w|week)$", re.IGNORECASE)
+_UNITS = {
+    "min": "min", "m": "min",
+    "h": "h", "hour": "h",
+    "d": "D", "day": "D",
+    "wk": "W", "w": "W", "week": "W",
+}
+
+def interval_delta(interval: str) -> pd.Timedelta:
+    """Length of one bar, e.g. ``1m``/``15Min`` -> minutes, ``1d``/``1Day`` -> one day."""
+    match = _INTERVAL.match(interval.strip())
+    if match is None:
+        raise ValueError(f"Unknown bar interval: {interval}")
+    count, unit = int(match.group(1)), match.group(2).lower()
+    if unit in ("mo", "month"):
+        return pd.Timedelta(days=31 * count)
+    return pd.Timedelta(count, unit=_UNITS[unit])
+
+def _merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _to_records(frame: pd.DataFrame) -> np.ndarray:
+    """Frame -> structured array sorted by ``ts`` (UTC epoch nanoseconds)."""
+    columns = {}
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        columns[str(name)] = values if values.dtype.kind in "biuf" else values.astype(float)
+    records = np.empty(len(frame), dtype=[("ts", "<i8")] + [(name, v.dtype) for name, v in columns.items()])
+    records["ts"] = _utc_index(frame).as_unit("ns").asi8
+    for name, values in columns.items():
+        records[name] = values
+    return np.sort(records, order="ts", kind="stable")
+
+def _to_frame(records: np.ndarray) -> pd.DataFrame:
+    names = [name for name in records.dtype.names if name != "ts"]
+    return pd.DataFrame(
+        {name: records[name] for name in names},
+        index=pd.to_datetime(records["ts"], utc=True),
+    )
+
+def _tz_name(index: pd.DatetimeIndex) -> Optional[str]:
+    """Name of a fetched index's timezone that pandas converts back to; None if it is naive"""
+    tz = index.tz
+    if tz is None:
+        return None
+    if isinstance(tz, timezone):
+        minutes = int(tz.utcoffset(None).total_seconds()) // 60
+        if minutes == 0:
+            return "UTC"
+        return f"{'-' if minutes < 0 else '+'}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+    return getattr(tz, "key", None) or getattr(tz, "zone", None) or str(tz)
+
+def _in_tz(frame: pd.DataFrame, tz: Optional[str]) -> pd.DataFrame:
+    """A UTC-indexed frame in the fetcher's timezone, or tz-naive if its bars were"""
+    frame = frame.copy()
+    frame.index = frame.index.tz_convert(tz) if tz else frame.index.tz_localize(None)
+    return frame
+
+@contextmanager
+def _locked(directory: Path):
+    """Exclusive lock on a key's directory, held across processes"""
+    with open(directory / ".lock", "ab") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _dedupe(parts: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate bar frames; for a repeated timestamp the later part wins."""
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame()
+    frame = pd.concat(parts)
+    return frame[~frame.index.duplicated(keep="last")].sort_index()
+
+class BarStore:
+    """
+    On-disk store of historical bars keyed by (source, symbol, interval).
+
+    Each key is a directory of segment files, one per write, each a NumPy
+    structured array sorted by timestamp and read back memory-mapped, so a
+    range read only touches the pages it needs. ``coverage.json`` records
+    which time ranges a fetch returned bars for, so requests only go
+    upstream for the gaps, and the timezone the fetcher returned bars in,
+    which results are converted back to. Only finished bars are stored; the still-forming
+    one is returned to the caller but fetched again next time. Segments are
+    merged into one by ``compact``, which also runs once a key collects more
+    than ``max_segments`` of them. Coverage updates and compactions hold a
+    file lock, so processes sharing the store don't lose each other's
+    updates.
+    """
+
+    def __init__(self, root: str = settings.BAR_STORE_DIR, max_segments: int = settings.BAR_STORE_MAX_SEGMENTS):
+        self.root = Path(root)
+        self.max_segments = max_segments
+        # Held only while a key is in use, so keys that are done with don't accumulate
+        self._locks: "weakref.WeakValueDictionary[Tuple[str, str, str], asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.segments_written = 0
+        self.compactions = 0
+
+    def _dir(self, source: str, symbol: str, interval: str) -> Path:
+        return self.root / source / interval / symbol.upper()
+
+    def _metadata(self, source: str, symbol: str, interval: str) -> dict:
+        path = self._dir(source, symbol, interval) / "coverage.json"
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return {"ranges": []}
+
+    def coverage(self, source: str, symbol: str, interval: str) -> List[Tuple[int, int]]:
+        """Fetched ranges as sorted, non-overlapping (start, end) epoch nanoseconds, end exclusive"""
+        return [tuple(r) for r in self._metadata(source, symbol, interval)["ranges"]]
+
+    def timezone(self, source: str, symbol: str, interval: str) -> Optional[str]:
+        """Timezone the stored bars were fetched in (None for tz-naive bars; UTC if not known)"""
+        return self._metadata(source, symbol, interval).get("tz", "UTC")
+
+    def missing(self, source: str, symbol: str, interval: str, start: datetime, end: datetime) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """The parts of ``[start, end)`` not covered yet"""
+        cursor, end_ns = _to_utc(start).value, _to_utc(end).value
+        gaps = []
+        for range_start, range_end in self.coverage(source, symbol, interval):
+            if range_end <= cursor:
+                continue
+            if range_start >= end_ns:
+                break
+            if range_start > cursor:
+                gaps.append((cursor, range_start))
+            cursor = max(cursor, range_end)
+        if cursor < end_ns:
+            gaps.append((cursor, end_ns))
+        return [(pd.Timestamp(s, tz=timezone.utc), pd.Timestamp(e, tz=timezone.utc)) for s, e in gaps]
+
+    def read(self, source: str, symbol: str, interval: str, start: datetime, end: datetime) -> pd.DataFrame:
+        """Stored bars in ``[start, end)``, with a UTC index"""
+        bounds = [_to_utc(start).value, _to_utc(end).value]
+        directory = self._dir(source, symbol, interval)
+        while True:
+            try:
+                parts = []
+                for path in sorted(directory.glob("seg-*.npy")):
+                    records = np.load(path, mmap_mode="r")
+                    lo, hi = np.searchsorted(records["ts"], bounds)
+                    if hi > lo:
+                        parts.append(_to_frame(np.array(records[lo:hi])))
+                return _dedupe(parts)
+            except FileNotFoundError:
+                # A compaction replaced the segments mid-read; its merged segment is in place now
+                continue
+
+    def append(self, source: str, symbol: str, interval: str, frame: pd.DataFrame, start: datetime, end: datetime):
+        """
+        Store the finished bars of a frame fetched for ``[start, end)`` and
+        mark that range as covered, up to the start of the still-forming bar.
+        An empty frame records nothing: upstream errors and rate limits come
+        back empty too, and covering the range would stop it being fetched.
+        """
+        settled = _to_utc(datetime.now(timezone.utc)) - interval_delta(interval)
+        start_utc, cover_end = _to_utc(start), min(_to_utc(end), settled)
+        if frame.empty or cover_end <= start_utc:
+            return
+        directory = self._dir(source, symbol, interval)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        index = _utc_index(frame)
+        settled_bars = frame[(index >= start_utc) & (index < cover_end)]
+        if not settled_bars.empty:
+            self._write_segment(directory, _to_records(settled_bars))
+
+        with _locked(directory):
+            metadata = self._metadata(source, symbol, interval)
+            metadata["ranges"] = _merge_ranges([tuple(r) for r in metadata["ranges"]] + [(start_utc.value, cover_end.value)])
+            metadata["tz"] = _tz_name(pd.DatetimeIndex(frame.index))
+            self._write_atomic(directory / "coverage.json", lambda f: f.write(json.dumps(metadata).encode()))
+
+        if len(list(directory.glob("seg-*.npy"))) > self.max_segments:
+            self.compact(source, symbol, interval)
+
+    def compact(self, source: str, symbol: str, interval: str) -> int:
+        """Merge a key's segments into one; returns the number of segments merged"""
+        directory = self._dir(source, symbol, interval)
+        with _locked(directory):
+            segments = sorted(directory.glob("seg-*.npy"))
+            if len(segments) < 2:
+                return 0
+            frame = _dedupe([_to_frame(np.load(path, mmap_mode="r")) for path in segments])
+            # The merged segment sorts after the ones it replaces, so readers never miss bars
+            self._write_segment(directory, _to_records(frame))
+            for path in segments:
+                path.unlink(missing_ok=True)
+        self.compactions += 1
+        logger.debug(f"Compacted {len(segments)} segments of {source}/{interval}/{symbol.upper()}")
+        return len(segments)
+
+    def compact_all(self) -> int:
+        """Compact every key in the store; returns the number of keys compacted"""
+        compacted = 0
+        for directory in self.root.glob("*/*/*"):
+            source, interval, symbol = directory.relative_to(self.root).parts
+            if self.compact(source, symbol, interval):
+                compacted += 1
+        return compacted
+
+    def _write_segment(self, directory: Path, records: np.ndarray):
+        self._write_atomic(directory / f"seg-{time.time_ns():020d}-{os.getpid()}.npy", lambda f: np.save(f, records))
+        self.segments_written += 1
+
+    @staticmethod
+    def _write_atomic(path: Path, write):
+        temp = path.with_name(f".tmp-{os.getpid()}-{path.name}")
+        with open(temp, "wb") as f:
+            write(f)
+        os.replace(temp, path)
+
+    async def get(
+        self,
+        source: str,
+        symbol: str,
+        interval: str,
+        start: datetime,
+        end: datetime,
+        fetch: BarFetcher,
+    ) -> pd.DataFrame:
+        """
+        Return the bars in ``[start, end)``, calling ``fetch`` only for the
+        ranges not stored yet and storing what it returns.
+        """
+        key = (source, symbol.upper(), interval)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            gaps = await asyncio.to_thread(self.missing, source, symbol, interval, start, end)
+            fetched = []
+            for gap_start, gap_end in gaps:
+                frame = await fetch(gap_start.to_pydatetime(), gap_end.to_pydatetime())
+                await asyncio.to_thread(self.append, source, symbol, interval, frame, gap_start, gap_end)
+                if not frame.empty:
+                    frame = frame.copy()
+                    frame.index = _utc_index(frame)
+                    fetched.append(frame)
+            stored = await asyncio.to_thread(self.read, source, symbol, interval, start, end)
+            tz = await asyncio.to_thread(self.timezone, source, symbol, interval)
+
+        if not gaps:
+            self.hits += 1
+        elif len(gaps) == 1 and gaps[0] == (_to_utc(start), _to_utc(end)):
+            self.misses += 1
+        else:
+            self.partial_hits += 1
+
+        frame = _dedupe([stored] + fetched)
+        if frame.empty:
+            return frame
+        return _in_tz(frame[(frame.index >= _to_utc(start)) & (frame.index < _to_utc(end))], tz)
+
+    def fetcher(self, source: str, symbol: str, interval: str, fetch: BarFetcher) -> BarFetcher:
+        """Wrap an upstream fetcher so it reads through the store"""
+        async def stored_fetch(start: datetime, end: datetime) -> pd.DataFrame:
+            return await self.get(source, symbol, interval, start, end, fetch)
+        return stored_fetch
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "segments_written": self.segments_written,
+            "compactions": self.compactions,
+        }
+
+# Create global bar store instance
+bar_store = BarStore()
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict
+import asyncio
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Calls that change broker state. Abandoning one on timeout wouldn't stop its
+# thread, so it could still go through and a retry would repeat it; these
+# wait for the broker's answer, bounded only by the socket timeout.
+NON_IDEMPOTENT_CALLS = frozenset({
+    "submit_order", "replace_order", "cancel_order", "cancel_all_orders", "close_position", "close_all_positions",
+})
+
+class AsyncBroker:
+    """
+    Async front for a blocking ``alpaca_trade_api.REST`` client.
+
+    Calls run on a dedicated, bounded thread pool so a slow broker round trip
+    never stalls the event loop. The client's ``requests`` session is sized
+    to the same concurrency limit, so connections are kept alive and reused
+    instead of opened per call, and every request carries a socket timeout.
+    ``call`` additionally bounds the total wait of read-only calls with
+    ``asyncio.wait_for``.
+    """
+
+    def __init__(
+        self,
+        rest: Any,
+        max_concurrency: int = settings.BROKER_MAX_CONCURRENCY,
+        timeout: float = settings.BROKER_TIMEOUT,
+    ):
+        self.rest = rest
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="broker")
+        self.calls = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        _configure_session(getattr(rest, "_session", None), max_concurrency, timeout)
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """
+        Run ``rest.<method>(*args, **kwargs)`` in the broker thread pool
+        """
+        timeout = None if method in NON_IDEMPOTENT_CALLS else self.timeout
+        async with self._slots:
+            self.calls += 1
+            self.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._executor, partial(getattr(self.rest, method), *args, **kwargs))
+                return await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise TimeoutError(f"Broker call {method} timed out after {self.timeout}s")
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "timeouts": self.timeouts, "in_flight": self.in_flight}
+
+def _configure_session(session: Any, pool_size: int, timeout: float):
+    """
+    Size the connection pool to the concurrency limit and give every request
+    a default timeout (the alpaca client never passes one)
+    """
+    if not isinstance(session, requests.Session):
+        return
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    request = session.request
+
+    def request_with_timeout(method, url, **kwargs):
+        kwargs.setdefault("timeout", timeout)
+        return request(method, url, **kwargs)
+
+    session.request = request_with_timeout
@@ -0,0 +1,66 @@
+from typing import IO, Any, BinaryIO, Dict, List, Optional, Union
+import csv
+import io
+import json
+import logging
+
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.schemas.trading import TradeImport
+
+logger = logging.getLogger(__name__)
+
+FILL_FORMATS = ("csv", "json")
+
+_FILLS = TypeAdapter(List[TradeImport])
+
+def fill_format(filename: Optional[str], content_type: Optional[str] = None) -> str:
+    """``csv`` or ``json``, from an upload's file extension or content type"""
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in FILL_FORMATS:
+        return extension
+    for fmt in FILL_FORMATS:
+        if content_type and fmt in content_type.lower():
+            return fmt
+    raise ValueError(f"Unsupported fill export {filename!r}; expected one of: {', '.join(FILL_FORMATS)}")
+
+def _read_rows(stream: IO[str], fmt: str, max_rows: int) -> List[Dict[str, Any]]:
+    if fmt == "csv":
+        # Blank cells fall back to the schema defaults; rows are read one at a time
+        rows = []
+        for row in csv.DictReader(stream):
+            if len(rows) == max_rows:
+                raise ValueError(f"Too many fills: more than {max_rows}")
+            rows.append({key.strip(): value for key, value in row.items() if key and value not in ("", None)})
+        return rows
+    text = stream.read()
+    try:
+        rows = json.loads(text) if text.strip() else []
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {str(e)}")
+    if not isinstance(rows, list):
+        raise ValueError("A JSON fill export must be an array of fills")
+    if len(rows) > max_rows:
+        raise ValueError(f"Too many fills: {len(rows)} (limit {max_rows})")
+    return rows
+
+def parse_fills(
+    data: Union[bytes, BinaryIO], fmt: str, max_rows: int = settings.TRADE_IMPORT_MAX_ROWS
+) -> List[TradeImport]:
+    """
+    Parse and validate a CSV (with a header row) or JSON array export of
+    fills, given as bytes or a binary file. CSV files are read row by row
+    rather than loaded whole. Raises ``pydantic.ValidationError`` listing
+    the bad rows, or ``ValueError`` for an unreadable or oversized file.
+    """
+    if fmt not in FILL_FORMATS:
+        raise ValueError(f"Unsupported fill format: {fmt}")
+    stream = io.TextIOWrapper(io.BytesIO(data) if isinstance(data, bytes) else data, encoding="utf-8-sig", newline="")
+    try:
+        rows = _read_rows(stream, fmt, max_rows)
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Fill export is not UTF-8: {str(e)}")
+    finally:
+        stream.detach()  # Leave the caller's file open
+    return _FILLS.validate_python(rows)
@@ -0,0 +1,296 @@
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+import math
+import numpy as np
+import pandas as pd
+
+# Default indicator parameters used by the live signal and the backtests
+RSI_PERIOD = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+BB_PERIOD = 20
+BB_STD = 2.0
+
+def indicator_series(
+    close: pd.Series,
+    rsi_period: int = RSI_PERIOD,
+    macd_fast: int = MACD_FAST,
+    macd_slow: int = MACD_SLOW,
+    macd_signal: int = MACD_SIGNAL,
+    bb_period: int = BB_PERIOD,
+    bb_std: float = BB_STD,
+) -> pd.DataFrame:
+    """
+    Calculate the full RSI, MACD and Bollinger Band series for a close series.
+
+    Every indicator is causal, so row ``i`` holds exactly the values that
+    would be computed from ``close.iloc[:i+1]`` alone.
+    """
+    # Calculate RSI
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+
+    # Calculate MACD
+    exp1 = close.ewm(span=macd_fast, adjust=False).mean()
+    exp2 = close.ewm(span=macd_slow, adjust=False).mean()
+    macd = exp1 - exp2
+    signal_line = macd.ewm(span=macd_signal, adjust=False).mean()
+
+    # Calculate Bollinger Bands
+    sma = close.rolling(window=bb_period).mean()
+    std = close.rolling(window=bb_period).std()
+    upper_band = sma + (std * bb_std)
+    lower_band = sma - (std * bb_std)
+
+    return pd.DataFrame({
+        'rsi': rsi,
+        'macd': macd,
+        'macd_signal': signal_line,
+        'bb_upper': upper_band,
+        'bb_lower': lower_band,
+        'bb_middle': sma,
+        'current_price': close,
+    }, index=close.index)
+
+def panel_indicators(
+    closes: pd.DataFrame,
+    rsi_period: int = RSI_PERIOD,
+    macd_fast: int = MACD_FAST,
+    macd_slow: int = MACD_SLOW,
+    macd_signal: int = MACD_SIGNAL,
+    bb_period: int = BB_PERIOD,
+    bb_std: float = BB_STD,
+) -> pd.DataFrame:
+    """
+    Latest indicators for every symbol of a close panel (time x symbols).
+
+    All symbols are computed together, column-wise. Each column's missing
+    bars are first pushed to the top so its own bars end on the last row,
+    which makes every row of the result equal to ``indicator_series`` over
+    that symbol's bars alone (missing bars dropped). Returns one row per
+    symbol, with the same columns as ``indicator_series``; symbols without
+    any bars are left out.
+    """
+    if closes.empty:
+        return pd.DataFrame(columns=['rsi', 'macd', 'macd_signal', 'bb_upper', 'bb_lower', 'bb_middle', 'current_price'])
+    values = closes.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    order = np.argsort(valid, axis=0, kind="stable")  # Missing first, bars keep their order
+    close = pd.DataFrame(np.take_along_axis(values, order, axis=0), columns=closes.columns)
+    bars = valid.sum(axis=0)
+
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=rsi_period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
+    rsi = 100 - (100 / (1 + gain / loss))
+
+    exp1 = close.ewm(span=macd_fast, adjust=False).mean()
+    exp2 = close.ewm(span=macd_slow, adjust=False).mean()
+    macd = exp1 - exp2
+    signal_line = macd.ewm(span=macd_signal, adjust=False).mean()
+
+    sma = close.rolling(window=bb_period).mean()
+    std = close.rolling(window=bb_period).std()
+
+    last_rsi = rsi.iloc[-1].to_numpy(copy=True)
+    # The padded rows hold zero gains, so a short history would still get an RSI
+    last_rsi[bars < rsi_period] = np.nan
+    frame = pd.DataFrame({
+        'rsi': last_rsi,
+        'macd': macd.iloc[-1].to_numpy(),
+        'macd_signal': signal_line.iloc[-1].to_numpy(),
+        'bb_upper': (sma + std * bb_std).iloc[-1].to_numpy(),
+        'bb_lower': (sma - std * bb_std).iloc[-1].to_numpy(),
+        'bb_middle': sma.iloc[-1].to_numpy(),
+        'current_price': close.iloc[-1].to_numpy(),
+    }, index=closes.columns)
+    return frame[bars > 0]
+
+def latest_indicators(frame: pd.DataFrame) -> Dict[str, float]:
+    """
+    Return the last row of an indicator frame as a plain dict of floats.
+    """
+    return {name: float(value) for name, value in frame.iloc[-1].items()}
+
+class _RollingWindow:
+    """
+    Fixed-size window with a running sum and sum of squares.
+
+    Values are stored relative to the first value seen so the sum of squares
+    does not lose precision on large prices, and the sums are rebuilt from the
+    buffer once per full rotation so rounding drift cannot accumulate.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.offset: Optional[float] = None
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.nonzero = 0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float) -> Optional[float]:
+        """Append a value and return the shifted value evicted, if any."""
+        if self.offset is None:
+            self.offset = value
+        shifted = value - self.offset
+        evicted = self.values[0] if len(self.values) == self.size else None
+        self.values.append(shifted)
+        self._add(shifted)
+        if evicted is not None:
+            self._remove(evicted)
+        self._updates += 1
+        if self._updates >= self.size:
+            self._resync()
+        return evicted
+
+    def pop(self, evicted: Optional[float]) -> None:
+        """Undo the last ``push``, restoring the value it evicted."""
+        self._remove(self.values.pop())
+        if evicted is not None:
+            self.values.appendleft(evicted)
+            self._add(evicted)
+
+    def _add(self, shifted: float) -> None:
+        self.sum += shifted
+        self.sum_sq += shifted * shifted
+        self.nonzero += shifted != 0
+
+    def _remove(self, shifted: float) -> None:
+        self.sum -= shifted
+        self.sum_sq -= shifted * shifted
+        self.nonzero -= shifted != 0
+
+    def _resync(self) -> None:
+        self.sum = float(sum(self.values))
+        self.sum_sq = float(sum(v * v for v in self.values))
+        self._updates = 0
+
+    def mean(self) -> float:
+        if len(self.values) < self.size:
+            return math.nan
+        if not self.nonzero:
+            return self.offset
+        return self.offset + self.sum / self.size
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1), as ``Series.rolling().std()``."""
+        if len(self.values) < self.size or self.size < 2:
+            return math.nan
+        if not self.nonzero:
+            return 0.0
+        var = (self.sum_sq - self.sum * self.sum / self.size) / (self.size - 1)
+        return math.sqrt(max(var, 0.0))
+
+class IndicatorState:
+    """
+    Streaming RSI, MACD and Bollinger Band state for a single symbol.
+
+    Each bar costs O(1) regardless of how much history has been seen, and the
+    values track ``indicator_series`` on the same closes. Passing the same
+    ``key`` (e.g. the bar timestamp) twice revises the still-forming bar
+    instead of appending a new one.
+    """
+
+    def __init__(
+        self,
+        rsi_period: int = RSI_PERIOD,
+        macd_fast: int = MACD_FAST,
+        macd_slow: int = MACD_SLOW,
+        macd_signal: int = MACD_SIGNAL,
+        bb_period: int = BB_PERIOD,
+        bb_std: float = BB_STD,
+    ):
+        self.bb_std = bb_std
+        self.alpha_fast = 2 / (macd_fast + 1)
+        self.alpha_slow = 2 / (macd_slow + 1)
+        self.alpha_signal = 2 / (macd_signal + 1)
+        self.gains = _RollingWindow(rsi_period)
+        self.losses = _RollingWindow(rsi_period)
+        self.closes = _RollingWindow(bb_period)
+        self.prev_close: Optional[float] = None
+        self.close: Optional[float] = None
+        self.ema_fast: Optional[float] = None
+        self.ema_slow: Optional[float] = None
+        self.ema_signal: Optional[float] = None
+        self.key: Any = None
+        self.bars = 0
+        self._undo: Optional[Tuple] = None
+
+    @classmethod
+    def from_history(cls, close: pd.Series, **params) -> "IndicatorState":
+        """Seed a state from a close series indexed by bar timestamp."""
+        state = cls(**params)
+        for key, value in close.items():
+            state.update(float(value), key=key)
+        return state
+
+    def update(self, close: float, key: Any = None) -> Dict[str, float]:
+        """Feed one bar close and return the current indicator values."""
+        if key is not None and key == self.key:
+            self._revert()
+        self._undo = (
+            self.prev_close, self.close, self.ema_fast, self.ema_slow, self.ema_signal,
+            self.gains.push(self._gain(close)),
+            self.losses.push(self._loss(close)),
+            self.closes.push(close),
+        )
+        self.prev_close, self.close = self.close, close
+        self.key = key
+        self.bars += 1
+
+        if self.ema_fast is None:
+            self.ema_fast = self.ema_slow = close
+            self.ema_signal = 0.0
+        else:
+            self.ema_fast += self.alpha_fast * (close - self.ema_fast)
+            self.ema_slow += self.alpha_slow * (close - self.ema_slow)
+            self.ema_signal += self.alpha_signal * (self.ema_fast - self.ema_slow - self.ema_signal)
+        return self.values()
+
+    def _gain(self, close: float) -> float:
+        return max(close - self.close, 0.0) if self.close is not None else 0.0
+
+    def _loss(self, close: float) -> float:
+        return max(self.close - close, 0.0) if self.close is not None else 0.0
+
+    def _revert(self) -> None:
+        """Undo the last ``update`` so the bar can be replaced."""
+        prev_close, close, ema_fast, ema_slow, ema_signal, gain, loss, price = self._undo
+        self.gains.pop(gain)
+        self.losses.pop(loss)
+        self.closes.pop(price)
+        self.prev_close, self.close = prev_close, close
+        self.ema_fast, self.ema_slow, self.ema_signal = ema_fast, ema_slow, ema_signal
+        self.bars -= 1
+        self._undo = None
+
+    def values(self) -> Dict[str, float]:
+        """Return the indicators in the same shape as ``latest_indicators``."""
+        gain = self.gains.mean()
+        loss = self.losses.mean()
+        if loss > 0:
+            rsi = 100 - (100 / (1 + gain / loss))
+        elif gain > 0:
+            rsi = 100.0  # gain / 0 is inf in the pandas path
+        else:
+            rsi = math.nan
+        sma = self.closes.mean()
+        std = self.closes.std()
+        return {
+            'rsi': rsi,
+            'macd': self.ema_fast - self.ema_slow,
+            'macd_signal': self.ema_signal,
+            'bb_upper': sma + (std * self.bb_std),
+            'bb_lower': sma - (std * self.bb_std),
+            'bb_middle': sma,
+            'current_price': self.close,
+        }
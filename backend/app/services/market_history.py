@@ -0,0 +1,32 @@
+from datetime import datetime
+import asyncio
+import logging
+
+import pandas as pd
+import yfinance as yf
+
+from app.services.bar_cache import bar_cache
+from app.services.bar_store import bar_store
+from app.services.single_flight import single_flight, to_second
+
+logger = logging.getLogger(__name__)
+
+@single_flight(
+    "market_history.daily",
+    key=lambda symbol, start_date, end_date: (symbol.upper(), to_second(start_date), to_second(end_date)),
+)
+async def daily_history(symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """
+    Daily bars from yfinance, through the shared bar cache and the on-disk
+    bar store. An empty frame if they can't be fetched.
+    """
+    async def fetch(start: datetime, end: datetime) -> pd.DataFrame:
+        ticker = yf.Ticker(symbol)
+        return await asyncio.to_thread(ticker.history, start=start, end=end, interval="1d")
+
+    try:
+        fetch = bar_store.fetcher("yfinance", symbol, "1d", fetch)
+        return await bar_cache.get("yfinance", symbol, "1d", start_date, end_date, fetch)
+    except Exception as e:
+        logger.error(f"Error fetching historical data: {str(e)}")
+        return pd.DataFrame()
@@ -0,0 +1,58 @@
+from typing import Any, Awaitable, Callable, Dict, Tuple, Union
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+StageFunc = Callable[..., Union[Any, Awaitable[Any]]]
+
+class StageGraph:
+    """
+    A small dependency graph of named stages.
+
+    Each stage is a function (sync or async) called with the results of its
+    dependencies as keyword arguments. Every stage starts as soon as its own
+    dependencies are done, so independent stages run concurrently. ``run``
+    returns the result of every stage along with how long each one took,
+    not counting time spent waiting on its dependencies.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Tuple[StageFunc, Tuple[str, ...]]] = {}
+
+    def stage(self, name: str, func: StageFunc, *deps: str) -> "StageGraph":
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self.stages[name] = (func, deps)
+        return self
+
+    async def run(self) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        tasks: Dict[str, asyncio.Task] = {}
+        timings: Dict[str, float] = {}
+
+        async def run_stage(name: str) -> Any:
+            func, deps = self.stages[name]
+            inputs = {dep: await tasks[dep] for dep in deps}
+            started = time.perf_counter()
+            try:
+                result = func(**inputs)
+                if inspect.isawaitable(result):
+                    result = await result
+                return result
+            finally:
+                timings[name] = time.perf_counter() - started
+
+        # Stages are registered after their dependencies, so creation order is safe
+        for name in self.stages:
+            tasks[name] = asyncio.create_task(run_stage(name))
+        try:
+            results = dict(zip(tasks, await asyncio.gather(*tasks.values())))
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        logger.debug("Stage timings: " + ", ".join(f"{name}={secs * 1000:.0f}ms" for name, secs in timings.items()))
+        return results, timings
@@ -0,0 +1,80 @@
+from datetime import datetime
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls.
+
+    The first caller for a key starts the call in its own task; callers that
+    arrive while it is running await that same task instead of starting
+    another. The task is shielded, so a caller that goes away (e.g. a client
+    disconnect) does not cancel the call for everyone else. Results are
+    shared as-is, so callers must not mutate them.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0  # Calls answered by another caller's in-flight request
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def running(self, key: Hashable) -> bool:
+        """Whether a call for ``key`` is in flight, i.e. ``do`` would join it"""
+        return key in self._in_flight
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "upstream": self.calls - self.shared,
+            "shared": self.shared,
+            "dedup_ratio": self.shared / self.calls if self.calls else 0.0,
+            "in_flight": len(self._in_flight),
+        }
+
+_groups: Dict[str, SingleFlight] = {}
+
+def single_flight_group(name: str) -> SingleFlight:
+    """The named group, created on first use, so its metrics are reported together"""
+    if name not in _groups:
+        _groups[name] = SingleFlight(name)
+    return _groups[name]
+
+def single_flight_stats() -> Dict[str, Dict[str, float]]:
+    return {name: group.stats() for name, group in _groups.items()}
+
+def to_second(value: Optional[datetime]) -> Optional[datetime]:
+    """Drop sub-second precision so "now"-based ranges built a moment apart share a key"""
+    return value.replace(microsecond=0) if value is not None else None
+
+def single_flight(name: str, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Decorate an async function so concurrent calls with the same key share
+    one execution. ``key`` receives the call's arguments; by default the
+    positional and keyword arguments themselves are the key.
+    """
+    group = single_flight_group(name)
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key is not None else (args, tuple(sorted(kwargs.items())))
+            return await group.do(call_key, lambda: func(*args, **kwargs))
+        return wrapper
+
+    return decorator
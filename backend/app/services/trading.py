@@ -1,25 +1,56 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import alpaca_trade_api as tradeapi
 from datetime import datetime
+import asyncio
+import time
+import uuid
+import pandas as pd
 
 from app.config import settings
 from app.models import TradingAccount, Trade
 from app.schemas.trading import TradeCreate
+from app.services.asset_catalog import AssetCatalog
+from app.services.bar_cache import bar_cache
+from app.services.bar_store import bar_store
+from app.services.broker import AsyncBroker
+from app.services.single_flight import single_flight, to_second
+
+QUOTE_BATCH_SIZE = 200  # Symbols per upstream latest-trades request
+
+def _bars_key(service, symbol, timeframe="1D", start=None, end=None, limit=100):
+    return id(service), symbol.upper(), timeframe, to_second(start), to_second(end), limit
+
+def _quotes_key(service, symbols):
+    return id(service), frozenset(s.upper() for s in symbols)
 
 class TradingService:
-    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None, paper: bool = True):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        paper: bool = True,
+        base_url: Optional[str] = None,
+    ):
         self.api_key = api_key or settings.ALPACA_API_KEY
         self.api_secret = api_secret or settings.ALPACA_SECRET_KEY
         self.paper = paper
+        self.quote_ttl: float = settings.QUOTE_CACHE_TTL
+        self._quotes: Dict[str, Tuple[dict, float]] = {}  # symbol -> (quote, fetched at)
+        self.quote_hits = 0
+        self.quote_misses = 0
+        self.assets = AssetCatalog(self.list_assets)
 
         if self.api_key and self.api_secret:
             self.api = tradeapi.REST(
                 key_id=self.api_key,
                 secret_key=self.api_secret,
-                base_url='https://paper-api.alpaca.markets' if paper else 'https://api.alpaca.markets'
+                base_url=base_url or ('https://paper-api.alpaca.markets' if paper else 'https://api.alpaca.markets')
             )
+            # Blocking REST calls go through the broker pool, never the event loop
+            self.broker = AsyncBroker(self.api)
         else:
             self.api = None
+            self.broker = None
 
     async def get_account_info(self) -> dict:
         """Get account information."""
@@ -38,7 +69,7 @@ class TradingService:
                 "shorting_enabled": False,
             }
         
-        account = self.api.get_account()
+        account = await self.broker.call("get_account")
         return {
             "status": account.status,
             "currency": account.currency,
@@ -58,7 +89,7 @@ class TradingService:
         if not self.api:
             return []
         
-        positions = self.api.list_positions()
+        positions = await self.broker.call("list_positions")
         return [{
             "symbol": pos.symbol,
             "qty": pos.qty,
@@ -70,6 +101,45 @@ class TradingService:
             "change_today": pos.change_today,
         } for pos in positions]
 
+    @single_flight("trading.get_quotes", key=_quotes_key)
+    async def get_quotes(self, symbols: List[str]) -> Dict[str, dict]:
+        """
+        Latest price for each symbol. Prices fetched within ``quote_ttl`` are
+        served from cache; the rest are fetched in as few upstream requests
+        as possible (one per ``QUOTE_BATCH_SIZE`` symbols, issued together).
+        Symbols the broker has no trade for are left out of the result.
+        """
+        quotes: Dict[str, dict] = {}
+        missing = []
+        now = time.monotonic()
+        for symbol in dict.fromkeys(s.upper() for s in symbols):
+            cached = self._quotes.get(symbol)
+            if cached is not None and now - cached[1] <= self.quote_ttl:
+                quotes[symbol] = cached[0]
+            else:
+                missing.append(symbol)
+        self.quote_hits += len(quotes)
+        self.quote_misses += len(missing)
+        if not missing or not self.api:
+            return quotes
+
+        chunks = [missing[i:i + QUOTE_BATCH_SIZE] for i in range(0, len(missing), QUOTE_BATCH_SIZE)]
+        results = await asyncio.gather(*(self.broker.call("get_latest_trades", chunk) for chunk in chunks))
+        fetched_at = time.monotonic()
+        for trades in results:
+            for symbol, trade in trades.items():
+                quote = {
+                    "symbol": symbol,
+                    "price": float(trade.p),
+                    "timestamp": pd.Timestamp(trade.t).isoformat(),
+                }
+                self._quotes[symbol] = (quote, fetched_at)
+                quotes[symbol] = quote
+        return quotes
+
+    def quote_stats(self) -> Dict[str, int]:
+        return {"hits": self.quote_hits, "misses": self.quote_misses, "entries": len(self._quotes)}
+
     async def place_order(
         self,
         symbol: str,
@@ -79,10 +149,20 @@ class TradingService:
         time_in_force: str = "gtc",
         limit_price: Optional[float] = None,
         stop_price: Optional[float] = None,
+        client_order_id: Optional[str] = None,
     ) -> dict:
-        """Place a new order."""
+        """
+        Place a new order.
+
+        The order carries a ``client_order_id`` (generated unless given), so
+        when submission fails without an answer, e.g. the connection drops
+        after the broker accepted it, the order is looked up by that id
+        instead of being reported as failed and placed again on retry.
+        """
+        client_order_id = client_order_id or uuid.uuid4().hex
         try:
-            order = self.api.submit_order(
+            order = await self.broker.call(
+                "submit_order",
                 symbol=symbol,
                 qty=qty,
                 side=side,
@@ -90,26 +170,30 @@ class TradingService:
                 time_in_force=time_in_force,
                 limit_price=limit_price,
                 stop_price=stop_price,
+                client_order_id=client_order_id,
             )
-            return {
-                "id": order.id,
-                "client_order_id": order.client_order_id,
-                "symbol": order.symbol,
-                "quantity": float(order.qty),
-                "side": order.side,
-                "type": order.type,
-                "status": order.status,
-                "filled_qty": float(order.filled_qty) if order.filled_qty else 0,
-                "filled_avg_price": float(order.filled_avg_price) if order.filled_avg_price else None,
-                "created_at": order.created_at,
-            }
         except Exception as e:
-            raise Exception(f"Failed to place order: {str(e)}")
+            try:
+                order = await self.broker.call("get_order_by_client_order_id", client_order_id)
+            except Exception:
+                raise Exception(f"Failed to place order: {str(e)}")
+        return {
+            "id": order.id,
+            "client_order_id": order.client_order_id,
+            "symbol": order.symbol,
+            "quantity": float(order.qty),
+            "side": order.side,
+            "type": order.type,
+            "status": order.status,
+            "filled_qty": float(order.filled_qty) if order.filled_qty else 0,
+            "filled_avg_price": float(order.filled_avg_price) if order.filled_avg_price else None,
+            "created_at": order.created_at,
+        }
 
     async def get_order_status(self, order_id: str) -> dict:
         """Get the status of an order."""
         try:
-            order = self.api.get_order(order_id)
+            order = await self.broker.call("get_order", order_id)
             return {
                 "id": order.id,
                 "status": order.status,
@@ -120,6 +204,7 @@ class TradingService:
         except Exception as e:
             raise Exception(f"Failed to get order status: {str(e)}")
 
+    @single_flight("trading.get_bars", key=_bars_key)
     async def get_bars(
         self,
         symbol: str,
@@ -141,39 +226,81 @@ class TradingService:
                 "volume": 1000,
             }]
         
-        bars = self.api.get_bars(
-            symbol,
-            timeframe,
-            start=start,
-            end=end,
-            limit=limit,
-        )
-        return [{
-            "timestamp": bar.t.isoformat(),
-            "open": bar.o,
-            "high": bar.h,
-            "low": bar.l,
-            "close": bar.c,
-            "volume": bar.v,
-        } for bar in bars]
+        if start is None:
+            # Open-ended requests can't be keyed by range; go straight to the broker
+            bars = await self.broker.call(
+                "get_bars",
+                symbol,
+                timeframe,
+                start=start,
+                end=end,
+                limit=limit,
+            )
+            return [self._bar_to_dict(bar.t, bar.o, bar.h, bar.l, bar.c, bar.v) for bar in bars]
+
+        async def fetch(fetch_start: datetime, fetch_end: datetime) -> pd.DataFrame:
+            bars = await self.broker.call(
+                "get_bars",
+                symbol,
+                timeframe,
+                start=fetch_start,
+                end=fetch_end,
+                limit=None,
+            )
+            return pd.DataFrame(
+                [(bar.o, bar.h, bar.l, bar.c, bar.v) for bar in bars],
+                columns=["open", "high", "low", "close", "volume"],
+                index=pd.DatetimeIndex([bar.t for bar in bars]),
+            )
+
+        fetch = bar_store.fetcher("alpaca", symbol, timeframe, fetch)
+        df = await bar_cache.get("alpaca", symbol, timeframe, start, end or datetime.now(), fetch)
+        rows = df.head(limit)
+        return [self._bar_to_dict(ts, **row) for ts, row in zip(rows.index, rows.to_dict("records"))]
+
+    @staticmethod
+    def _bar_to_dict(timestamp, open, high, low, close, volume) -> dict:
+        return {
+            "timestamp": timestamp.isoformat(),
+            "open": open,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        }
 
     async def get_asset(self, symbol: str) -> dict:
-        """Get asset information."""
+        """Get asset information, from the asset catalog when it has the symbol."""
+        cached = self.assets.get(symbol)
+        if cached is not None:
+            return cached
         try:
-            asset = self.api.get_asset(symbol)
-            return {
-                "id": asset.id,
-                "symbol": asset.symbol,
-                "name": asset.name,
-                "exchange": asset.exchange,
-                "tradable": asset.tradable,
-                "marginable": asset.marginable,
-                "shortable": asset.shortable,
-                "easy_to_borrow": asset.easy_to_borrow,
-                "fractionable": asset.fractionable,
-            }
+            asset = self._asset_to_dict(await self.broker.call("get_asset", symbol))
         except Exception as e:
             raise Exception(f"Failed to get asset info: {str(e)}")
+        self.assets.add(asset)
+        return asset
+
+    async def list_assets(self) -> List[dict]:
+        """Get every active, tradable asset in one call."""
+        if not self.api:
+            return []
+        assets = await self.broker.call("list_assets", status="active")
+        return [self._asset_to_dict(asset) for asset in assets if asset.tradable]
+
+    @staticmethod
+    def _asset_to_dict(asset) -> dict:
+        return {
+            "id": asset.id,
+            "symbol": asset.symbol,
+            "name": asset.name,
+            "exchange": asset.exchange,
+            "tradable": asset.tradable,
+            "marginable": asset.marginable,
+            "shortable": asset.shortable,
+            "easy_to_borrow": asset.easy_to_borrow,
+            "fractionable": asset.fractionable,
+        }
 
 # Create global trading service instance
 trading_service = TradingService() 
\ No newline at end of file
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import time
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import settings
+from app.models import User
+
+_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    return {key: getattr(user, key) for key in _COLUMNS}
+
+def _restore(values: Dict[str, Any]) -> User:
+    """A detached User with the cached column values, as if loaded by a session that has closed"""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+class UserCache:
+    """
+    In-process cache of user records for request authentication, keyed by id.
+
+    A hit returns a new detached ``User`` built from the cached column
+    values without touching the database, so requests never share an
+    instance. It is for reading only: to write a user, load the current
+    row, since merging the cached values would overwrite newer ones. Entries
+    expire after ``ttl`` seconds and are dropped by ``invalidate`` when
+    the record changes in this process. Changes made by other processes
+    are seen once the entry expires.
+    """
+
+    def __init__(self, ttl: float = settings.USER_CACHE_TTL, max_entries: int = settings.USER_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[Dict[str, Any], float]]" = OrderedDict()  # id -> (columns, expires at)
+        self._generation = 0  # Bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    async def get(self, user_id: int, load: Callable[[], Awaitable[Optional[User]]]) -> Optional[User]:
+        """The user with ``user_id``, calling ``load`` only when it isn't cached"""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry[1] > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(user_id)
+                return _restore(entry[0])
+            del self._entries[user_id]
+
+        self.misses += 1
+        generation = self._generation
+        user = await load()
+        # A record invalidated while it was loading may be stale; don't keep it
+        if user is not None and self.ttl > 0 and generation == self._generation:
+            self._store(user_id, _snapshot(user))
+        return user
+
+    def _store(self, user_id: int, values: Dict[str, Any]):
+        self._entries[user_id] = (values, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: int):
+        """Forget a user whose record changed"""
+        self._entries.pop(user_id, None)
+        self._generation += 1
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._generation += 1
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            # Each hit is a users query an authenticated request didn't make
+            "db_lookups_saved_per_request": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+# Create global user cache instance
+user_cache = UserCache()
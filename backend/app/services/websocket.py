@@ -1,120 +1,615 @@
-from typing import Dict, Set, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Set, Optional
 from fastapi import WebSocket
 import json
 import asyncio
+import itertools
 import logging
+import math
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import pandas as pd
 import yfinance as yf
+from app.config import settings
 from app.schemas.trading import MarketData
 from app.services.ai_trading import ai_trading_service
+from app.services.backplane import Backplane, create_backplane
+from app.services.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
+def _finite(value: Any) -> Any:
+    """``value`` with NaN and infinite floats, which JSON can't represent, replaced by None"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    return value
+
+def encode_message(message: dict) -> str:
+    """
+    Encode a JSON-compatible message to text once, so the same payload can be
+    sent to every socket without re-serialising per connection. Non-finite
+    numbers (e.g. indicators without enough history) are sent as null.
+    """
+    try:
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        return json.dumps(_finite(message), separators=(",", ":"), ensure_ascii=False, allow_nan=False)
+
+def _same(old: Any, new: Any) -> bool:
+    """Equality that treats two NaNs as the same value (``nan != nan``)"""
+    if isinstance(old, float) and isinstance(new, float) and math.isnan(old) and math.isnan(new):
+        return True
+    return old == new
+
+def diff_fields(previous: dict, current: dict) -> dict:
+    """
+    Fields of ``current`` that differ from ``previous``. Nested dicts such as
+    ``indicators`` are diffed one level down so only changed entries are kept.
+    A field that stays NaN is unchanged.
+    """
+    changed = {}
+    for name, value in current.items():
+        old = previous.get(name)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = {k: v for k, v in value.items() if k not in old or not _same(old[k], v)}
+            if nested:
+                changed[name] = nested
+        elif name not in previous or not _same(old, value):
+            changed[name] = value
+    return changed
+
+MIN_THROTTLE_MS = 50  # Fastest conflation interval a client may request
+BATCH_KEY = ("market_data_batch",)  # Queue key of a conflated client's pending batch
+BROADCAST_CHANNEL = "broadcast"
+MARKET_DATA_CHANNEL = "market_data:"  # Followed by the symbol
+BACKTEST_JOB_CHANNEL = "backtest_job:"  # Followed by the job id
+
+class ClientChannel:
+    """
+    Outbound queue and writer task for a single socket.
+
+    Broadcasts enqueue without awaiting the network. Market data is keyed by
+    symbol, so a client that falls behind only ever holds the latest tick per
+    symbol; other messages queue in order. When the queue is full the oldest
+    message is dropped, and a client that stays over its limit for longer
+    than ``slow_client_timeout`` (or whose send stalls past ``send_timeout``)
+    is disconnected.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        client_id: str,
+        on_close: Callable[[WebSocket], None],
+        max_queue: int = settings.WS_CLIENT_QUEUE_SIZE,
+        send_timeout: float = settings.WS_SEND_TIMEOUT,
+        slow_client_timeout: float = settings.WS_SLOW_CLIENT_TIMEOUT,
+    ):
+        self.websocket = websocket
+        self.client_id = client_id
+        self.on_close = on_close
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.slow_client_timeout = slow_client_timeout
+        self.pending: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.closed = False
+        self._seq = itertools.count()
+        self._over_limit_since: Optional[float] = None
+        self._ready = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+        self.throttle: Optional[float] = None  # Conflation interval in seconds
+        self.conflated: Dict[str, Any] = {}  # symbol -> latest payload (or fields in compact mode)
+        self._flusher: Optional[asyncio.Task] = None
+        self.compact = False  # Send sequenced frames of changed fields only
+        self.frame_seq = 0
+        self.last_sent: Dict[str, dict] = {}  # symbol -> fields as last sent in compact mode
+
+    def set_throttle(self, throttle_ms: Optional[int]):
+        """
+        Switch the client to conflation mode: keep only the newest market data
+        per symbol and flush it as one batched frame every ``throttle_ms``.
+        ``None`` or ``0`` switches back to one message per tick.
+        """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if not throttle_ms:
+            self.throttle = None
+            if not self.compact:
+                for symbol, payload in self.conflated.items():
+                    self.enqueue(payload, key=symbol)
+            self.compact = False
+            self.last_sent.clear()
+            self.conflated.clear()
+            return
+        self.throttle = max(throttle_ms, MIN_THROTTLE_MS) / 1000
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    def set_compact(self, throttle_ms: int):
+        """
+        Switch the client to compact mode: one sequenced frame per interval in
+        which each symbol carries only the fields changed since it was last
+        sent. The first update for a symbol is a full snapshot.
+        """
+        if not self.compact:
+            self.conflated.clear()
+        self.set_throttle(throttle_ms)
+        self.compact = True
+
+    def resnapshot(self, symbols: Optional[List[str]] = None):
+        """
+        Forget what the client was last sent so its next update for each
+        symbol is a full snapshot, e.g. after it detected a sequence gap
+        """
+        if symbols is None:
+            self.last_sent.clear()
+        for symbol in symbols or ():
+            self.last_sent.pop(symbol.upper(), None)
+
+    def enqueue_market_data(self, symbol: str, payload: str, data: Optional[dict] = None):
+        """
+        Queue one symbol's encoded market data, or hold it for the next
+        batched frame when the client is in conflation or compact mode
+        """
+        if self.throttle is None:
+            self.enqueue(payload, key=symbol)
+            return
+        if symbol in self.conflated:
+            self.coalesced += 1
+        self.conflated[symbol] = data if self.compact else payload
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.throttle)
+            # Hold updates back while the previous batch is still unsent
+            if self.conflated and BATCH_KEY not in self.pending:
+                frame = self._delta_frame() if self.compact else self._batch_frame()
+                self.conflated.clear()
+                if frame is not None:
+                    self.enqueue(frame, key=BATCH_KEY)
+
+    def _batch_frame(self) -> str:
+        return '{"type":"market_data_batch","updates":[' + ",".join(self.conflated.values()) + "]}"
+
+    def _delta_frame(self) -> Optional[str]:
+        updates = []
+        for symbol, data in self.conflated.items():
+            previous = self.last_sent.get(symbol)
+            if previous is None:
+                updates.append({"symbol": symbol, "snapshot": True, "data": data})
+            else:
+                changed = diff_fields(previous, data)
+                if not changed:
+                    continue
+                updates.append({"symbol": symbol, "data": changed})
+            self.last_sent[symbol] = data
+        if not updates:
+            return None
+        self.frame_seq += 1
+        return encode_message({"type": "market_data_delta", "seq": self.frame_seq, "updates": updates})
+
+    def enqueue(self, payload: str, key: Optional[Hashable] = None):
+        """
+        Queue a payload without blocking. Payloads sharing a ``key`` replace
+        each other in place; ``None`` means the message is never coalesced.
+        """
+        if self.closed:
+            return
+        if key is not None and key in self.pending:
+            self.pending[key] = payload
+            self.coalesced += 1
+            return
+        if len(self.pending) >= self.max_queue:
+            self.pending.popitem(last=False)
+            self.dropped += 1
+            now = time.monotonic()
+            if self._over_limit_since is None:
+                self._over_limit_since = now
+            elif now - self._over_limit_since > self.slow_client_timeout:
+                logger.warning(f"Disconnecting slow client {self.client_id} ({self.dropped} messages dropped)")
+                asyncio.create_task(self.close())
+                return
+        self.pending[key if key is not None else ("seq", next(self._seq))] = payload
+        self._ready.set()
+
+    async def _write_loop(self):
+        try:
+            while True:
+                await self._ready.wait()
+                while self.pending:
+                    _, payload = self.pending.popitem(last=False)
+                    await asyncio.wait_for(self.websocket.send_text(payload), self.send_timeout)
+                    self.sent += 1
+                self._over_limit_since = None
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending data to client {self.client_id}: {str(e)}")
+            await self.close()
+
+    def stop(self):
+        """
+        Stop the writer and discard anything still queued
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.pending.clear()
+        self.conflated.clear()
+        self.last_sent.clear()
+        if self._flusher is not None:
+            self._flusher.cancel()
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    async def close(self):
+        """
+        Stop the writer, unregister the socket from the manager and close it
+        """
+        if self.closed:
+            return
+        self.stop()
+        self.on_close(self.websocket)
+        try:
+            await self.websocket.close(code=1008)  # Policy violation: too slow
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self.pending) + len(self.conflated),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
+
 class WebSocketManager:
-    def __init__(self):
+    """
+    Routes market data and broadcasts to the sockets held by this worker.
+
+    Ticks and broadcasts travel through the backplane, so with several
+    workers each one fans out to its own sockets. Upstream polling is done
+    by one elected producer per symbol: a worker only fetches a symbol while
+    it holds that symbol's lease, renewed on every tick.
+    """
+
+    def __init__(self, backplane: Optional[Backplane] = None):
         self.active_connections: Dict[str, Set[WebSocket]] = {}
-        self.symbols: Set[str] = set()
+        self.subscriptions: Dict[str, Set[WebSocket]] = {}  # symbol -> subscribed sockets
+        self.socket_symbols: Dict[WebSocket, Set[str]] = {}  # socket -> subscribed symbols
+        self.channels: Dict[WebSocket, ClientChannel] = {}  # socket -> outbound queue
+        self.job_watchers: Dict[str, Set[WebSocket]] = {}  # backtest job id -> watching sockets
         self.is_running: bool = False
         self.update_interval: float = 1.0  # Update interval in seconds
+        self.max_concurrent_fetches: int = settings.MARKET_DATA_WORKERS
+        self._fetch_slots = asyncio.Semaphore(self.max_concurrent_fetches)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent_fetches, thread_name_prefix="market-data"
+        )
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._stream_task: Optional[asyncio.Task] = None
+        self.backplane = backplane or create_backplane()
+        self.worker_id = uuid.uuid4().hex
+        self.lease_ttl: float = settings.WS_PRODUCER_LEASE_TTL
+        self.leases: Set[str] = set()  # Symbols this worker currently produces
 
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
+        await self.backplane.listen(self._on_backplane_message)
         if client_id not in self.active_connections:
             self.active_connections[client_id] = set()
         self.active_connections[client_id].add(websocket)
+        self.socket_symbols[websocket] = set()
+        self.channels[websocket] = ClientChannel(websocket, client_id, self._drop_socket)
         logger.info(f"Client {client_id} connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket, client_id: str):
+        self.unsubscribe(websocket, list(self.socket_symbols.pop(websocket, ())))
+        for job_id in [j for j, watchers in self.job_watchers.items() if websocket in watchers]:
+            self.unwatch_job(websocket, job_id)
+        channel = self.channels.pop(websocket, None)
+        if channel is not None:
+            channel.stop()
         if client_id in self.active_connections:
             self.active_connections[client_id].discard(websocket)
             if not self.active_connections[client_id]:
                 del self.active_connections[client_id]
         logger.info(f"Client {client_id} disconnected. Total connections: {len(self.active_connections)}")
 
+    @property
+    def symbols(self) -> Set[str]:
+        """
+        Symbols polled upstream: exactly those with at least one subscriber
+        """
+        return set(self.subscriptions)
+
+    def subscribe(
+        self,
+        websocket: WebSocket,
+        symbols: List[str],
+        throttle_ms: Optional[int] = None,
+        mode: Optional[str] = None,
+    ):
+        """
+        Route market data for the given symbols to this socket. With
+        ``throttle_ms`` the socket receives one batched frame per interval
+        holding the latest update per symbol instead of every tick. With
+        ``mode="compact"`` those frames are sequenced and carry only changed
+        fields (once per tick unless ``throttle_ms`` says otherwise).
+        """
+        if throttle_ms is not None and (not isinstance(throttle_ms, int) or throttle_ms < 0):
+            raise ValueError("throttle_ms must be a non-negative integer")
+        if mode not in (None, "full", "compact"):
+            raise ValueError("mode must be 'full' or 'compact'")
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            if mode == "compact":
+                channel.set_compact(throttle_ms or int(self.update_interval * 1000))
+            elif mode == "full" and channel.compact:
+                channel.set_throttle(0)
+            elif throttle_ms is not None:
+                channel.set_throttle(throttle_ms)
+        for symbol in {s.upper() for s in symbols}:
+            self.subscriptions.setdefault(symbol, set()).add(websocket)
+            self.socket_symbols.setdefault(websocket, set()).add(symbol)
+        self.ensure_market_data_stream()
+
+    def unsubscribe(self, websocket: WebSocket, symbols: List[str]):
+        """
+        Stop routing the given symbols to this socket. A symbol with no
+        subscribers left is no longer polled upstream.
+        """
+        for symbol in {s.upper() for s in symbols}:
+            subscribers = self.subscriptions.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self.subscriptions[symbol]
+            self.socket_symbols.get(websocket, set()).discard(symbol)
+            channel = self.channels.get(websocket)
+            if channel is not None:
+                channel.resnapshot([symbol])
+
+    def resnapshot(self, websocket: WebSocket, symbols: Optional[List[str]] = None):
+        """Send full snapshots on the next compact frame (all symbols if none given)"""
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            channel.resnapshot(symbols)
+
+    def watch_job(self, websocket: WebSocket, job_id: str):
+        """Send this socket the progress updates of a backtest job"""
+        self.job_watchers.setdefault(job_id, set()).add(websocket)
+
+    def unwatch_job(self, websocket: WebSocket, job_id: str):
+        watchers = self.job_watchers.get(job_id)
+        if watchers is not None:
+            watchers.discard(websocket)
+            if not watchers:
+                del self.job_watchers[job_id]
+
+    async def publish_job_update(self, job_id: str, message: dict):
+        """Send a backtest job update to the sockets watching it on every worker"""
+        await self.backplane.publish(BACKTEST_JOB_CHANNEL + job_id, encode_message(message))
+
+    def _drop_socket(self, websocket: WebSocket):
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            self.disconnect(websocket, channel.client_id)
+
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            channel.enqueue(encode_message(message))
+        else:
+            await websocket.send_json(message)
+
+    async def broadcast(self, message: dict):
+        """
+        Send a message to every connected socket on every worker regardless
+        of subscriptions
+        """
+        await self.backplane.publish(BROADCAST_CHANNEL, encode_message(message))
+
     async def broadcast_market_data(self, market_data: MarketData):
         """
-        Broadcast market data to all connected clients
+        Publish market data to the sockets subscribed to its symbol on every
+        worker. The payload is dumped and encoded once per tick, not once per
+        socket, and a client's unsent tick for the same symbol is replaced by
+        the new one.
         """
-        disconnected_clients = set()
-        
-        for client_id, connections in self.active_connections.items():
-            disconnected_connections = set()
-            
-            for connection in connections:
-                try:
-                    await connection.send_json(market_data.model_dump())
-                except Exception as e:
-                    logger.error(f"Error sending data to client {client_id}: {str(e)}")
-                    disconnected_connections.add(connection)
-            
-            # Remove disconnected connections
-            connections.difference_update(disconnected_connections)
-            if not connections:
-                disconnected_clients.add(client_id)
-        
-        # Remove clients with no active connections
-        for client_id in disconnected_clients:
-            del self.active_connections[client_id]
+        payload = encode_message({
+            "type": "market_data",
+            "symbol": market_data.symbol,
+            "data": market_data.model_dump(mode="json"),
+        })
+        await self.backplane.publish(MARKET_DATA_CHANNEL + market_data.symbol, payload)
 
-    def add_symbol(self, symbol: str):
+    def _on_backplane_message(self, channel: str, payload: str):
         """
-        Add a symbol to track
+        Fan a message from the backplane out to this worker's sockets
         """
-        self.symbols.add(symbol.upper())
+        if channel == BROADCAST_CHANNEL:
+            for client in list(self.channels.values()):
+                client.enqueue(payload)
+        elif channel.startswith(MARKET_DATA_CHANNEL):
+            self._deliver_market_data(channel[len(MARKET_DATA_CHANNEL):], payload)
+        elif channel.startswith(BACKTEST_JOB_CHANNEL):
+            for connection in list(self.job_watchers.get(channel[len(BACKTEST_JOB_CHANNEL):], ())):
+                client = self.channels.get(connection)
+                if client is not None:
+                    client.enqueue(payload)
 
-    def remove_symbol(self, symbol: str):
+    def _deliver_market_data(self, symbol: str, payload: str):
+        data = None
+        for connection in list(self.subscriptions.get(symbol, ())):
+            channel = self.channels.get(connection)
+            if channel is None:
+                continue
+            if channel.compact and data is None:
+                # Compact clients diff field by field; decode once per message
+                data = json.loads(payload)["data"]
+            channel.enqueue_market_data(symbol, payload, data)
+
+    def client_stats(self) -> Dict[str, Dict[str, int]]:
         """
-        Remove a symbol from tracking
+        Per-client queue depth, sent, coalesced and dropped message counters
         """
-        self.symbols.discard(symbol.upper())
+        stats: Dict[str, Dict[str, int]] = {}
+        for channel in self.channels.values():
+            totals = stats.setdefault(channel.client_id, {"queued": 0, "sent": 0, "coalesced": 0, "dropped": 0})
+            for name, value in channel.stats().items():
+                totals[name] += value
+        return stats
 
-    async def start_market_data_stream(self):
+    @single_flight("websocket.latest_bar", key=lambda self, symbol: symbol.upper())
+    async def _fetch_latest_bar(self, symbol: str) -> pd.Series:
         """
-        Start the market data streaming service
+        Fetch the latest one-minute bar in a worker thread so the blocking
+        yfinance call never stalls the event loop.
         """
-        self.is_running = True
-        
-        while self.is_running and self.active_connections:
+        loop = asyncio.get_running_loop()
+        history = await loop.run_in_executor(
+            self._executor,
+            lambda: yf.Ticker(symbol).history(period='1d', interval='1m'),
+        )
+        return history.iloc[-1]
+
+    async def _claim_producer(self, symbol: str) -> bool:
+        """
+        Take or renew this worker's lease as the symbol's producer
+        """
+        if await self.backplane.claim(f"producer:{symbol}", self.worker_id, self.lease_ttl):
+            self.leases.add(symbol)
+            return True
+        self.leases.discard(symbol)
+        return False
+
+    async def _release_leases(self, symbols: Set[str]):
+        for symbol in symbols:
+            self.leases.discard(symbol)
             try:
-                for symbol in self.symbols:
-                    # Fetch real-time data using yfinance
-                    ticker = yf.Ticker(symbol)
-                    data = ticker.history(period='1d', interval='1m').iloc[-1]
-                    
-                    # Generate market data
-                    market_data = MarketData(
-                        symbol=symbol,
-                        price=float(data['Close']),
-                        volume=float(data['Volume']),
-                        timestamp=datetime.now(),
-                        high=float(data['High']),
-                        low=float(data['Low']),
-                        open=float(data['Open'])
+                await self.backplane.release(f"producer:{symbol}", self.worker_id)
+            except Exception as e:
+                logger.error(f"Error releasing producer lease for {symbol}: {str(e)}")
+
+    async def _publish_symbol(self, symbol: str):
+        """
+        Fetch, enrich and broadcast one symbol's market data, if this worker
+        is the symbol's elected producer
+        """
+        try:
+            if not await self._claim_producer(symbol):
+                return
+
+            async with self._fetch_slots:
+                data = await self._fetch_latest_bar(symbol)
+
+            # Generate market data
+            market_data = MarketData(
+                symbol=symbol,
+                price=float(data['Close']),
+                volume=float(data['Volume']),
+                timestamp=datetime.now(),
+                high=float(data['High']),
+                low=float(data['Low']),
+                open=float(data['Open'])
+            )
+
+            # Get AI trading signals if available
+            if ai_trading_service:
+                try:
+                    signal = await ai_trading_service.stream_signal(
+                        symbol, market_data.price, data.name.to_pydatetime()
                     )
+                    market_data.trading_signal = signal.signal
+                    market_data.signal_confidence = signal.confidence
+                    market_data.indicators = signal.indicators
+                except Exception as e:
+                    logger.error(f"Error getting AI trading signals for {symbol}: {str(e)}")
 
-                    # Get AI trading signals if available
-                    if ai_trading_service:
-                        try:
-                            signal = await ai_trading_service.analyze_market_data(symbol)
-                            market_data.trading_signal = signal.signal
-                            market_data.signal_confidence = signal.confidence
-                            market_data.indicators = signal.indicators
-                        except Exception as e:
-                            logger.error(f"Error getting AI trading signals for {symbol}: {str(e)}")
+            # Broadcast as soon as this symbol is ready
+            await self.broadcast_market_data(market_data)
 
-                    # Broadcast the data
-                    await self.broadcast_market_data(market_data)
+        except Exception as e:
+            logger.error(f"Error in market data stream for {symbol}: {str(e)}")
 
-            except Exception as e:
-                logger.error(f"Error in market data stream: {str(e)}")
-            
-            await asyncio.sleep(self.update_interval)
+    def _schedule_tick(self):
+        """
+        Start a publish task for every tracked symbol that is not still
+        in flight from a previous tick
+        """
+        for symbol in list(self.symbols):
+            if symbol in self._in_flight:
+                continue
+            task = asyncio.create_task(self._publish_symbol(symbol))
+            self._in_flight[symbol] = task
+            task.add_done_callback(lambda _, symbol=symbol: self._in_flight.pop(symbol, None))
+
+    async def start_market_data_stream(self):
+        """
+        Start the market data streaming service.
+
+        Every tick fans out one fetch per symbol. Fetches run concurrently,
+        bounded by ``max_concurrent_fetches``, and each symbol is broadcast as
+        soon as its own data arrives, so one slow symbol never holds up the
+        others. A symbol whose previous fetch is still running is skipped
+        rather than queued behind itself. Symbols another worker is producing
+        are left to it; leases for symbols no longer subscribed here are
+        released so a worker that still has subscribers can take over at once.
+        """
+        self.is_running = True
+        loop = asyncio.get_running_loop()
+
+        try:
+            while self.is_running and self.subscriptions:
+                tick_started = loop.time()
+                await self._release_leases(self.leases - self.symbols)
+                self._schedule_tick()
+                elapsed = loop.time() - tick_started
+                await asyncio.sleep(max(self.update_interval - elapsed, 0))
+        finally:
+            self.is_running = False
+            await self._release_leases(set(self.leases))
+
+    def ensure_market_data_stream(self):
+        """
+        Start the streaming loop in the background if it is not running
+        """
+        if self._stream_task is None or self._stream_task.done():
+            self._stream_task = asyncio.create_task(self.start_market_data_stream())
 
     def stop_market_data_stream(self):
         """
         Stop the market data streaming service
         """
         self.is_running = False
+        for task in list(self._in_flight.values()):
+            task.cancel()
+
+    async def close(self):
+        """
+        Stop streaming, give up this worker's producer leases and close the
+        backplane connection; called at application shutdown
+        """
+        self.stop_market_data_stream()
+        if self._stream_task is not None and not self._stream_task.done():
+            self._stream_task.cancel()
+            try:
+                await self._stream_task  # Releases the leases on the way out
+            except asyncio.CancelledError:
+                pass
+        await self.backplane.close()
+        self._executor.shutdown(wait=False)
 
 # Create a global WebSocket manager instance
 websocket_manager = WebSocketManager() 
\ No newline at end of file
@@ -0,0 +1,69 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest import run_backtest
+from app.services.indicators import indicator_series, latest_indicators
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+THRESHOLD = 0.6
+
+def make_price_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """Generate a random-walk minute-bar frame with ``n`` bars."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    return pd.DataFrame(
+        {"Close": close},
+        index=pd.date_range("2020-01-01", periods=n, freq="min"),
+    )
+
+def legacy_step(df: pd.DataFrame, i: int) -> None:
+    """One iteration of the old engine: recompute indicators on the prefix."""
+    latest_indicators(indicator_series(df["Close"].iloc[:i+1]))
+
+def time_legacy(df: pd.DataFrame, samples: int) -> float:
+    """
+    Time the old O(n^2) engine.
+
+    When the frame has more steps than ``samples``, only evenly spaced steps
+    are timed and the total is extrapolated from their mean cost.
+    """
+    steps = np.arange(20, len(df))
+    sampled = steps if len(steps) <= samples else np.linspace(20, len(df) - 1, samples).astype(int)
+    start = time.perf_counter()
+    for i in sampled:
+        legacy_step(df, i)
+    elapsed = time.perf_counter() - start
+    return elapsed * len(steps) / len(sampled)
+
+def time_vectorized(df: pd.DataFrame, repeat: int) -> float:
+    """Best-of-``repeat`` wall time of the single-pass engine."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_backtest(df, THRESHOLD)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main() -> None:
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the backtest engines")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--samples", type=int, default=500, help="Legacy steps timed per size")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'bars':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n in args.sizes:
+        df = make_price_frame(n)
+        legacy = time_legacy(df, args.samples)
+        vectorized = time_vectorized(df, args.repeat)
+        print(f"{n:>8} {legacy:>12.3f} {vectorized:>15.4f} {legacy / vectorized:>8.0f}x")
+
+if __name__ == "__main__":
+    main()
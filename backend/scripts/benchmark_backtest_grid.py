@@ -0,0 +1,62 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.backtest_runner import BacktestRunner
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GRID = {
+    "threshold": [0.5, 0.6, 0.7],
+    "rsi_period": [7, 14, 21],
+    "bb_std": [1.5, 2.0, 2.5],
+}
+
+def make_price_frame(n: int, seed: int) -> pd.DataFrame:
+    """Generate a random-walk daily frame with ``n`` bars."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame(
+        {"Close": close},
+        index=pd.date_range("2000-01-01", periods=n, freq="D"),
+    )
+
+async def time_grid(frames: dict, workers: int) -> float:
+    """Wall time of one grid job, not counting pool startup."""
+    runner = BacktestRunner(max_workers=workers)
+    try:
+        # Warm the pool so every worker has started and imported the app
+        await runner.run({"WARM": make_price_frame(100, seed=0)}, {"threshold": [0.6] * workers * 4})
+        start = time.perf_counter()
+        await runner.run(frames, GRID)
+        return time.perf_counter() - start
+    finally:
+        runner.shutdown()
+
+def main() -> None:
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark grid backtest scaling with worker count")
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--bars", type=int, default=5 * 252)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    frames = {f"S{i:04d}": make_price_frame(args.bars, seed=i) for i in range(args.symbols)}
+    runs = args.symbols * len(GRID["threshold"]) * len(GRID["rsi_period"]) * len(GRID["bb_std"])
+
+    print(f"{runs} runs of {args.bars} bars on {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'seconds':>9} {'runs/s':>9} {'speedup':>9}")
+    baseline = None
+    for workers in args.workers:
+        elapsed = asyncio.run(time_grid(frames, workers))
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {runs / elapsed:>9.0f} {baseline / elapsed:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from app.schemas.trading import MarketData
+from app.services.websocket import WebSocketManager
+
+class MockSocket:
+    """Stands in for a Starlette WebSocket; encodes JSON the way send_json does."""
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data: dict):
+        json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+    async def send_text(self, data: str):
+        pass
+
+def make_market_data() -> MarketData:
+    return MarketData(
+        symbol="AAPL",
+        price=187.45,
+        volume=1_234_567.0,
+        timestamp=datetime.now(),
+        high=188.1,
+        low=186.9,
+        open=187.0,
+        trading_signal="BUY",
+        signal_confidence=1.3,
+        indicators={
+            "rsi": 28.4, "macd": 0.81, "macd_signal": 0.52, "bb_upper": 190.2,
+            "bb_lower": 184.1, "bb_middle": 187.15, "current_price": 187.45,
+        },
+    )
+
+async def legacy_broadcast(sockets, market_data: MarketData):
+    """The previous behaviour: dump and encode the payload once per socket."""
+    for connection in sockets:
+        await connection.send_json({
+            "type": "market_data",
+            "symbol": market_data.symbol,
+            "data": market_data.model_dump(mode="json"),
+        })
+
+async def run(sockets_count: int, rounds: int) -> None:
+    manager = WebSocketManager()
+    manager.ensure_market_data_stream = lambda: None
+    sockets = [MockSocket() for _ in range(sockets_count)]
+    for i, websocket in enumerate(sockets):
+        await manager.connect(websocket, f"client{i}")
+        manager.subscribe(websocket, ["AAPL"])
+    market_data = make_market_data()
+
+    start = time.process_time()
+    for _ in range(rounds):
+        await legacy_broadcast(sockets, market_data)
+    legacy = (time.process_time() - start) / rounds
+
+    start = time.process_time()
+    for _ in range(rounds):
+        await manager.broadcast_market_data(market_data)
+    encoded_once = (time.process_time() - start) / rounds
+
+    print(f"{sockets_count} sockets, CPU per broadcast:")
+    print(f"  per-socket encode: {legacy * 1000:8.3f} ms")
+    print(f"  encode once:       {encoded_once * 1000:8.3f} ms ({legacy / encoded_once:.1f}x)")
+
+def main() -> None:
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark market data broadcast CPU cost")
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.sockets, args.rounds))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.crud.pagination import newest_first
+from app.models import Base, Trade, TradingAccount, User
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Trade-history listings, as the CRUD methods build them
+SHAPES = {
+    "by user": lambda: select(Trade).filter(Trade.user_id == 1),
+    "by account": lambda: select(Trade).filter(Trade.trading_account_id == 1),
+    "by symbol": lambda: select(Trade).filter(Trade.user_id == 1, Trade.symbol == "AAPL"),
+    "ai suggested": lambda: select(Trade).filter(Trade.user_id == 1, Trade.ai_suggested == True),
+}
+
+INDEXES = [index.name for index in Trade.__table__.indexes]
+
+SEED_SQL = {
+    "postgresql": """
+        INSERT INTO trades (user_id, trading_account_id, symbol, side, quantity, price, status, type,
+                            ai_suggested, created_at, updated_at)
+        SELECT 1 + g % :users, 1 + g % :users, (ARRAY['AAPL','MSFT','TSLA','NVDA','AMZN'])[1 + (g / 10) % 5],
+               'buy', 1, 100, 'filled', 'market', (g / 10) % 4 = 0,
+               timestamp '2020-01-01' + (g / 3) * interval '1 second',
+               timestamp '2020-01-01' + (g / 3) * interval '1 second'
+        FROM generate_series(1, :rows) AS g
+    """,
+    "sqlite": """
+        INSERT INTO trades (user_id, trading_account_id, symbol, side, quantity, price, status, type,
+                            ai_suggested, created_at, updated_at)
+        WITH RECURSIVE g(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM g WHERE n < :rows)
+        SELECT 1 + n % :users, 1 + n % :users,
+               CASE (n / 10) % 5 WHEN 0 THEN 'AAPL' WHEN 1 THEN 'MSFT' WHEN 2 THEN 'TSLA' WHEN 3 THEN 'NVDA' ELSE 'AMZN' END,
+               'buy', 1, 100, 'filled', 'market', (n / 10) % 4 = 0,
+               datetime('2020-01-01', '+' || (n / 3) || ' seconds'),
+               datetime('2020-01-01', '+' || (n / 3) || ' seconds')
+        FROM g
+    """,
+}
+
+EXPLAIN = {
+    "postgresql": "EXPLAIN (ANALYZE, BUFFERS) ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+
+async def seed(db: AsyncSession, rows: int, users: int) -> None:
+    """Replace the trades table contents with ``rows`` synthetic trades (three per timestamp)."""
+    dialect = db.bind.dialect.name
+    await db.execute(delete(Trade))
+    await db.execute(delete(TradingAccount))
+    await db.execute(delete(User))
+    db.add_all(User(id=i, email=f"bench{i}@example.com", username=f"bench{i}", hashed_password="x") for i in range(1, users + 1))
+    await db.flush()
+    db.add_all(TradingAccount(id=i, user_id=i, broker="alpaca", account_id=f"bench{i}") for i in range(1, users + 1))
+    await db.flush()
+    started = time.perf_counter()
+    await db.execute(text(SEED_SQL[dialect]), {"rows": rows, "users": users})
+    await db.commit()
+    if dialect == "postgresql":
+        await db.execute(text("ANALYZE trades"))
+    logger.info(f"Seeded {rows} trades in {time.perf_counter() - started:.1f}s")
+
+async def set_indexes(db: AsyncSession, enabled: bool) -> None:
+    for name in INDEXES:
+        await db.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    if enabled:
+        for index in Trade.__table__.indexes:
+            columns = ", ".join(column.name for column in index.columns)
+            await db.execute(text(f"CREATE INDEX {index.name} ON trades ({columns})"))
+    await db.commit()
+    if db.bind.dialect.name == "postgresql":
+        await db.execute(text("ANALYZE trades"))
+
+def render(db: AsyncSession, query) -> str:
+    return str(query.compile(db.bind, compile_kwargs={"literal_binds": True}))
+
+async def time_query(db: AsyncSession, query, repeat: int) -> float:
+    """Median wall time of a query in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        (await db.execute(query)).scalars().all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+async def explain(db: AsyncSession, query) -> str:
+    rows = (await db.execute(text(EXPLAIN[db.bind.dialect.name] + render(db, query)))).all()
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+async def benchmark(db: AsyncSession, depths, page_size: int, repeat: int) -> str:
+    lines = []
+    for shape, build in SHAPES.items():
+        lines += [f"### {shape}", "", "| offset | OFFSET (ms) | keyset (ms) |", "|---:|---:|---:|"]
+        plans = None
+        for depth in depths:
+            offset_query = newest_first(build(), Trade).offset(depth).limit(page_size)
+            after = None
+            if depth:
+                # The cursor a client would hold after walking ``depth`` rows
+                last = (await db.execute(newest_first(build(), Trade).offset(depth - 1).limit(1))).scalar_one_or_none()
+                if last is None:
+                    continue
+                after = (last.created_at, last.id)
+            keyset_query = newest_first(build(), Trade, after).limit(page_size)
+            offset_ms = await time_query(db, offset_query, repeat)
+            keyset_ms = await time_query(db, keyset_query, repeat)
+            lines.append(f"| {depth} | {offset_ms:.2f} | {keyset_ms:.2f} |")
+            plans = (depth, offset_query, keyset_query)
+        if plans is not None:
+            depth, offset_query, keyset_query = plans
+            lines += ["", f"Plans at offset {depth}:", "", "```", "-- OFFSET", await explain(db, offset_query),
+                      "", "-- keyset", await explain(db, keyset_query), "```", ""]
+    return "\n".join(lines)
+
+async def run(args) -> None:
+    engine = create_async_engine(args.url)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        async with sessions() as db:
+            if not args.skip_seed:
+                await set_indexes(db, False)  # Bulk load first, index after
+                await seed(db, args.rows, args.users)
+            report = [
+                f"# Trade history pagination: {args.rows} trades, {args.users} users ({engine.dialect.name})",
+                "",
+                f"Generated {datetime.now().isoformat(timespec='seconds')} by scripts/benchmark_trade_pagination.py; "
+                f"page size {args.page_size}, median of {args.repeat} runs.",
+                "",
+            ]
+            for enabled in (False, True):
+                await set_indexes(db, enabled)
+                report += [f"## {'With' if enabled else 'Without'} composite indexes", ""]
+                report.append(await benchmark(db, args.depths, args.page_size, args.repeat))
+    finally:
+        await engine.dispose()
+
+    output = "\n".join(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+def main() -> None:
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Compare OFFSET and keyset pagination of trade history")
+    parser.add_argument("--url", required=True, help="Database URL; its trades, accounts and users are replaced")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=10, help="Trades are spread evenly over this many users")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the trades already in the database")
+    parser.add_argument("--output", help="Also write the markdown report to this file")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
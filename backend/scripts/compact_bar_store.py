@@ -0,0 +1,14 @@
+import logging
+
+from app.services.bar_store import bar_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main() -> None:
+    logger.info(f"Compacting bar store at {bar_store.root}")
+    compacted = bar_store.compact_all()
+    logger.info(f"Compacted {compacted} symbol/interval directories")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import crud
+from app.config import settings
+from app.services.fill_import import fill_format, parse_fills
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def run(args) -> None:
+    path = Path(args.file)
+    started = time.perf_counter()
+    with path.open("rb") as f:
+        fills = parse_fills(f, fill_format(path.name), max_rows=args.max_rows)
+    parsed = time.perf_counter()
+    logger.info(f"Parsed {len(fills)} fills from {path} in {parsed - started:.2f}s")
+
+    engine = create_async_engine(args.url or settings.DATABASE_URL)
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as db:
+            account_ids = {fill.trading_account_id for fill in fills}
+            owned = await crud.trading_account.get_ids_for_user(db, user_id=args.user_id, ids=account_ids)
+            if len(owned) != len(account_ids):
+                raise SystemExit(f"Accounts {sorted(account_ids - set(owned))} don't belong to user {args.user_id}")
+            ids = await crud.trade.create_many(db, objs_in=fills, user_id=args.user_id)
+    finally:
+        await engine.dispose()
+
+    elapsed = time.perf_counter() - parsed
+    logger.info(f"Inserted {len(ids)} trades in {elapsed:.2f}s ({len(ids) / max(elapsed, 1e-9):,.0f} rows/s)")
+
+def main() -> None:
+    """Main function to load a fill export."""
+    parser = argparse.ArgumentParser(description="Bulk-load a CSV or JSON fill export into trades")
+    parser.add_argument("file", help="Fill export (.csv with a header row, or .json array)")
+    parser.add_argument("--user-id", type=int, required=True, help="Owner of the imported trades")
+    parser.add_argument("--url", help="Database URL (default: the configured database)")
+    parser.add_argument("--max-rows", type=int, default=settings.TRADE_IMPORT_MAX_ROWS)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import numpy as np
+import uvicorn
+from fastapi import FastAPI
+
+from app.services.trading import TradingService
+
+ACCOUNT = {
+    "id": "stub", "status": "ACTIVE", "currency": "USD", "buying_power": "20000", "cash": "10000",
+    "portfolio_value": "15000", "pattern_day_trader": False, "trading_blocked": False,
+    "transfers_blocked": False, "account_blocked": False, "created_at": "2024-01-01T00:00:00Z",
+    "shorting_enabled": True,
+}
+
+def start_stub_broker(delay: float) -> ThreadingHTTPServer:
+    """A local stand-in for the Alpaca REST API that answers slowly."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(delay)
+            body = json.dumps(ACCOUNT).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def build_app(service: TradingService, blocking: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/account")
+    async def account():
+        if blocking:
+            # The previous behaviour: the REST call runs on the event loop
+            return {"status": service.api.get_account().status}
+        return await service.get_account_info()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+def serve(app: FastAPI) -> tuple:
+    """Run the app under uvicorn in a background thread with its own event loop."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+async def measure(base_url: str, broker_clients: int, pings: int) -> np.ndarray:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        stop = asyncio.Event()
+
+        async def hammer_broker():
+            while not stop.is_set():
+                await client.get("/account")
+
+        load = [asyncio.create_task(hammer_broker()) for _ in range(broker_clients)]
+        await asyncio.sleep(0.2)
+        latencies = []
+        for _ in range(pings):
+            started = time.perf_counter()
+            await client.get("/ping")
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+        stop.set()
+        await asyncio.gather(*load)
+    return np.array(latencies) * 1000
+
+def main() -> None:
+    """Main function to run the load test."""
+    parser = argparse.ArgumentParser(description="Latency of unrelated endpoints while broker calls are slow")
+    parser.add_argument("--broker-delay", type=float, default=0.1, help="Seconds the stub broker takes to answer")
+    parser.add_argument("--broker-clients", type=int, default=4)
+    parser.add_argument("--pings", type=int, default=100)
+    args = parser.parse_args()
+
+    broker = start_stub_broker(args.broker_delay)
+    base_url = f"http://127.0.0.1:{broker.server_port}"
+    print(f"Stub broker delay {args.broker_delay * 1000:.0f} ms, {args.broker_clients} concurrent broker clients")
+    for label, blocking in (("blocking REST", True), ("async broker", False)):
+        service = TradingService("stub_key", "stub_secret", base_url=base_url)
+        server, thread, app_url = serve(build_app(service, blocking))
+        latencies = asyncio.run(measure(app_url, args.broker_clients, args.pings))
+        server.should_exit = True
+        thread.join()
+        print(
+            f"  {label:14s} /ping p50 {np.percentile(latencies, 50):8.2f} ms"
+            f"  p99 {np.percentile(latencies, 99):8.2f} ms"
+        )
+    broker.shutdown()
+
+if __name__ == "__main__":
+    main()
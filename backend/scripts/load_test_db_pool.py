@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from sqlalchemy import exc, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database import create_engine, pool_stats
+from app.models import Base, User
+
+async def request(sessions: async_sessionmaker, n: int, hold: float, postgres: bool) -> float:
+    """One API-like request: a session, a lookup, then ``hold`` seconds of work on the connection"""
+    started = time.perf_counter()
+    async with sessions() as db:
+        await db.execute(select(User).filter(User.id == n % 100))
+        if postgres:
+            await db.execute(text("SELECT pg_sleep(:hold)"), {"hold": hold})
+        else:
+            await asyncio.sleep(hold)
+    return time.perf_counter() - started
+
+async def measure(url: str, pool_size: int, max_overflow: int, args) -> dict:
+    engine = create_engine(url, pool_size=pool_size, max_overflow=max_overflow, pool_timeout=args.timeout)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    postgres = engine.dialect.name == "postgresql"
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for n in range(args.requests):
+        queue.put_nowait(n)
+    latencies, timeouts, peak = [], 0, 0
+
+    async def client():
+        nonlocal timeouts, peak
+        while not queue.empty():
+            n = queue.get_nowait()
+            try:
+                latencies.append(await request(sessions, n, args.hold, postgres))
+            except exc.TimeoutError:
+                timeouts += 1
+            peak = max(peak, engine.pool.checkedout())
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stats = pool_stats(engine)
+    finally:
+        await engine.dispose()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": np.percentile(latencies, 50) if len(latencies) else float("nan"),
+        "p99": np.percentile(latencies, 99) if len(latencies) else float("nan"),
+        "timeouts": timeouts,
+        "peak": peak,
+        "wait_avg_ms": stats["wait_avg_ms"],
+        "wait_max_ms": stats["wait_max_ms"],
+    }
+
+async def run(args) -> None:
+    url = args.url or settings.DATABASE_URL
+    print(
+        f"{args.requests} requests from {args.concurrency} concurrent clients, "
+        f"{args.hold * 1000:.0f} ms of work per request, pool timeout {args.timeout}s"
+    )
+    print("| statement cache | pool size | max overflow | req/s | p50 (ms) | p99 (ms) | timeouts | peak connections | avg wait (ms) | max wait (ms) |")
+    print("|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|")
+    for cache_size in args.statement_cache_sizes:
+        # create_engine reads the cache size from settings; only asyncpg uses it
+        settings.DB_STATEMENT_CACHE_SIZE = cache_size
+        for config in args.pools:
+            pool_size, max_overflow = (int(value) for value in config.split(":"))
+            result = await measure(url, pool_size, max_overflow, args)
+            print(
+                f"| {cache_size} | {pool_size} | {max_overflow} | {result['throughput']:.0f} | {result['p50']:.1f} "
+                f"| {result['p99']:.1f} | {result['timeouts']} | {result['peak']} "
+                f"| {result['wait_avg_ms']:.1f} | {result['wait_max_ms']:.1f} |"
+            )
+
+def main() -> None:
+    """Main function to run the load test."""
+    parser = argparse.ArgumentParser(description="Throughput of pooled database sessions at high concurrency")
+    parser.add_argument("--url", help="Database URL (default: the configured database)")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--hold", type=float, default=0.01, help="Seconds each request keeps its connection busy")
+    parser.add_argument("--timeout", type=float, default=settings.DB_POOL_TIMEOUT, help="Pool checkout timeout")
+    parser.add_argument(
+        "--pools", nargs="+", default=["5:0", "10:20", "25:25", "50:50", "100:100"],
+        help="pool_size:max_overflow configurations to compare",
+    )
+    parser.add_argument(
+        "--statement-cache-sizes", type=int, nargs="+", default=[settings.DB_STATEMENT_CACHE_SIZE],
+        help="asyncpg prepared statement cache sizes to compare (e.g. 0 100)",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
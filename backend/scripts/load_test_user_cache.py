@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.core import deps
+from app.core.security import create_access_token
+from app.models import Base, User
+from app.services.user_cache import UserCache
+
+async def measure(sessions: async_sessionmaker, queries: list, tokens: list, args, ttl: float) -> dict:
+    """Authenticate ``args.requests`` requests, ``args.concurrency`` at a time, with a cache of ``ttl``"""
+    cache = UserCache(ttl=ttl)
+    deps.user_cache = cache
+    queue: asyncio.Queue = asyncio.Queue()
+    for n in range(args.requests):
+        queue.put_nowait(tokens[n % len(tokens)])
+
+    async def client():
+        while not queue.empty():
+            token = queue.get_nowait()
+            async with sessions() as db:
+                await deps.get_current_user(db, token)
+
+    queries.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"throughput": args.requests / elapsed, "queries": len(queries), **cache.stats()}
+
+async def run(args) -> None:
+    engine = create_async_engine(args.url)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessions() as db:
+        await db.execute(delete(User).where(User.email.like("loadtest%")))
+        users = [User(email=f"loadtest{i}@example.com", username=f"loadtest{i}", hashed_password="x") for i in range(args.users)]
+        db.add_all(users)
+        await db.commit()
+    tokens = [create_access_token(user.id) for user in users]
+
+    queries = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *a: queries.append(a[2]))
+    print(f"{args.requests} authenticated requests from {args.concurrency} clients, {args.users} users")
+    print("| user cache | req/s | user queries | queries per request | lookups saved per request |")
+    print("|---|---:|---:|---:|---:|")
+    try:
+        for label, ttl in (("off", 0), (f"{args.ttl:g}s TTL", args.ttl)):
+            result = await measure(sessions, queries, tokens, args, ttl)
+            print(
+                f"| {label} | {result['throughput']:.0f} | {result['queries']} "
+                f"| {result['queries'] / args.requests:.3f} | {result['db_lookups_saved_per_request']:.3f} |"
+            )
+    finally:
+        await engine.dispose()
+
+def main() -> None:
+    """Main function to run the load test."""
+    parser = argparse.ArgumentParser(description="Database lookups saved by the authenticated-user cache")
+    parser.add_argument("--url", required=True, help="Database URL; loadtest* users are created in it")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50, help="Distinct users polling")
+    parser.add_argument("--ttl", type=float, default=settings.USER_CACHE_TTL)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
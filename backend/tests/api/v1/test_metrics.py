@@ -0,0 +1,31 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+pytestmark = pytest.mark.asyncio
+
+async def login(client: AsyncClient, username: str, password: str) -> dict:
+    login_response = await client.post("/api/v1/auth/login", data={"username": username, "password": password})
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+async def test_health_is_only_a_liveness_status(client: AsyncClient) -> None:
+    response = await client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert not {"database_pool", "database_replica", "single_flight", "caches"} & set(response.json())
+
+async def test_metrics_are_for_superusers(
+    client: AsyncClient, superuser: AsyncSession, normal_user: AsyncSession
+) -> None:
+    response = await client.get("/api/v1/metrics/")
+    assert response.status_code == 401
+
+    headers = await login(client, "user@aitrader.com", "user123")
+    response = await client.get("/api/v1/metrics/", headers=headers)
+    assert response.status_code == 400
+
+    headers = await login(client, "admin@aitrader.com", "admin123")
+    response = await client.get("/api/v1/metrics/", headers=headers)
+    assert response.status_code == 200
+    assert {"database_pool", "database_replica", "single_flight", "caches"} <= set(response.json())
+    assert "users" in response.json()["caches"]
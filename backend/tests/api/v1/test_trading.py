@@ -1,38 +1,61 @@
+import asyncio
 import pytest
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import crud, models
+from app import crud, models, schemas
+from app.api.v1.endpoints import trading as trading_endpoints
+from app.config import settings
+from app.database import get_test_session_factory
+from app.schemas.trading import TradeImport, TradingSignal
+from app.services import fill_import
+from app.services.ai_trading import AITradingService
+from app.services.trading import trading_service
 
 pytestmark = pytest.mark.asyncio
 
 @pytest.fixture
 async def trading_account(db: AsyncSession, normal_user: models.User) -> models.TradingAccount:
-    account_in = {
-        "broker": "alpaca",
-        "account_id": "test123",
-        "is_paper": True,
-        "balance": 10000.0,
-        "user_id": normal_user.id,
-    }
-    account = await crud.trading_account.create(db, obj_in=account_in)
+    account_in = schemas.TradingAccountCreate(
+        broker="alpaca",
+        account_id="test123",
+        is_paper=True,
+        balance=10000.0,
+    )
+    account = await crud.trading_account.create(db, obj_in=account_in, user_id=normal_user.id)
     return account
 
 @pytest.fixture
 async def trade(db: AsyncSession, normal_user: models.User, trading_account: models.TradingAccount) -> models.Trade:
-    trade_in = {
-        "symbol": "AAPL",
-        "side": "buy",
-        "quantity": 10,
-        "price": 150.0,
-        "type": "market",
-        "status": "filled",
-        "user_id": normal_user.id,
-        "trading_account_id": trading_account.id,
-    }
-    trade = await crud.trade.create(db, obj_in=trade_in)
+    trade_in = TradeImport(
+        symbol="AAPL",
+        side="buy",
+        quantity=10,
+        price=150.0,
+        type="market",
+        status="filled",
+        trading_account_id=trading_account.id,
+    )
+    trade = await crud.trade.create(db, obj_in=trade_in, user_id=normal_user.id)
     return trade
 
+@pytest.fixture
+def broker(monkeypatch) -> list:
+    """Orders sent to the broker, which fills each at its limit price or 200.0"""
+    orders = []
+
+    async def place_order(**order):
+        orders.append(order)
+        return {"status": "filled", "filled_avg_price": order.get("limit_price") or 200.0}
+
+    monkeypatch.setattr(trading_service, "api", object())
+    monkeypatch.setattr(trading_service, "place_order", place_order)
+    return orders
+
 async def test_create_trading_account(
     client: AsyncClient, normal_user: AsyncSession
 ) -> None:
@@ -83,6 +106,7 @@ async def test_create_trade(
     client: AsyncClient,
     normal_user: AsyncSession,
     trading_account: models.TradingAccount,
+    broker: list,
 ) -> None:
     # Login as normal user
     login_data = {
@@ -109,6 +133,8 @@ async def test_create_trade(
     assert trade_data["side"] == data["side"]
     assert trade_data["quantity"] == data["quantity"]
     assert trade_data["price"] == data["price"]
+    assert trade_data["status"] == "filled"
+    assert [order["symbol"] for order in broker] == ["TSLA"]
 
 async def test_read_trades(
     client: AsyncClient,
@@ -177,4 +203,294 @@ async def test_read_trades_by_account(
     assert response.status_code == 200
     trades = response.json()
     assert len(trades) > 0
-    assert all(t["trading_account_id"] == trading_account.id for t in trades) 
\ No newline at end of file
+    assert all(t["trading_account_id"] == trading_account.id for t in trades)
+
+async def test_read_trades_pages_with_cursor(
+    client: AsyncClient,
+    db: AsyncSession,
+    normal_user: AsyncSession,
+    trading_account: models.TradingAccount,
+) -> None:
+    created_at = datetime(2024, 1, 1)
+    for i in range(5):
+        db.add(models.Trade(
+            user_id=trading_account.user_id,
+            trading_account_id=trading_account.id,
+            symbol="AAPL",
+            side="buy",
+            quantity=1,
+            price=100.0 + i,
+            status="filled",
+            type="market",
+            created_at=created_at if i < 3 else created_at + timedelta(days=i),
+        ))
+    await db.commit()
+
+    # Login as normal user
+    login_data = {
+        "username": "user@aitrader.com",
+        "password": "user123",
+    }
+    login_response = await client.post("/api/v1/auth/login", data=login_data)
+    token = login_response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Follow the cursor until the last (short) page
+    pages, params = [], {"limit": 2}
+    while True:
+        response = await client.get("/api/v1/trading/trades", headers=headers, params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    trades = [t for page in pages for t in page]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert len({t["id"] for t in trades}) == 5
+    assert [(t["created_at"], t["id"]) for t in trades] == sorted(
+        ((t["created_at"], t["id"]) for t in trades), reverse=True
+    )
+
+    response = await client.get("/api/v1/trading/trades", headers=headers, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+async def test_import_trades(
+    client: AsyncClient,
+    db: AsyncSession,
+    normal_user: models.User,
+    trading_account: models.TradingAccount,
+    monkeypatch,
+) -> None:
+    # Login as normal user
+    login_data = {
+        "username": "user@aitrader.com",
+        "password": "user123",
+    }
+    login_response = await client.post("/api/v1/auth/login", data=login_data)
+    token = login_response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # The upload is parsed in a worker thread, off the event loop
+    parse_threads = []
+
+    def parse_fills(*args):
+        parse_threads.append(threading.current_thread())
+        return fill_import.parse_fills(*args)
+
+    monkeypatch.setattr(trading_endpoints, "parse_fills", parse_fills)
+    rows = ["trading_account_id,symbol,side,quantity,price,type,executed_at"] + [
+        f"{trading_account.id},AAPL,buy,{i + 1},150.0,market,2024-01-02T14:{i:02d}:00" for i in range(50)
+    ]
+    response = await client.post(
+        "/api/v1/trading/trades/import",
+        headers=headers,
+        files={"file": ("fills.csv", "\n".join(rows).encode(), "text/csv")},
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == 50
+    assert parse_threads and parse_threads[0] is not threading.current_thread()
+
+    response = await client.get("/api/v1/trading/trades", headers=headers, params={"limit": 1000})
+    imported = [t for t in response.json() if t["executed_at"]]
+    assert len(imported) == 50
+    assert imported[0]["executed_at"] == "2024-01-02T14:49:00"
+
+    # Rows for someone else's account are refused before anything is written
+    rows[1] = rows[1].replace(f"{trading_account.id},", f"{trading_account.id + 1000},", 1)
+    response = await client.post(
+        "/api/v1/trading/trades/import",
+        headers=headers,
+        files={"file": ("fills.csv", "\n".join(rows).encode(), "text/csv")},
+    )
+    assert response.status_code == 403
+
+    # Oversized exports are refused before they are parsed
+    monkeypatch.setattr(settings, "TRADE_IMPORT_MAX_BYTES", 100)
+    response = await client.post(
+        "/api/v1/trading/trades/import",
+        headers=headers,
+        files={"file": ("fills.csv", "\n".join(rows).encode(), "text/csv")},
+    )
+    assert response.status_code == 413
+
+@pytest.fixture
+def quotes(monkeypatch) -> list:
+    """Symbols of each quote lookup; AAPL trades at 170.0 and MSFT at 310.0"""
+    lookups = []
+
+    async def get_quotes(symbols):
+        lookups.append(sorted(symbols))
+        prices = {"AAPL": 170.0, "MSFT": 310.0}
+        return {s.upper(): {"symbol": s.upper(), "price": prices[s.upper()]} for s in symbols if s.upper() in prices}
+
+    monkeypatch.setattr(trading_service, "get_quotes", get_quotes)
+    return lookups
+
+async def test_positions_and_portfolio_are_valued_from_one_quote_lookup(
+    client: AsyncClient,
+    db: AsyncSession,
+    normal_user: models.User,
+    trading_account: models.TradingAccount,
+    quotes: list,
+) -> None:
+    for symbol, side, quantity, price in [
+        ("AAPL", "buy", 10, 150.0), ("AAPL", "sell", 4, 160.0), ("MSFT", "buy", 5, 300.0), ("TSLA", "buy", 1, 200.0),
+    ]:
+        db.add(models.Trade(
+            user_id=normal_user.id, trading_account_id=trading_account.id, symbol=symbol, side=side,
+            quantity=quantity, price=price, status="filled", type="market",
+        ))
+    # Closed out and unfilled trades make no position
+    db.add(models.Trade(
+        user_id=normal_user.id, trading_account_id=trading_account.id, symbol="TSLA", side="sell",
+        quantity=1, price=210.0, status="filled", type="market",
+    ))
+    db.add(models.Trade(
+        user_id=normal_user.id, trading_account_id=trading_account.id, symbol="NVDA", side="buy",
+        quantity=1, price=500.0, status="pending", type="limit",
+    ))
+    await db.commit()
+
+    # Login as normal user
+    login_data = {
+        "username": "user@aitrader.com",
+        "password": "user123",
+    }
+    login_response = await client.post("/api/v1/auth/login", data=login_data)
+    token = login_response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.get("/api/v1/trading/positions", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"symbol": "AAPL", "quantity": 6.0, "average_entry_price": 150.0,
+         "current_price": 170.0, "market_value": 1020.0, "unrealized_pl": 120.0},
+        {"symbol": "MSFT", "quantity": 5.0, "average_entry_price": 300.0,
+         "current_price": 310.0, "market_value": 1550.0, "unrealized_pl": 50.0},
+    ]
+
+    response = await client.get("/api/v1/trading/portfolio", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"buying_power": 10000.0, "equity": 10000.0 + 1020.0 + 1550.0}
+
+    # One lookup per request, for all of its symbols
+    assert quotes == [["AAPL", "MSFT"], ["AAPL", "MSFT"]]
+
+async def test_orders_are_stored_then_executed(
+    client: AsyncClient,
+    test_engine,
+    normal_user: models.User,
+    trading_account: models.TradingAccount,
+    quotes: list,
+    broker: list,
+    monkeypatch,
+) -> None:
+    monkeypatch.setattr(trading_endpoints, "AsyncSessionLocal", get_test_session_factory(test_engine))
+
+    # Login as normal user
+    login_data = {
+        "username": "user@aitrader.com",
+        "password": "user123",
+    }
+    login_response = await client.post("/api/v1/auth/login", data=login_data)
+    token = login_response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    order = {"trading_account_id": trading_account.id, "symbol": "AAPL", "side": "buy", "quantity": 2}
+    response = await client.post("/api/v1/trading/orders", headers=headers, json=order)
+    assert response.status_code == 200
+    assert (response.json()["status"], response.json()["price"]) == ("pending", 170.0)
+    assert broker == [{
+        "symbol": "AAPL", "qty": 2.0, "side": "buy", "type": "market", "limit_price": None, "stop_price": None,
+        "client_order_id": f"trade-{response.json()['id']}",
+    }]
+
+    # The order is filled by the time the background execution has run
+    response = await client.get("/api/v1/trading/orders", headers=headers, params={"status": "filled"})
+    assert [(o["symbol"], o["price"]) for o in response.json()] == [("AAPL", 200.0)]
+
+    response = await client.post("/api/v1/trading/orders", headers=headers, json={**order, "quantity": 1000})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient buying power for this order"
+
+    response = await client.post(
+        "/api/v1/trading/orders", headers=headers, json={**order, "trading_account_id": trading_account.id + 1000}
+    )
+    assert response.status_code == 403
+
+    # The order form doesn't name an account: the order goes to the user's default one
+    form_order = {"symbol": "AAPL", "side": "sell", "type": "limit", "quantity": 1, "price": 180.0}
+    response = await client.post("/api/v1/trading/orders", headers=headers, json=form_order)
+    assert response.status_code == 200
+    assert response.json()["trading_account_id"] == trading_account.id
+
+async def test_analyze_batch_streams_one_signal_per_line(
+    client: AsyncClient,
+    normal_user: models.User,
+    monkeypatch,
+) -> None:
+    service = AITradingService("test_key")
+    rng = np.random.default_rng(7)
+    panel = pd.DataFrame(
+        {symbol: 100 * np.exp(np.cumsum(rng.normal(0, 0.03, 40))) for symbol in ("AAPL", "MSFT")},
+        index=pd.date_range("2024-01-01", periods=40, freq="D"),
+    )
+
+    async def fetch_panel(symbols, start, end):
+        return panel.reindex(columns=symbols)
+
+    monkeypatch.setattr(service, "_fetch_close_panel", fetch_panel)
+    monkeypatch.setattr(trading_endpoints, "ai_trading_service", service)
+
+    # Login as normal user
+    login_data = {
+        "username": "user@aitrader.com",
+        "password": "user123",
+    }
+    login_response = await client.post("/api/v1/auth/login", data=login_data)
+    token = login_response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = await client.post("/api/v1/trading/analyze/batch", headers=headers, json={"symbols": ["aapl", "MSFT"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    signals = [TradingSignal.model_validate_json(line) for line in response.text.splitlines()]
+    assert [s.symbol for s in signals] == ["AAPL", "MSFT"]
+    assert all(s.signal in ("BUY", "SELL", "HOLD") and s.indicators for s in signals)
+
+    response = await client.post("/api/v1/trading/analyze/batch", headers=headers, json={"symbols": []})
+    assert response.status_code == 422
+
+    monkeypatch.setattr(trading_endpoints, "ai_trading_service", None)
+    response = await client.post("/api/v1/trading/analyze/batch", headers=headers, json={"symbols": ["AAPL"]})
+    assert response.status_code == 503
+
+async def test_grid_backtests_are_queued_as_jobs(
+    client: AsyncClient,
+    normal_user: models.User,
+    monkeypatch,
+) -> None:
+    started = []
+
+    async def execute(job_id, request):
+        started.append(job_id)
+
+    monkeypatch.setattr(trading_endpoints.backtest_job_queue, "_execute", execute)
+    monkeypatch.setattr(trading_endpoints, "ai_trading_service", None)  # Grid backtests don't use it
+
+    # Login as normal user
+    login_data = {
+        "username": "user@aitrader.com",
+        "password": "user123",
+    }
+    login_response = await client.post("/api/v1/auth/login", data=login_data)
+    token = login_response.json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for path in ("/api/v1/trading/backtest/jobs", "/api/v1/trading/backtest/grid"):
+        response = await client.post(path, headers=headers, json={"symbols": ["AAPL", "MSFT"]})
+        assert response.status_code == 202
+        assert (response.json()["status"], response.json()["total_runs"]) == ("queued", 2)
+    await asyncio.sleep(0)
+    assert len(started) == 2
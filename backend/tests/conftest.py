@@ -7,11 +7,13 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
+from app.core.deps import get_db
 from app.database import get_test_engine, get_test_session_factory
 from app.models import Base
 from app.config import settings
 from app.core.security import get_password_hash
 from app.models import User, TradingAccount, Trade
+from app.services.bar_store import bar_store
 
 # Set test database
 settings.TESTING = True
@@ -23,6 +25,12 @@ def event_loop() -> Generator:
     yield loop
     loop.close()
 
+@pytest.fixture(autouse=True)
+def bar_store_dir(tmp_path, monkeypatch):
+    """Keep the global bar store's files in the test's temporary directory."""
+    monkeypatch.setattr(bar_store, "root", tmp_path / "bars")
+    return bar_store.root
+
 @pytest_asyncio.fixture(scope="session")
 async def test_engine():
     """Create a test engine instance."""
@@ -43,6 +51,10 @@ async def db(test_engine) -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.rollback()
             await session.close()
+            # Fixtures and endpoints commit, so a rollback alone doesn't isolate tests
+            async with test_engine.begin() as conn:
+                for table in reversed(Base.metadata.sorted_tables):
+                    await conn.execute(table.delete())
 
 @pytest_asyncio.fixture
 async def client(db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
@@ -53,7 +65,7 @@ async def client(db: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
         finally:
             await db.close()
 
-    app.dependency_overrides[get_async_session] = override_get_db
+    app.dependency_overrides[get_db] = override_get_db
     async with AsyncClient(app=app, base_url="http://test") as client:
         yield client
     app.dependency_overrides.clear()
@@ -0,0 +1,79 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import crud
+from app.crud.base import CRUDBase
+from app.models import Base, Trade, TradingAccount
+from app.schemas.trading import TradeImport, TradingAccountCreate
+
+pytest.importorskip("aiosqlite")
+
+pytestmark = pytest.mark.asyncio
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bulk.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+def fill(i: int, **values) -> TradeImport:
+    return TradeImport(**{
+        "trading_account_id": 1,
+        "symbol": "AAPL",
+        "side": "buy" if i % 2 else "sell",
+        "quantity": 1 + i,
+        "price": 100.0 + i,
+        "type": "market",
+        **values,
+    })
+
+async def test_trades_are_inserted_in_multi_row_statements(db):
+    statements = []
+    event.listen(db.bind.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    fills = [fill(i) for i in range(2500)]
+
+    ids = await crud.trade.create_many(db, objs_in=fills, user_id=7)
+
+    assert len(set(ids)) == 2500
+    inserts = [s for s in statements if s.startswith("INSERT")]
+    assert 0 < len(inserts) <= 10
+    trades = (await db.execute(select(Trade).filter(Trade.id.in_(ids)).order_by(Trade.id))).scalars().all()
+    assert [t.price for t in trades] == [f.price for f in fills]
+    assert {t.user_id for t in trades} == {7}
+    assert all(t.status == "filled" and t.updated_at is not None for t in trades)
+
+async def test_imported_trades_are_dated_by_execution(db):
+    executed_at = datetime(2023, 3, 4, 15, 30)
+    await crud.trade.create_many(db, objs_in=[fill(0, executed_at=executed_at), fill(1)], user_id=1)
+
+    trades = await crud.trade.get_by_user(db, user_id=1)
+    assert trades[-1].created_at == executed_at
+    assert trades[0].created_at > executed_at
+
+async def test_a_failing_chunk_rolls_back_every_chunk(db):
+    row = fill(0).model_dump() | {"user_id": 1}
+    rows = [row] * 4 + [row | {"symbol": None}] + [row] * 3
+
+    with pytest.raises(IntegrityError):
+        await CRUDBase(Trade).create_many(db, rows=rows, chunk_size=4)
+
+    # Nothing was written, so retrying can't duplicate the first chunk
+    assert await db.scalar(select(func.count()).select_from(Trade)) == 0
+    assert len(await CRUDBase(Trade).create_many(db, rows=[row] * 8, chunk_size=4)) == 8
+
+async def test_accounts_bulk_create_and_ownership(db):
+    accounts = [TradingAccountCreate(broker="alpaca", account_id=f"acct-{i}") for i in range(3)]
+    ids = await crud.trading_account.create_many(db, objs_in=accounts, user_id=5)
+    other = await crud.trading_account.create_many(db, objs_in=accounts[:1], user_id=6)
+
+    assert len(ids) == 3
+    assert len(await crud.trading_account.get_by_user(db, user_id=5)) == 3
+    assert sorted(await crud.trading_account.get_ids_for_user(db, user_id=5, ids=ids + other)) == sorted(ids)
+    assert (await db.get(TradingAccount, other[0])).user_id == 6
@@ -0,0 +1,88 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import crud
+from app.crud.pagination import decode_cursor, encode_cursor
+from app.models import Base, Trade
+
+pytest.importorskip("aiosqlite")
+
+pytestmark = pytest.mark.asyncio
+
+BASE = datetime(2024, 1, 1)
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'trades.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+async def add_trades(db: AsyncSession, n: int):
+    for i in range(n):
+        db.add(Trade(
+            user_id=1 + i % 2,
+            trading_account_id=10 + i % 3,
+            symbol="AAPL" if i % 4 else "MSFT",
+            side="buy",
+            quantity=1,
+            price=100.0,
+            status="filled",
+            type="market",
+            ai_suggested=i % 5 == 0,
+            created_at=BASE + timedelta(minutes=i // 3),  # Three trades per timestamp
+        ))
+    await db.commit()
+
+async def walk(fetch, limit: int):
+    """Every row of a listing, fetched page by page with the keyset cursor"""
+    rows, after = [], None
+    while True:
+        page = await fetch(limit=limit, after=after)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = decode_cursor(encode_cursor(page[-1].created_at, page[-1].id))
+
+async def test_cursor_pages_match_one_big_page(db):
+    await add_trades(db, 100)
+    listings = [
+        lambda **kw: crud.trade.get_by_user(db, user_id=1, **kw),
+        lambda **kw: crud.trade.get_by_account(db, account_id=11, **kw),
+        lambda **kw: crud.trade.get_by_symbol(db, user_id=2, symbol="AAPL", **kw),
+        lambda **kw: crud.trade.get_ai_suggested(db, user_id=1, **kw),
+    ]
+    for fetch in listings:
+        everything = await fetch(limit=1000)
+        assert everything
+        assert [t.id for t in await walk(fetch, limit=7)] == [t.id for t in everything]
+        assert [(t.created_at, t.id) for t in everything] == sorted(
+            ((t.created_at, t.id) for t in everything), reverse=True
+        )
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    for bad in ("", "not-a-cursor", encode_cursor(created_at, 42)[:-3]):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+async def test_queries_use_the_composite_indexes(db):
+    await add_trades(db, 10)
+    queries = {
+        "ix_trades_user_id_created_at": select(Trade).filter(Trade.user_id == 1),
+        "ix_trades_trading_account_id_created_at": select(Trade).filter(Trade.trading_account_id == 10),
+        "ix_trades_user_id_symbol_created_at": select(Trade).filter(Trade.user_id == 1, Trade.symbol == "AAPL"),
+        "ix_trades_user_id_ai_suggested_created_at": select(Trade).filter(Trade.user_id == 1, Trade.ai_suggested == True),
+    }
+    for index, query in queries.items():
+        query = query.order_by(Trade.created_at.desc(), Trade.id.desc()).limit(10)
+        compiled = query.compile(db.bind, compile_kwargs={"literal_binds": True})
+        plan = " ".join(str(row) for row in (await db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all())
+        assert index in plan, plan
+        assert "TEMP B-TREE" not in plan  # Rows come out of the index already ordered
@@ -1,4 +1,7 @@
+import asyncio
 import pytest
+import numpy as np
+import pandas as pd
 from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime, timedelta
 
@@ -6,6 +9,7 @@ from app.services.ai_trading import AITradingService
 
 pytestmark = pytest.mark.asyncio
 
+
 @pytest.fixture
 def mock_openai():
     with patch("openai.chat.completions") as mock_completions:
@@ -34,6 +38,7 @@ def mock_openai():
         mock_completions.create = AsyncMock(return_value=mock_response)
         yield mock_completions
 
+
 @pytest.fixture
 def mock_trading_service():
     with patch("app.services.trading.trading_service") as mock_service:
@@ -48,27 +53,29 @@ def mock_trading_service():
                 "volume": 1000000,
             }
         ])
-        
+
         # Mock get_asset
         mock_service.get_asset = AsyncMock(return_value={
             "symbol": "AAPL",
             "name": "Apple Inc.",
             "exchange": "NASDAQ",
         })
-        
+
         yield mock_service
 
+
 @pytest.fixture
 def ai_trading_service(mock_openai, mock_trading_service):
     return AITradingService("test_key")
 
+
 async def test_analyze_market(ai_trading_service):
     analysis = await ai_trading_service.analyze_market("AAPL")
-    
+
     assert analysis["symbol"] == "AAPL"
     assert "timestamp" in analysis
     assert "current_price" in analysis
-    
+
     result = analysis["analysis"]
     assert "technical_analysis" in result
     assert "market_sentiment" in result
@@ -80,6 +87,7 @@ async def test_analyze_market(ai_trading_service):
     assert result["entry_exit_points"]["exit"] == 165.00
     assert "reasoning" in result
 
+
 async def test_generate_analysis_prompt(ai_trading_service):
     market_data = {
         "symbol": "AAPL",
@@ -97,9 +105,9 @@ async def test_generate_analysis_prompt(ai_trading_service):
             }
         ],
     }
-    
+
     prompt = ai_trading_service._generate_analysis_prompt(market_data)
-    
+
     assert "AAPL" in prompt
     assert "Apple Inc." in prompt
     assert "NASDAQ" in prompt
@@ -112,6 +120,7 @@ async def test_generate_analysis_prompt(ai_trading_service):
     assert "Entry/Exit Points" in prompt
     assert "Reasoning" in prompt
 
+
 async def test_parse_ai_response(ai_trading_service):
     response = """
     Technical Analysis: Bullish trend
@@ -128,9 +137,9 @@ async def test_parse_ai_response(ai_trading_service):
     
     Reasoning: Strong indicators
     """
-    
+
     result = ai_trading_service._parse_ai_response(response)
-    
+
     assert result["technical_analysis"] == "Bullish trend"
     assert result["market_sentiment"] == "Positive"
     assert result["recommendation"] == "buy"
@@ -140,6 +149,7 @@ async def test_parse_ai_response(ai_trading_service):
     assert result["entry_exit_points"]["exit"] == 165.00
     assert result["reasoning"] == "Strong indicators"
 
+
 async def test_format_price_data(ai_trading_service):
     bars = [
         {
@@ -151,12 +161,124 @@ async def test_format_price_data(ai_trading_service):
             "volume": 1000000,
         }
     ]
-    
+
     formatted = ai_trading_service._format_price_data(bars)
-    
+
     assert "2024-02-28T12:00:00" in formatted
     assert "$150.0" in formatted
     assert "$155.0" in formatted
     assert "$149.0" in formatted
     assert "$153.0" in formatted
-    assert "1000000" in formatted 
\ No newline at end of file
+    assert "1000000" in formatted
+
+
+async def test_analyze_market_fetches_bars_and_asset_concurrently(monkeypatch):
+    service = AITradingService("test_key")
+    in_flight = 0
+    peak = 0
+
+    async def fetch(value):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return value
+
+    bars = [{"timestamp": "2024-01-02", "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1}]
+    monkeypatch.setattr("app.services.ai_trading.trading_service.get_bars", lambda *args: fetch(bars))
+    monkeypatch.setattr(
+        "app.services.ai_trading.trading_service.get_asset",
+        lambda symbol: fetch({"name": "Apple Inc.", "exchange": "NASDAQ"}),
+    )
+    service._get_ai_analysis = AsyncMock(return_value="Trading Recommendation: Buy")
+
+    analysis = await service.analyze_market("AAPL")
+
+    assert peak == 2
+    assert analysis["analysis"]["recommendation"] == "buy"
+    assert set(analysis["timings"]) == {"bars", "asset", "indicators", "prompt", "analysis", "llm", "parse", "total"}
+
+    # Same bars again: the analysis is served from cache
+    analysis = await service.analyze_market("AAPL")
+    assert (analysis["cached"], analysis["shared"]) == (True, False)
+    service._get_ai_analysis.assert_awaited_once()
+
+
+async def test_concurrent_identical_analyses_share_one_llm_call(monkeypatch):
+    service = AITradingService("test_key")
+    bars = [{"timestamp": "2024-01-02", "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1}]
+    monkeypatch.setattr("app.services.ai_trading.trading_service.get_bars", AsyncMock(return_value=bars))
+    monkeypatch.setattr(
+        "app.services.ai_trading.trading_service.get_asset",
+        AsyncMock(return_value={"name": "Apple Inc.", "exchange": "NASDAQ"}),
+    )
+
+    async def llm(prompt):
+        await asyncio.sleep(0.02)
+        return "Trading Recommendation: Sell"
+
+    service._get_ai_analysis = AsyncMock(side_effect=llm)
+    results = await asyncio.gather(*(service.analyze_market("AAPL") for _ in range(5)))
+
+    assert service._get_ai_analysis.await_count == 1
+    assert all(r["analysis"]["recommendation"] == "sell" for r in results)
+    # One call ran the analysis and the rest joined it; none was a cache hit
+    assert [(r["cached"], r["shared"]) for r in results] == [(False, False)] + [(False, True)] * 4
+
+    # A new bar changes the fingerprint
+    bars.append({**bars[0], "timestamp": "2024-01-03", "close": 2.0})
+    await service.analyze_market("AAPL")
+    assert service._get_ai_analysis.await_count == 2
+
+
+async def test_analyze_batch_matches_single_symbol_signals(monkeypatch):
+    service = AITradingService("test_key")
+    rng = np.random.default_rng(7)
+    index = pd.date_range("2024-01-01", periods=40, freq="D")
+    panel = pd.DataFrame(
+        {symbol: 100 * np.exp(np.cumsum(rng.normal(0, 0.03, 40))) for symbol in ("AAPL", "MSFT", "TSLA")},
+        index=index,
+    )
+    panel["EMPTY"] = np.nan
+    downloads = []
+
+    async def fetch_panel(symbols, start, end):
+        downloads.append(list(symbols))
+        return panel[symbols]
+
+    async def fetch_history(symbol, start, end):
+        closes = panel[symbol].dropna()
+        return pd.DataFrame({"Close": closes})
+
+    monkeypatch.setattr(service, "_fetch_close_panel", fetch_panel)
+    monkeypatch.setattr(service, "_fetch_historical_data", fetch_history)
+
+    signals = [signal async for signal in service.analyze_batch(["aapl", "MSFT", "TSLA", "EMPTY"])]
+
+    assert downloads == [["AAPL", "MSFT", "TSLA", "EMPTY"]]
+    assert [s.symbol for s in signals] == ["AAPL", "MSFT", "TSLA", "EMPTY"]
+    for signal in signals:
+        expected = await service.analyze_market_data(signal.symbol)
+        assert (signal.signal, signal.confidence) == (expected.signal, expected.confidence)
+        assert signal.indicators.keys() == expected.indicators.keys()
+
+
+async def test_analyze_batch_streams_each_chunk_when_ready(monkeypatch):
+    monkeypatch.setattr("app.services.ai_trading.BATCH_DOWNLOAD_CHUNK", 2)
+    service = AITradingService("test_key")
+    release_slow = asyncio.Event()
+
+    async def fetch_panel(symbols, start, end):
+        if "SLOW" in symbols:
+            await release_slow.wait()
+        return pd.DataFrame(columns=symbols, dtype=float)
+
+    monkeypatch.setattr(service, "_fetch_close_panel", fetch_panel)
+    stream = service.analyze_batch(["SLOW", "A", "B", "C"])
+
+    first = [await stream.__anext__(), await stream.__anext__()]
+    assert [s.symbol for s in first] == ["B", "C"]
+    release_slow.set()
+    rest = [signal async for signal in stream]
+    assert [s.symbol for s in rest] == ["SLOW", "A"]
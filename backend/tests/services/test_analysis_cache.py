@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.analysis_cache import AnalysisCache, fingerprint
+
+pytestmark = pytest.mark.asyncio
+
+async def test_entries_expire_after_ttl():
+    cache = AnalysisCache()
+    compute = AsyncMock(return_value={"recommendation": "buy"})
+
+    await cache.get("key", 60, compute)
+    await cache.get("key", 60, compute)
+    assert compute.await_count == 1
+
+    await cache.get("short", 0, compute)
+    await cache.get("short", 0, compute)
+    assert compute.await_count == 3
+
+async def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache(max_entries=2)
+    compute = AsyncMock(return_value={})
+
+    await cache.get("a", 60, compute)
+    await cache.get("b", 60, compute)
+    await cache.get("a", 60, compute)  # "a" becomes most recent
+    await cache.get("c", 60, compute)
+
+    assert cache.stats()["evictions"] == 1
+    await cache.get("a", 60, compute)
+    assert compute.await_count == 3
+    await cache.get("b", 60, compute)
+    assert compute.await_count == 4
+
+async def test_failures_are_shared_but_not_cached():
+    cache = AnalysisCache()
+    release = asyncio.Event()
+
+    async def fail():
+        await release.wait()
+        raise RuntimeError("rate limited")
+
+    waiters = [asyncio.create_task(cache.get("key", 60, fail)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.stats() == {"hits": 0, "shared": 2, "misses": 1, "evictions": 0, "entries": 0}
+
+def test_fingerprint_depends_on_every_input():
+    bars = [{"close": 1.0}]
+    base = fingerprint(symbol="AAPL", bars=bars, model="m", temperature=0.7)
+    assert base == fingerprint(temperature=0.7, model="m", bars=bars, symbol="AAPL")
+    assert base != fingerprint(symbol="AAPL", bars=bars, model="m", temperature=0.2)
+    assert base != fingerprint(symbol="AAPL", bars=[{"close": 1.1}], model="m", temperature=0.7)
@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.asset_catalog import AssetCatalog
+
+pytestmark = pytest.mark.asyncio
+
+def make_assets(*symbols):
+    return [{"symbol": symbol, "name": f"{symbol} Inc.", "exchange": "NASDAQ"} for symbol in symbols]
+
+async def test_lookups_are_served_from_memory():
+    load = AsyncMock(return_value=make_assets("AAPL", "MSFT"))
+    catalog = AssetCatalog(load)
+    await catalog.load()
+
+    assert catalog.get("aapl")["name"] == "AAPL Inc."
+    assert catalog.get("GOOGL") is None
+    load.assert_awaited_once()
+
+async def test_unloaded_catalog_loads_in_background():
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return make_assets("AAPL")
+
+    catalog = AssetCatalog(load)
+    assert catalog.get("AAPL") is None  # Never waits on the load
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert catalog.get("AAPL")["symbol"] == "AAPL"
+
+async def test_prefix_search():
+    catalog = AssetCatalog(AsyncMock(return_value=make_assets("AA", "AAL", "AAPL", "AMD", "MSFT")))
+    await catalog.load()
+
+    assert [a["symbol"] for a in catalog.search("aa")] == ["AA", "AAL", "AAPL"]
+    assert [a["symbol"] for a in catalog.search("AA", limit=2)] == ["AA", "AAL"]
+    assert catalog.search("Z") == []
+
+    catalog.add(make_assets("AAB")[0])
+    assert [a["symbol"] for a in catalog.search("AA")] == ["AA", "AAB", "AAL", "AAPL"]
+
+async def test_refresh_replaces_the_catalog():
+    load = AsyncMock(side_effect=[make_assets("AAPL"), make_assets("MSFT")])
+    catalog = AssetCatalog(load, refresh_interval=0.01)
+    catalog.start()
+    await asyncio.sleep(0.05)
+    catalog.stop()
+
+    assert catalog.get("AAPL") is None
+    assert catalog.get("MSFT") is not None
@@ -0,0 +1,92 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.services.ai_trading import AITradingService
+from app.services.backtest import run_backtest, signal_arrays, BUY, SELL, HOLD
+from app.services.indicators import indicator_series
+
+def make_price_frame(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame(
+        {"Close": close},
+        index=pd.date_range("2020-01-01", periods=n, freq="D"),
+    )
+
+def legacy_backtest(service: AITradingService, df: pd.DataFrame) -> dict:
+    """The original per-bar loop that recomputes indicators on every prefix."""
+    initial_balance = 100000
+    balance = initial_balance
+    position = 0
+    trades = []
+
+    for i in range(20, len(df)):
+        indicators = service._calculate_indicators(df.iloc[:i+1])
+        signal, _ = service._generate_signal(indicators)
+        current_price = df['Close'].iloc[i]
+
+        if signal == 'BUY' and position == 0:
+            shares = (balance * 0.95) // current_price
+            if shares > 0:
+                position = shares
+                balance -= shares * current_price
+                trades.append({
+                    'date': df.index[i].strftime('%Y-%m-%d'),
+                    'type': 'BUY',
+                    'price': current_price,
+                    'shares': shares,
+                    'balance': balance + (position * current_price)
+                })
+        elif signal == 'SELL' and position > 0:
+            balance += position * current_price
+            trades.append({
+                'date': df.index[i].strftime('%Y-%m-%d'),
+                'type': 'SELL',
+                'price': current_price,
+                'shares': position,
+                'balance': balance
+            })
+            position = 0
+
+    final_balance = balance + (position * df['Close'].iloc[-1])
+    return {
+        'initial_balance': initial_balance,
+        'final_balance': final_balance,
+        'return_pct': ((final_balance - initial_balance) / initial_balance) * 100,
+        'trades': trades
+    }
+
+@pytest.fixture
+def service():
+    return AITradingService("test_key")
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_run_backtest_matches_legacy_loop(service, seed):
+    df = make_price_frame(300, seed)
+
+    expected = legacy_backtest(service, df)
+    result = run_backtest(df, service.prediction_threshold)
+
+    assert result["trades"] == expected["trades"]
+    assert result["final_balance"] == expected["final_balance"]
+    assert result["return_pct"] == expected["return_pct"]
+
+def test_signal_arrays_match_scalar_rules(service):
+    df = make_price_frame(200, 7)
+    frame = indicator_series(df["Close"])
+    signals, confidences = signal_arrays(frame, service.prediction_threshold)
+    codes = {BUY: "BUY", SELL: "SELL", HOLD: "HOLD"}
+
+    for i in range(20, len(df)):
+        signal, confidence = service._generate_signal(frame.iloc[i].to_dict())
+        assert codes[signals[i]] == signal
+        assert confidences[i] == confidence
+
+def test_run_backtest_short_frame_has_no_trades(service):
+    df = make_price_frame(15, 0)
+    result = run_backtest(df, service.prediction_threshold)
+
+    assert result["trades"] == []
+    assert result["final_balance"] == result["initial_balance"]
+    assert result["return_pct"] == 0
@@ -0,0 +1,218 @@
+import asyncio
+import pandas as pd
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.models import BacktestJob, Base
+from app.schemas.trading import BacktestGridRequest
+from app.services import ai_trading, backtest_jobs
+from app.services.backtest_jobs import BacktestJobQueue
+
+pytest.importorskip("aiosqlite")
+
+pytestmark = pytest.mark.asyncio
+
+class FakeBacktest:
+    """Reports half its runs, then waits for ``release`` before finishing."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    async def __call__(self, symbols, grid, days, progress):
+        self.started.set()
+        progress(1, 2)
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        progress(2, 2)
+        return {
+            "symbols": symbols,
+            "skipped": [],
+            "runs": 2,
+            "elapsed": 0.0,
+            "results": [{"symbol": s, "return_pct": 10.0 - i} for i, s in enumerate(symbols)],
+        }
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+def make_queue(sessions, backtest, **kwargs):
+    updates = []
+
+    async def notify(job_id, message):
+        updates.append(message)
+
+    queue = BacktestJobQueue(sessions, progress_interval=0.01, backtest=backtest, notify=notify, **kwargs)
+    return queue, updates
+
+async def load(sessions, job_id) -> BacktestJob:
+    async with sessions() as db:
+        return await db.get(BacktestJob, job_id)
+
+async def wait_for_status(sessions, job_id, status):
+    for _ in range(200):
+        job = await load(sessions, job_id)
+        if job.status == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {job.status}, not {status}")
+
+async def test_job_runs_to_completion(sessions):
+    backtest = FakeBacktest()
+    queue, updates = make_queue(sessions, backtest)
+    async with sessions() as db:
+        job = await queue.submit(db, 1, BacktestGridRequest(symbols=["AAA", "BBB"], limit=1))
+    assert job.status == "queued" and job.total_runs == 2
+
+    running = await wait_for_status(sessions, job.id, "running")
+    await asyncio.sleep(0.05)
+    assert (await load(sessions, job.id)).completed_runs == 1
+    assert running.started_at is not None
+
+    backtest.release.set()
+    done = await wait_for_status(sessions, job.id, "completed")
+    assert done.completed_runs == done.total_runs == 2
+    assert done.result["results"] == [{"symbol": "AAA", "return_pct": 10.0}]
+    assert done.finished_at is not None
+    assert {u["status"] for u in updates} == {"running", "completed"}
+    assert updates[-1]["completed_runs"] == 2
+
+async def test_cancel_stops_running_job(sessions):
+    backtest = FakeBacktest()
+    queue, updates = make_queue(sessions, backtest)
+    async with sessions() as db:
+        job = await queue.submit(db, 1, BacktestGridRequest(symbols=["AAA"]))
+    await backtest.started.wait()
+
+    async with sessions() as db:
+        assert await queue.cancel(db, job)
+        assert not await queue.cancel(db, job)
+    await asyncio.sleep(0.05)
+
+    assert backtest.cancelled
+    assert (await load(sessions, job.id)).status == "cancelled"
+    assert updates[-1]["status"] == "cancelled"
+    assert not queue._tasks
+
+async def test_job_cancelled_by_another_worker_stops(sessions):
+    backtest = FakeBacktest()
+    queue, _ = make_queue(sessions, backtest)
+    async with sessions() as db:
+        job = await queue.submit(db, 1, BacktestGridRequest(symbols=["AAA"]))
+    await backtest.started.wait()
+
+    async with sessions() as db:
+        await db.execute(update(BacktestJob).where(BacktestJob.id == job.id).values(status="cancelled"))
+        await db.commit()
+    await asyncio.sleep(0.05)
+
+    assert backtest.cancelled
+    assert not queue._tasks
+
+async def test_concurrency_limit_queues_jobs(sessions):
+    first, second = FakeBacktest(), FakeBacktest()
+    backtests = iter([first, second])
+    queue, _ = make_queue(sessions, lambda *args: next(backtests)(*args), max_concurrent=1)
+    async with sessions() as db:
+        job1 = await queue.submit(db, 1, BacktestGridRequest(symbols=["AAA"]))
+        job2 = await queue.submit(db, 1, BacktestGridRequest(symbols=["BBB"]))
+
+    await wait_for_status(sessions, job1.id, "running")
+    await asyncio.sleep(0.05)
+    assert (await load(sessions, job2.id)).status == "queued"
+
+    first.release.set()
+    second.release.set()
+    await wait_for_status(sessions, job2.id, "completed")
+
+async def test_failed_job_records_error(sessions):
+    async def broken(symbols, grid, days, progress):
+        raise RuntimeError("no data")
+
+    queue, updates = make_queue(sessions, broken)
+    async with sessions() as db:
+        job = await queue.submit(db, 1, BacktestGridRequest(symbols=["AAA"]))
+
+    failed = await wait_for_status(sessions, job.id, "failed")
+    assert failed.error == "no data"
+    assert updates[-1]["status"] == "failed"
+
+async def test_job_cancelled_while_waiting_for_a_slot_is_recorded(sessions):
+    running = FakeBacktest()
+    queue, updates = make_queue(sessions, running, max_concurrent=1)
+    async with sessions() as db:
+        job1 = await queue.submit(db, 1, BacktestGridRequest(symbols=["AAA"]))
+        job2 = await queue.submit(db, 1, BacktestGridRequest(symbols=["BBB"]))
+    await running.started.wait()
+
+    await queue.shutdown()
+
+    assert (await load(sessions, job1.id)).status == "cancelled"
+    assert (await load(sessions, job2.id)).status == "cancelled"
+    assert {u["job_id"] for u in updates if u["status"] == "cancelled"} == {job1.id, job2.id}
+
+async def test_jobs_of_a_stopped_worker_are_failed(sessions):
+    backtest = FakeBacktest()
+    queue, updates = make_queue(sessions, backtest, stale_after=60)
+    async with sessions() as db:
+        live = await queue.submit(db, 1, BacktestGridRequest(symbols=["AAA"]))
+        # Left queued and running by a worker that stopped heartbeating them
+        orphans = [
+            BacktestJob(id=f"orphan{status}", user_id=1, status=status, params={}, total_runs=4, completed_runs=1,
+                        heartbeat_at=datetime.utcnow() - timedelta(minutes=5))
+            for status in ("queued", "running")
+        ]
+        db.add_all(orphans)
+        await db.commit()
+        await db.execute(
+            update(BacktestJob).where(BacktestJob.id == live.id).values(heartbeat_at=datetime.utcnow() - timedelta(minutes=5))
+        )
+        await db.commit()
+    await backtest.started.wait()
+
+    # This worker's own job is kept alive by its heartbeat
+    await queue.heartbeat()
+    await queue.fail_orphaned()
+
+    for orphan in orphans:
+        job = await load(sessions, orphan.id)
+        assert job.status == "failed" and job.error and job.finished_at is not None
+    assert (await load(sessions, live.id)).status == "running"
+    assert {u["job_id"] for u in updates if u["status"] == "failed"} == {orphan.id for orphan in orphans}
+
+    backtest.release.set()
+    await wait_for_status(sessions, live.id, "completed")
+
+async def test_grid_jobs_run_without_the_ai_trading_service(sessions, monkeypatch):
+    """The grid backtest only needs price history and the runner, not an OpenAI key."""
+    async def daily_history(symbol, start_date, end_date):
+        if symbol == "NONE":
+            return pd.DataFrame()
+        return pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.date_range("2024-01-01", periods=2))
+
+    class Runner:
+        async def run(self, frames, grid, progress):
+            return [{"symbol": s, "return_pct": 1.0} for s, df in frames.items() if not df.empty]
+
+    monkeypatch.setattr(ai_trading, "ai_trading_service", None)
+    monkeypatch.setattr(backtest_jobs, "daily_history", daily_history)
+    monkeypatch.setattr(backtest_jobs, "backtest_runner", Runner())
+    queue, _ = make_queue(sessions, None)
+    async with sessions() as db:
+        job = await queue.submit(db, 1, BacktestGridRequest(symbols=["aaa", "NONE"]))
+
+    done = await wait_for_status(sessions, job.id, "completed")
+    assert (done.result["symbols"], done.result["skipped"]) == (["AAA"], ["NONE"])
+    assert done.result["results"] == [{"symbol": "AAA", "return_pct": 1.0}]
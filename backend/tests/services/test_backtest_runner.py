@@ -0,0 +1,97 @@
+import pytest
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+
+from app.config import settings
+from app.schemas.trading import BacktestGrid, BacktestGridRequest
+from app.services.backtest import run_backtest
+from app.services.backtest_runner import BacktestRunner, expand_grid
+
+pytestmark = pytest.mark.asyncio
+
+def make_price_frame(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame(
+        {"Close": close},
+        index=pd.date_range("2020-01-01", periods=n, freq="D"),
+    )
+
+@pytest.fixture
+def runner():
+    runner = BacktestRunner(max_workers=2)
+    yield runner
+    runner.shutdown()
+
+def test_grid_parameters_are_bounded(monkeypatch):
+    for grid in (
+        {"rsi_period": [14, 1]},
+        {"bb_std": [0.0]},
+        {"threshold": [1.5]},
+        {"macd_fast": [12, 30], "macd_slow": [26]},
+        {"rsi_period": []},
+    ):
+        with pytest.raises(ValidationError):
+            BacktestGrid(**grid)
+
+    request = BacktestGridRequest(symbols=["aapl", "AAPL", "MSFT"], grid={"rsi_period": [7, 14], "bb_std": [1.5, 2.0, 2.5]})
+    assert request.runs() == 2 * 6
+    monkeypatch.setattr(settings, "BACKTEST_MAX_RUNS", 11)
+    with pytest.raises(ValidationError, match="12 runs"):
+        BacktestGridRequest(**request.model_dump())
+
+def test_expand_grid():
+    combos = expand_grid({"threshold": [0.5, 0.6], "rsi_period": [7, 14, 21]})
+
+    assert len(combos) == 6
+    assert combos[0] == {"threshold": 0.5, "rsi_period": 7}
+    assert combos[-1] == {"threshold": 0.6, "rsi_period": 21}
+
+async def test_grid_matches_single_backtests(runner):
+    frames = {
+        "AAA": make_price_frame(300, seed=1),
+        "BBB": make_price_frame(250, seed=2),
+        "CCC": make_price_frame(400, seed=3),
+        "EMPTY": pd.DataFrame(),
+    }
+    grid = {"threshold": [0.5, 0.6], "rsi_period": [7, 14], "bb_std": [1.5, 2.0]}
+
+    rows = await runner.run(frames, grid)
+
+    assert len(rows) == 3 * 8
+    assert {row["symbol"] for row in rows} == {"AAA", "BBB", "CCC"}
+    returns = [row["return_pct"] for row in rows]
+    assert returns == sorted(returns, reverse=True)
+    for row in rows:
+        expected = run_backtest(
+            frames[row["symbol"]],
+            row["threshold"],
+            rsi_period=row["rsi_period"],
+            bb_std=row["bb_std"],
+        )
+        assert row["return_pct"] == expected["return_pct"]
+        assert row["final_balance"] == expected["final_balance"]
+        assert row["trades"] == len(expected["trades"])
+
+async def test_pool_is_reused_across_jobs(runner):
+    frames = {"AAA": make_price_frame(100, seed=1)}
+    first = await runner.run(frames, {"threshold": [0.6]})
+    pool = runner._pool
+    second = await runner.run({"BBB": make_price_frame(100, seed=2), **frames}, {"threshold": [0.6]})
+
+    assert runner._pool is pool
+    assert [row for row in second if row["symbol"] == "AAA"] == first
+
+async def test_nothing_to_run(runner):
+    assert await runner.run({"EMPTY": pd.DataFrame()}, {"threshold": [0.6]}) == []
+    assert runner._pool is None
+
+async def test_progress_is_reported_per_task(runner):
+    frames = {"AAA": make_price_frame(100, seed=1), "BBB": make_price_frame(100, seed=2)}
+    reports = []
+
+    rows = await runner.run(frames, {"threshold": [0.5, 0.6, 0.7]}, lambda done, total: reports.append((done, total)))
+
+    assert reports[-1] == (len(rows), 6)
+    assert [done for done, _ in reports] == sorted(done for done, _ in reports)
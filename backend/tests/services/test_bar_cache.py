@@ -0,0 +1,111 @@
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+from app.services.bar_cache import BarCache
+
+pytestmark = pytest.mark.asyncio
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+class FakeFetcher:
+    """Serves one bar per day from a fixed close series and records calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, start: datetime, end: datetime) -> pd.DataFrame:
+        self.calls.append((start, end))
+        index = pd.date_range(BASE, BASE + timedelta(days=365), freq="D")
+        index = index[(index >= start) & (index < end)]
+        return pd.DataFrame({"Close": [float(ts.dayofyear) for ts in index]}, index=index)
+
+def day(n: int) -> datetime:
+    return BASE + timedelta(days=n)
+
+async def test_sub_range_is_served_from_cache():
+    cache, fetch = BarCache(), FakeFetcher()
+    await cache.get("test", "AAPL", "1d", day(0), day(30), fetch)
+    df = await cache.get("test", "aapl", "1d", day(5), day(10), fetch)
+
+    assert len(fetch.calls) == 1
+    assert list(df["Close"]) == [6.0, 7.0, 8.0, 9.0, 10.0]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+async def test_only_missing_head_and_tail_are_fetched():
+    cache, fetch = BarCache(), FakeFetcher()
+    await cache.get("test", "AAPL", "1d", day(10), day(20), fetch)
+    df = await cache.get("test", "AAPL", "1d", day(5), day(25), fetch)
+
+    assert fetch.calls[1:] == [(day(5), day(10)), (day(20), day(25))]
+    assert len(df) == 20
+    assert df.index.is_monotonic_increasing
+
+    await cache.get("test", "AAPL", "1d", day(5), day(25), fetch)
+    assert len(fetch.calls) == 3
+    assert cache.stats()["partial_hits"] == 1
+
+async def test_keys_are_separated_by_interval_and_source():
+    cache, fetch = BarCache(), FakeFetcher()
+    await cache.get("test", "AAPL", "1d", day(0), day(10), fetch)
+    await cache.get("test", "AAPL", "1h", day(0), day(10), fetch)
+    await cache.get("other", "AAPL", "1d", day(0), day(10), fetch)
+
+    assert len(fetch.calls) == 3
+
+async def test_live_intraday_edge_expires_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.bar_cache.time.monotonic", lambda: clock[0])
+    cache = BarCache(intraday_ttl=60)
+    now = datetime.now(timezone.utc)
+    calls = []
+
+    async def fetch(start, end):
+        calls.append((start, end))
+        index = pd.date_range(now - timedelta(minutes=10), now, freq="min")
+        index = index[(index >= start) & (index < end)]
+        return pd.DataFrame({"Close": range(len(index))}, index=index, dtype=float)
+
+    await cache.get("test", "AAPL", "1m", now - timedelta(minutes=10), now, fetch)
+    clock[0] += 30
+    await cache.get("test", "AAPL", "1m", now - timedelta(minutes=10), datetime.now(timezone.utc), fetch)
+    assert len(calls) == 1
+
+    clock[0] += 60
+    await cache.get("test", "AAPL", "1m", now - timedelta(minutes=10), datetime.now(timezone.utc), fetch)
+    assert len(calls) == 2
+    # Only the still-forming last bar onward is refetched
+    assert calls[1][0] == now - timedelta(minutes=1)
+
+async def test_lru_eviction_under_memory_cap():
+    fetch = FakeFetcher()
+    probe = BarCache()
+    await probe.get("test", "A", "1d", day(0), day(100), fetch)
+    cache = BarCache(max_bytes=int(probe.nbytes * 2.5))
+
+    await cache.get("test", "A", "1d", day(0), day(100), fetch)
+    await cache.get("test", "B", "1d", day(0), day(100), fetch)
+    await cache.get("test", "A", "1d", day(0), day(50), fetch)  # A becomes most recent
+    await cache.get("test", "C", "1d", day(0), day(100), fetch)
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+    assert cache.nbytes <= cache.max_bytes
+    calls = len(fetch.calls)
+    await cache.get("test", "A", "1d", day(0), day(100), fetch)
+    assert len(fetch.calls) == calls
+    await cache.get("test", "B", "1d", day(0), day(100), fetch)
+    assert len(fetch.calls) == calls + 1
+
+async def test_empty_results_are_not_cached():
+    cache = BarCache()
+    calls = []
+
+    async def fetch(start, end):
+        calls.append((start, end))
+        return pd.DataFrame()
+
+    await cache.get("test", "AAPL", "1d", day(0), day(10), fetch)
+    await cache.get("test", "AAPL", "1d", day(0), day(10), fetch)
+    assert len(calls) == 2
@@ -0,0 +1,168 @@
+import asyncio
+import gc
+import multiprocessing
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+from app.services.bar_store import BarStore, interval_delta
+
+pytestmark = pytest.mark.asyncio
+
+BASE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+class FakeFetcher:
+    """Serves one daily bar from a fixed OHLCV series and records calls."""
+
+    def __init__(self, days: int = 365):
+        self.days = days
+        self.calls = []
+
+    async def __call__(self, start: datetime, end: datetime) -> pd.DataFrame:
+        self.calls.append((start, end))
+        index = pd.date_range(BASE, BASE + timedelta(days=self.days), freq="D")
+        index = index[(index >= start) & (index < end)]
+        return pd.DataFrame(
+            {
+                "open": [float(ts.dayofyear) for ts in index],
+                "close": [float(ts.dayofyear) + 0.5 for ts in index],
+                "volume": [1000 + ts.dayofyear for ts in index],
+            },
+            index=index,
+        )
+
+def day(n: int) -> datetime:
+    return BASE + timedelta(days=n)
+
+async def test_stored_range_is_read_without_fetching(tmp_path):
+    store, fetch = BarStore(tmp_path), FakeFetcher()
+    first = await store.get("test", "AAPL", "1d", day(0), day(30), fetch)
+
+    # A new instance reads the same files, as after a restart
+    store = BarStore(tmp_path)
+    df = await store.get("test", "aapl", "1d", day(5), day(10), fetch)
+
+    assert len(fetch.calls) == 1
+    assert list(df["close"]) == [6.5, 7.5, 8.5, 9.5, 10.5]
+    assert df["volume"].dtype.kind == "i"
+    pd.testing.assert_frame_equal(df, first.iloc[5:10])
+    assert store.stats()["hits"] == 1
+
+async def test_only_missing_ranges_are_fetched(tmp_path):
+    store, fetch = BarStore(tmp_path), FakeFetcher()
+    await store.get("test", "AAPL", "1d", day(10), day(20), fetch)
+    await store.get("test", "AAPL", "1d", day(30), day(40), fetch)
+    df = await store.get("test", "AAPL", "1d", day(5), day(45), fetch)
+
+    assert [(s, e) for s, e in fetch.calls[2:]] == [(day(5), day(10)), (day(20), day(30)), (day(40), day(45))]
+    assert len(df) == 40
+    assert df.index.is_monotonic_increasing
+    assert store.coverage("test", "AAPL", "1d") == [(pd.Timestamp(day(5)).value, pd.Timestamp(day(45)).value)]
+
+async def test_empty_fetches_are_not_remembered(tmp_path):
+    """An upstream error or rate limit comes back empty; the range is fetched again next time."""
+    store, fetch = BarStore(tmp_path), FakeFetcher()
+
+    async def failing(start, end):
+        return pd.DataFrame()
+
+    assert (await store.get("test", "AAPL", "1d", day(0), day(10), failing)).empty
+    assert store.missing("test", "AAPL", "1d", day(0), day(10)) == [(day(0), day(10))]
+    assert len(await store.get("test", "AAPL", "1d", day(0), day(10), fetch)) == 10
+
+async def test_still_forming_bar_is_not_stored(tmp_path):
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(minutes=10)
+    # The last bar opened 30s ago, so it is still forming
+    index = pd.date_range(now - timedelta(minutes=9, seconds=30), periods=10, freq="min")
+    store = BarStore(tmp_path)
+
+    async def fetch(fetch_start, fetch_end):
+        bars = index[(index >= fetch_start) & (index < fetch_end)]
+        return pd.DataFrame({"close": range(len(bars))}, index=bars, dtype=float)
+
+    df = await store.get("test", "AAPL", "1m", start, now, fetch)
+    assert len(df) == 10
+
+    stored = store.read("test", "AAPL", "1m", start, now)
+    assert len(stored) == 9
+    # The next request refetches only from the forming bar on
+    gaps = store.missing("test", "AAPL", "1m", start, now)
+    assert len(gaps) == 1 and gaps[0][0] <= pd.Timestamp(index[-1])
+
+async def test_compaction_merges_segments(tmp_path):
+    store, fetch = BarStore(tmp_path, max_segments=100), FakeFetcher()
+    for n in range(0, 50, 10):
+        await store.get("test", "AAPL", "1d", day(n), day(n + 10), fetch)
+    directory = tmp_path / "test" / "1d" / "AAPL"
+    before = store.read("test", "AAPL", "1d", day(0), day(50))
+    assert len(list(directory.glob("seg-*.npy"))) == 5
+
+    assert store.compact("test", "AAPL", "1d") == 5
+    assert len(list(directory.glob("seg-*.npy"))) == 1
+    pd.testing.assert_frame_equal(store.read("test", "AAPL", "1d", day(0), day(50)), before)
+
+async def test_segments_are_compacted_past_the_limit(tmp_path):
+    store, fetch = BarStore(tmp_path, max_segments=3), FakeFetcher()
+    for n in range(0, 40, 10):
+        await store.get("test", "AAPL", "1d", day(n), day(n + 10), fetch)
+
+    assert store.stats()["compactions"] == 1
+    assert len(list((tmp_path / "test" / "1d" / "AAPL").glob("seg-*.npy"))) == 1
+    assert len(store.read("test", "AAPL", "1d", day(0), day(40))) == 40
+
+async def test_bars_keep_the_fetcher_timezone(tmp_path):
+    """Tokyo daily bars open at midnight +09:00, the previous day in UTC; results keep their dates."""
+    index = pd.date_range("2024-01-01", periods=30, freq="D", tz="Asia/Tokyo")
+    calls = []
+
+    async def fetch(start, end):
+        calls.append((start, end))
+        bars = index[(index >= start) & (index < end)]
+        return pd.DataFrame({"close": range(len(bars))}, index=bars, dtype=float)
+
+    start, end = index[0].to_pydatetime(), index[-1].to_pydatetime()
+    fetched = await BarStore(tmp_path).get("test", "7203.T", "1d", start, end, fetch)
+    stored = await BarStore(tmp_path).get("test", "7203.T", "1d", start, end, fetch)
+
+    assert len(calls) == 1
+    for df in (fetched, stored):
+        assert str(df.index.tz) == "Asia/Tokyo"
+        assert list(df.index.date) == list(index[:-1].date)
+
+    # Bars fetched without a timezone come back without one
+    async def naive(start, end):
+        return (await fetch(start, end)).tz_localize(None)
+
+    df = await BarStore(tmp_path).get("test", "NAIVE", "1d", start, end, naive)
+    assert df.index.tz is None and df.index[0] == pd.Timestamp("2024-01-01")
+
+def _append_days(root, days):
+    store = BarStore(root)
+    for n in days:
+        store.append("test", "AAPL", "1d", pd.DataFrame({"close": [1.0]}, index=[day(2 * n)]), day(2 * n), day(2 * n + 1))
+
+def test_coverage_updates_from_several_processes_are_kept(tmp_path):
+    """Disjoint ranges appended concurrently by two processes all end up covered."""
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_append_days, args=(tmp_path, range(k, 100, 2))) for k in (0, 1)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    covered = BarStore(tmp_path).coverage("test", "AAPL", "1d")
+    assert covered == [(pd.Timestamp(day(2 * n)).value, pd.Timestamp(day(2 * n + 1)).value) for n in range(100)]
+
+async def test_key_locks_are_released(tmp_path):
+    store, fetch = BarStore(tmp_path), FakeFetcher()
+    await asyncio.gather(*(store.get("test", symbol, "1d", day(0), day(10), fetch) for symbol in ("AAPL", "MSFT") * 3))
+    gc.collect()
+    assert len(store._locks) == 0
+
+def test_interval_delta():
+    assert interval_delta("1d") == interval_delta("1Day") == pd.Timedelta(days=1)
+    assert interval_delta("15Min") == interval_delta("15m") == pd.Timedelta(minutes=15)
+    assert interval_delta("1Hour") == pd.Timedelta(hours=1)
+    with pytest.raises(ValueError):
+        interval_delta("tick")
@@ -0,0 +1,97 @@
+import asyncio
+import time
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+from app.services.broker import AsyncBroker
+
+pytestmark = pytest.mark.asyncio
+
+def slow_rest(delay: float) -> MagicMock:
+    rest = MagicMock()
+    rest.get_account = MagicMock(side_effect=lambda: time.sleep(delay) or "account")
+    return rest
+
+async def test_slow_call_does_not_block_event_loop():
+    broker = AsyncBroker(slow_rest(0.2))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    assert await broker.call("get_account") == "account"
+    task.cancel()
+
+    assert ticks >= 10
+
+async def test_concurrency_is_bounded():
+    running = 0
+    peak = 0
+
+    def get_account():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        time.sleep(0.02)
+        running -= 1
+
+    rest = MagicMock()
+    rest.get_account = MagicMock(side_effect=get_account)
+    broker = AsyncBroker(rest, max_concurrency=2)
+    await asyncio.gather(*(broker.call("get_account") for _ in range(8)))
+
+    assert peak == 2
+    assert broker.stats()["calls"] == 8
+
+async def test_call_times_out():
+    broker = AsyncBroker(slow_rest(0.2), timeout=0.01)
+
+    with pytest.raises(TimeoutError):
+        await broker.call("get_account")
+    assert broker.stats()["timeouts"] == 1
+
+def test_session_gets_pool_and_default_timeout():
+    session = requests.Session()
+    send = MagicMock()
+    session.request = send
+    rest = MagicMock()
+    rest._session = session
+
+    AsyncBroker(rest, max_concurrency=4, timeout=3.0)
+    session.request("GET", "https://example.test/v2/account")
+
+    assert session.get_adapter("https://example.test")._pool_maxsize == 4
+    send.assert_called_once_with("GET", "https://example.test/v2/account", timeout=3.0)
+
+async def test_order_submission_is_not_abandoned_on_timeout():
+    rest = MagicMock()
+    rest.submit_order = MagicMock(side_effect=lambda **kwargs: time.sleep(0.05) or "order")
+    broker = AsyncBroker(rest, timeout=0.01)
+
+    assert await broker.call("submit_order", symbol="AAPL") == "order"
+    assert broker.stats()["timeouts"] == 0
+
+async def test_lost_order_submission_is_looked_up_by_client_order_id():
+    from app.services.trading import TradingService
+
+    order = MagicMock(id="accepted", client_order_id="trade-1", qty="1", filled_qty=None, filled_avg_price=None)
+    rest = MagicMock()
+    rest.submit_order = MagicMock(side_effect=requests.ConnectionError("connection reset"))
+    rest.get_order_by_client_order_id = MagicMock(return_value=order)
+    service = TradingService(api_key="key", api_secret="secret")
+    service.broker = AsyncBroker(rest)
+
+    placed = await service.place_order("AAPL", 1, "buy", client_order_id="trade-1")
+    assert placed["id"] == "accepted"
+    assert rest.submit_order.call_args.kwargs["client_order_id"] == "trade-1"
+    rest.get_order_by_client_order_id.assert_called_once_with("trade-1")
+
+    # Not accepted either: the original error is reported
+    rest.get_order_by_client_order_id.side_effect = Exception("order not found")
+    with pytest.raises(Exception, match="connection reset"):
+        await service.place_order("AAPL", 1, "buy")
@@ -0,0 +1,58 @@
+import json
+import pytest
+from datetime import datetime
+from pydantic import ValidationError
+
+from app.services.fill_import import fill_format, parse_fills
+
+CSV = b"""\xef\xbb\xbftrading_account_id,symbol,side,quantity,price,type,status,executed_at,ai_confidence
+1,AAPL,buy,10,189.5,market,filled,2024-01-02T14:30:00,
+2,MSFT,sell,5,402.25,limit,,,0.8
+"""
+
+def test_csv_blank_cells_use_defaults():
+    fills = parse_fills(CSV, "csv")
+
+    assert [f.symbol for f in fills] == ["AAPL", "MSFT"]
+    assert fills[0].quantity == 10.0 and fills[0].executed_at == datetime(2024, 1, 2, 14, 30)
+    assert fills[0].ai_confidence is None
+    assert fills[1].status == "filled" and fills[1].executed_at is None
+    assert fills[1].ai_confidence == 0.8
+
+def test_json_matches_csv():
+    rows = [
+        {"trading_account_id": 1, "symbol": "AAPL", "side": "buy", "quantity": 10, "price": 189.5,
+         "type": "market", "status": "filled", "executed_at": "2024-01-02T14:30:00"},
+        {"trading_account_id": 2, "symbol": "MSFT", "side": "sell", "quantity": 5, "price": 402.25,
+         "type": "limit", "ai_confidence": 0.8},
+    ]
+    assert parse_fills(json.dumps(rows).encode(), "json") == parse_fills(CSV, "csv")
+    assert parse_fills(b"", "json") == []
+
+def test_bad_rows_are_reported_with_their_index():
+    data = CSV + b"1,AAPL,hold,10,189.5,market,filled,,\n"
+    with pytest.raises(ValidationError) as info:
+        parse_fills(data, "csv")
+    assert [error["loc"][:2] for error in info.value.errors()] == [(2, "side")]
+
+def test_unreadable_or_oversized_exports_are_rejected():
+    for data, fmt in ((b"{not json", "json"), (b'{"fills": []}', "json"), (CSV, "xml")):
+        with pytest.raises(ValueError):
+            parse_fills(data, fmt)
+    with pytest.raises(ValueError, match="Too many fills"):
+        parse_fills(CSV, "csv", max_rows=1)
+
+def test_fill_format():
+    assert fill_format("fills.CSV") == "csv"
+    assert fill_format("export", "application/json") == "json"
+    with pytest.raises(ValueError):
+        fill_format("fills.xlsx", "application/octet-stream")
+
+def test_exports_are_read_from_a_file(tmp_path):
+    path = tmp_path / "fills.csv"
+    path.write_bytes(CSV)
+    with open(path, "rb") as f:
+        assert parse_fills(f, "csv") == parse_fills(CSV, "csv")
+        assert not f.closed
+    with pytest.raises(ValueError, match="not UTF-8"):
+        parse_fills(b"\xff\xfe", "csv")
@@ -0,0 +1,72 @@
+import math
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.services.indicators import IndicatorState, indicator_series, latest_indicators, panel_indicators
+
+def make_closes(n: int, seed: int = 0, start: float = 100.0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.Series(close, index=pd.date_range("2024-01-01", periods=n, freq="D"))
+
+def assert_indicators_equal(actual: dict, expected: dict):
+    assert actual.keys() == expected.keys()
+    for name, value in expected.items():
+        if math.isnan(value):
+            assert math.isnan(actual[name]), name
+        else:
+            assert actual[name] == pytest.approx(value, rel=1e-9, abs=1e-9), name
+
+@pytest.mark.parametrize("start", [1.0, 100.0, 50000.0])
+def test_indicator_state_matches_pandas_every_bar(start):
+    closes = make_closes(300, seed=3, start=start)
+    frame = indicator_series(closes)
+    state = IndicatorState()
+
+    for i, (key, close) in enumerate(closes.items()):
+        values = state.update(float(close), key=key)
+        assert_indicators_equal(values, latest_indicators(frame.iloc[:i+1]))
+
+def test_indicator_state_revises_forming_bar():
+    closes = make_closes(60, seed=5)
+    state = IndicatorState.from_history(closes)
+
+    # Ticks within the last bar replace it rather than appending new bars
+    last_key = closes.index[-1]
+    for price in (101.0, 99.5, 102.25):
+        values = state.update(price, key=last_key)
+
+    revised = closes.copy()
+    revised.iloc[-1] = 102.25
+    assert state.bars == len(closes)
+    assert_indicators_equal(values, latest_indicators(indicator_series(revised)))
+
+def test_indicator_state_flat_prices():
+    closes = pd.Series([10.0] * 30)
+    values = IndicatorState.from_history(closes).values()
+    expected = latest_indicators(indicator_series(closes))
+
+    assert math.isnan(values["rsi"]) and math.isnan(expected["rsi"])
+    assert values["bb_upper"] == values["bb_lower"] == expected["bb_middle"] == 10.0
+
+def test_indicator_state_does_not_drift_on_long_streams():
+    closes = make_closes(20000, seed=11)
+    state = IndicatorState.from_history(closes)
+
+    assert_indicators_equal(state.values(), latest_indicators(indicator_series(closes)))
+
+def test_panel_matches_each_symbol_alone():
+    panel = pd.DataFrame({f"S{i}": make_closes(60, seed=i) for i in range(6)})
+    panel.iloc[:30, 1] = np.nan  # Listed late
+    panel.iloc[[10, 20, 40], 2] = np.nan  # Gaps
+    panel.iloc[-1, 3] = np.nan  # No bar today
+    panel.iloc[:-5, 4] = np.nan  # Too short for RSI
+    panel.iloc[:, 5] = np.nan  # No data at all
+
+    latest = panel_indicators(panel)
+
+    assert list(latest.index) == ["S0", "S1", "S2", "S3", "S4"]
+    for symbol in latest.index:
+        expected = latest_indicators(indicator_series(panel[symbol].dropna()))
+        assert_indicators_equal(latest.loc[symbol].to_dict(), expected)
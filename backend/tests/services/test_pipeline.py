@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+
+from app.services.pipeline import StageGraph
+
+pytestmark = pytest.mark.asyncio
+
+async def test_independent_stages_run_concurrently():
+    running = set()
+    overlapped = []
+
+    async def fetch(name):
+        running.add(name)
+        await asyncio.sleep(0.02)
+        overlapped.append(set(running))
+        running.discard(name)
+        return name
+
+    graph = (
+        StageGraph()
+        .stage("bars", lambda: fetch("bars"))
+        .stage("asset", lambda: fetch("asset"))
+        .stage("prompt", lambda bars, asset: f"{bars}+{asset}", "bars", "asset")
+    )
+    results, timings = await graph.run()
+
+    assert results["prompt"] == "bars+asset"
+    assert {"bars", "asset"} in overlapped
+    assert set(timings) == {"bars", "asset", "prompt"}
+    assert timings["bars"] >= 0.02
+
+async def test_stage_failure_cancels_the_graph():
+    started = []
+
+    async def slow():
+        started.append("slow")
+        await asyncio.sleep(10)
+
+    def broken():
+        raise ValueError("no bars")
+
+    graph = (
+        StageGraph()
+        .stage("bars", broken)
+        .stage("asset", slow)
+        .stage("prompt", lambda bars, asset: None, "bars", "asset")
+    )
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(graph.run(), timeout=1)
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError):
+        StageGraph().stage("prompt", lambda bars: None, "bars")
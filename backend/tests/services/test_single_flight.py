@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from app.services.single_flight import SingleFlight, single_flight, to_second
+from app.services.trading import TradingService
+
+pytestmark = pytest.mark.asyncio
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "bars"
+
+    results = await asyncio.gather(*(flight.do("AAPL", fetch) for _ in range(10)))
+
+    assert results == ["bars"] * 10
+    assert calls == 1
+    assert flight.stats()["dedup_ratio"] == 0.9
+
+    # Once finished, the next call goes upstream again
+    await flight.do("AAPL", fetch)
+    assert calls == 2
+
+async def test_errors_reach_every_waiter():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(*(flight.do("AAPL", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "bars"
+
+    first = asyncio.create_task(flight.do("AAPL", fetch))
+    second = asyncio.create_task(flight.do("AAPL", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "bars"
+
+async def test_decorator_keys_on_arguments():
+    calls = []
+
+    @single_flight("test.decorated")
+    async def fetch(symbol, interval="1d"):
+        calls.append((symbol, interval))
+        await asyncio.sleep(0.01)
+        return symbol
+
+    await asyncio.gather(fetch("AAPL"), fetch("AAPL"), fetch("MSFT"), fetch("AAPL", interval="1h"))
+    assert sorted(calls) == [("AAPL", "1d"), ("AAPL", "1h"), ("MSFT", "1d")]
+
+async def test_burst_of_bar_requests_makes_one_upstream_call():
+    service = TradingService()
+    service.api = MagicMock()
+    bar = MagicMock(t=datetime(2024, 1, 2), o=1.0, h=1.0, l=1.0, c=1.0, v=1)
+    calls = 0
+
+    async def call(method, *args, **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [bar]
+
+    service.broker = MagicMock()
+    service.broker.call = call
+    end = datetime.now()
+    results = await asyncio.gather(*(
+        service.get_bars("AAPL", "1D", start=None, end=end.replace(microsecond=i)) for i in range(50)
+    ))
+
+    assert calls == 1
+    assert all(len(bars) == 1 for bars in results)
+
+def test_to_second_drops_microseconds():
+    assert to_second(datetime(2024, 1, 2, 3, 4, 5, 678)) == datetime(2024, 1, 2, 3, 4, 5)
+    assert to_second(None) is None
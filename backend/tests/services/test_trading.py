@@ -6,6 +6,7 @@ from app.services.trading import TradingService
 
 pytestmark = pytest.mark.asyncio
 
+
 @pytest.fixture
 def mock_alpaca_api():
     with patch("alpaca_trade_api.REST") as mock_rest:
@@ -21,7 +22,7 @@ def mock_alpaca_api():
         mock_account.trading_blocked = False
         mock_account.transfers_blocked = False
         mock_rest.return_value.get_account = MagicMock(return_value=mock_account)
-        
+
         # Mock positions
         mock_position = MagicMock()
         mock_position.symbol = "AAPL"
@@ -31,7 +32,7 @@ def mock_alpaca_api():
         mock_position.unrealized_pl = "100.00"
         mock_position.current_price = "160.00"
         mock_rest.return_value.list_positions = MagicMock(return_value=[mock_position])
-        
+
         # Mock order
         mock_order = MagicMock()
         mock_order.id = "test_order"
@@ -46,7 +47,7 @@ def mock_alpaca_api():
         mock_order.created_at = datetime.now()
         mock_rest.return_value.submit_order = MagicMock(return_value=mock_order)
         mock_rest.return_value.get_order = MagicMock(return_value=mock_order)
-        
+
         # Mock bars
         mock_bars = MagicMock()
         mock_bars.df = MagicMock()
@@ -60,7 +61,7 @@ def mock_alpaca_api():
             })
         ])
         mock_rest.return_value.get_bars = MagicMock(return_value=mock_bars)
-        
+
         # Mock asset
         mock_asset = MagicMock()
         mock_asset.id = "test_asset"
@@ -73,13 +74,15 @@ def mock_alpaca_api():
         mock_asset.easy_to_borrow = True
         mock_asset.fractionable = True
         mock_rest.return_value.get_asset = MagicMock(return_value=mock_asset)
-        
+
         yield mock_rest.return_value
 
+
 @pytest.fixture
 def trading_service(mock_alpaca_api):
     return TradingService("test_key", "test_secret", paper=True)
 
+
 async def test_get_account_info(trading_service):
     account_info = await trading_service.get_account_info()
     assert account_info["id"] == "test_account"
@@ -88,6 +91,7 @@ async def test_get_account_info(trading_service):
     assert account_info["currency"] == "USD"
     assert account_info["status"] == "ACTIVE"
 
+
 async def test_get_positions(trading_service):
     positions = await trading_service.get_positions()
     assert len(positions) == 1
@@ -100,6 +104,7 @@ async def test_get_positions(trading_service):
     assert position["current_price"] == 160.00
     assert position["side"] == "long"
 
+
 async def test_place_order(trading_service):
     order = await trading_service.place_order(
         symbol="AAPL",
@@ -116,6 +121,7 @@ async def test_place_order(trading_service):
     assert order["filled_qty"] == 10.0
     assert order["filled_avg_price"] == 150.00
 
+
 async def test_get_order_status(trading_service):
     status = await trading_service.get_order_status("test_order")
     assert status["id"] == "test_order"
@@ -123,6 +129,7 @@ async def test_get_order_status(trading_service):
     assert status["filled_qty"] == 10.0
     assert status["filled_avg_price"] == 150.00
 
+
 async def test_get_bars(trading_service):
     bars = await trading_service.get_bars(
         symbol="AAPL",
@@ -139,6 +146,7 @@ async def test_get_bars(trading_service):
     assert bar["close"] == 153.0
     assert bar["volume"] == 1000000
 
+
 async def test_get_asset(trading_service):
     asset = await trading_service.get_asset("AAPL")
     assert asset["id"] == "test_asset"
@@ -149,4 +157,48 @@ async def test_get_asset(trading_service):
     assert asset["marginable"] is True
     assert asset["shortable"] is True
     assert asset["easy_to_borrow"] is True
-    assert asset["fractionable"] is True 
\ No newline at end of file
+    assert asset["fractionable"] is True
+
+
+def latest_trades(symbols):
+    trades = {}
+    for i, symbol in enumerate(symbols):
+        trade = MagicMock()
+        trade.p = 100.0 + i
+        trade.t = datetime(2024, 1, 2, 15, 30)
+        trades[symbol] = trade
+    return trades
+
+
+async def test_get_quotes_batches_upstream_calls(trading_service, mock_alpaca_api):
+    mock_alpaca_api.get_latest_trades = MagicMock(side_effect=latest_trades)
+    symbols = [f"SYM{i}" for i in range(250)]
+
+    quotes = await trading_service.get_quotes(symbols)
+
+    assert len(quotes) == 250
+    assert mock_alpaca_api.get_latest_trades.call_count == 2
+    assert quotes["SYM0"]["price"] == 100.0
+
+
+async def test_get_quotes_serves_fresh_prices_from_cache(trading_service, mock_alpaca_api):
+    mock_alpaca_api.get_latest_trades = MagicMock(side_effect=latest_trades)
+
+    await trading_service.get_quotes(["AAPL", "MSFT"])
+    quotes = await trading_service.get_quotes(["aapl", "MSFT", "GOOGL"])
+
+    assert set(quotes) == {"AAPL", "MSFT", "GOOGL"}
+    assert [call.args[0] for call in mock_alpaca_api.get_latest_trades.call_args_list] == [
+        ["AAPL", "MSFT"], ["GOOGL"],
+    ]
+    assert trading_service.quote_stats()["hits"] == 2
+
+
+async def test_get_quotes_refetches_after_ttl(trading_service, mock_alpaca_api):
+    mock_alpaca_api.get_latest_trades = MagicMock(side_effect=latest_trades)
+    trading_service.quote_ttl = 0
+
+    await trading_service.get_quotes(["AAPL"])
+    await trading_service.get_quotes(["AAPL"])
+
+    assert mock_alpaca_api.get_latest_trades.call_count == 2
@@ -0,0 +1,164 @@
+import asyncio
+import importlib
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app import crud
+from app.api.v1.endpoints import users
+from app.core import deps
+from app.core.security import create_access_token
+from app.database import SessionRouter
+from app.models import Base, User
+from app.services.user_cache import UserCache
+
+user_crud = importlib.import_module("app.crud.user")  # The module; app.crud.user is the CRUD instance
+
+pytest.importorskip("aiosqlite")
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def user_cache(monkeypatch):
+    """A fresh cache in place of the global one used by get_current_user and crud.user"""
+    cache = UserCache(ttl=60)
+    monkeypatch.setattr(deps, "user_cache", cache)
+    monkeypatch.setattr(user_crud, "user_cache", cache)
+    return cache
+
+@pytest_asyncio.fixture
+async def sessions(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        db.add(User(id=1, email="user@example.com", username="user", hashed_password="x"))
+        await db.commit()
+    yield factory
+    await engine.dispose()
+
+def count_queries(factory) -> list:
+    statements = []
+    event.listen(factory.kw["bind"].sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+async def test_cached_users_skip_the_database(sessions):
+    cache, queries = UserCache(ttl=60), count_queries(sessions)
+    async with sessions() as db:
+        first = await cache.get(1, lambda: crud.user.get(db, id=1))
+    async with sessions() as db:
+        second = await cache.get(1, lambda: crud.user.get(db, id=1))
+
+    assert len(queries) == 1
+    assert second is not first  # Each request gets its own instance
+    assert (second.id, second.username, second.is_active) == (1, "user", True)
+    assert cache.stats()["db_lookups_saved_per_request"] == 0.5
+
+async def test_entries_expire(sessions):
+    cache = UserCache(ttl=0.05)
+    async with sessions() as db:
+        await cache.get(1, lambda: crud.user.get(db, id=1))
+        await asyncio.sleep(0.06)
+        await cache.get(1, lambda: crud.user.get(db, id=1))
+    assert cache.stats()["misses"] == 2
+
+async def test_update_invalidates_the_cached_user(sessions, user_cache):
+    token = create_access_token(1)
+    async with sessions() as db:
+        user = await deps.get_current_user(db, token)
+        assert user.is_active
+        await crud.user.update(db, db_obj=await db.merge(user), obj_in={"is_active": False})
+
+    async with sessions() as db:
+        user = await deps.get_current_user(db, token)
+    assert not user.is_active
+    assert user_cache.stats()["invalidations"] == 1
+
+async def test_record_invalidated_while_loading_is_not_cached(sessions):
+    cache = UserCache(ttl=60)
+
+    async def slow_load():
+        async with sessions() as db:
+            user = await crud.user.get(db, id=1)
+        cache.invalidate(1)  # Updated after this lookup read it
+        return user
+
+    await cache.get(1, slow_load)
+    assert cache.stats()["entries"] == 0
+
+async def test_authenticated_requests_under_load(sessions, user_cache):
+    """Database round trips per request for the user lookup of 500 concurrent requests."""
+    queries = count_queries(sessions)
+    token = create_access_token(1)
+
+    async def request():
+        async with sessions() as db:
+            return await deps.get_current_user(db, token)
+
+    # Warm the cache, then measure
+    await request()
+    queries.clear()
+    users = await asyncio.gather(*(request() for _ in range(500)))
+
+    assert {user.id for user in users} == {1}
+    assert len(queries) == 0
+    assert user_cache.stats()["db_lookups_saved_per_request"] == 500 / 501
+
+async def test_cache_misses_are_loaded_from_the_primary(sessions, user_cache, tmp_path, monkeypatch):
+    """A replica that hasn't replayed a deactivation must not put the stale user back in the cache."""
+    replica_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    async with replica_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    replica = async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    async with replica() as db:
+        db.add(User(id=1, email="user@example.com", username="user", hashed_password="x"))
+        await db.commit()
+
+    async def caught_up(session_factory) -> float:
+        return 0.0
+
+    monkeypatch.setattr(deps, "session_router", SessionRouter(sessions, replica, check_interval=0, lag_probe=caught_up))
+    app = FastAPI()
+
+    @app.get("/me")
+    async def read_me(user: User = Depends(deps.get_current_user)):
+        return {"is_active": user.is_active}
+
+    headers = {"Authorization": f"Bearer {create_access_token(1)}"}
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/me", headers=headers)).json() == {"is_active": True}
+            async with sessions() as db:
+                user = await crud.user.get(db, id=1)
+                await crud.user.update(db, db_obj=user, obj_in={"is_active": False})
+
+            # The replica still has the active row
+            assert (await client.get("/me", headers=headers)).json() == {"is_active": False}
+    finally:
+        await replica_engine.dispose()
+
+async def test_updating_yourself_keeps_changes_made_since_you_were_cached(sessions, user_cache, monkeypatch):
+    """A deactivation by an admin isn't undone by the cached user's own profile update."""
+    monkeypatch.setattr(deps, "session_router", SessionRouter(sessions))
+    app = FastAPI()
+    app.include_router(users.router, prefix="/users")
+    headers = {"Authorization": f"Bearer {create_access_token(1)}"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/users/me/", headers=headers)).status_code == 200  # Now cached
+        async with sessions() as db:
+            # Another worker: its invalidation doesn't reach this process's cache
+            await db.execute(User.__table__.update().values(is_active=False, is_superuser=True, hashed_password="changed"))
+            await db.commit()
+
+        response = await client.put("/users/me/", headers=headers, json={"username": "renamed"})
+    assert response.status_code == 200
+
+    async with sessions() as db:
+        user = await crud.user.get(db, id=1)
+    assert (user.username, user.is_active, user.is_superuser, user.hashed_password) == ("renamed", False, True, "changed")
+    assert user_cache.stats()["entries"] == 0
@@ -0,0 +1,492 @@
+import asyncio
+import json
+import pytest
+import pandas as pd
+from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime
+
+from app.schemas.trading import MarketData
+from app.services.backplane import Backplane, InProcessBackplane, InProcessHub
+from app.services.websocket import WebSocketManager, diff_fields, encode_message
+
+pytestmark = pytest.mark.asyncio
+
+def make_bar(price: float) -> pd.Series:
+    return pd.Series(
+        {"Open": price, "High": price, "Low": price, "Close": price, "Volume": 1000.0},
+        name=pd.Timestamp("2024-02-28 12:00", tz="America/New_York"),
+    )
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr("app.services.websocket.ai_trading_service", None)
+    manager = WebSocketManager()
+    manager.broadcast_market_data = AsyncMock()
+    return manager
+
+@pytest.fixture
+def router():
+    manager = WebSocketManager()
+    manager.ensure_market_data_stream = MagicMock()
+    return manager
+
+def make_socket():
+    websocket = MagicMock()
+    websocket.accept = AsyncMock()
+    websocket.send_json = AsyncMock()
+    websocket.send_text = AsyncMock()
+    websocket.close = AsyncMock()
+    return websocket
+
+async def stall(*args):
+    """A send that never completes, like a half-dead client."""
+    await asyncio.Event().wait()
+
+async def settle():
+    """Let the per-client writer tasks drain their queues."""
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+def make_market_data(symbol: str) -> MarketData:
+    return MarketData(
+        symbol=symbol, price=100.0, volume=1000.0, timestamp=datetime.now(),
+        high=101.0, low=99.0, open=100.0,
+    )
+
+async def test_slow_symbol_does_not_delay_others(manager):
+    slow_started = asyncio.Event()
+    release_slow = asyncio.Event()
+
+    async def fetch(symbol):
+        if symbol == "SLOW":
+            slow_started.set()
+            await release_slow.wait()
+        return make_bar(100.0)
+
+    manager._fetch_latest_bar = fetch
+    manager.subscriptions = {"SLOW": set(), "AAPL": set(), "MSFT": set()}
+    manager._schedule_tick()
+    await slow_started.wait()
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    sent = {call.args[0].symbol for call in manager.broadcast_market_data.await_args_list}
+    assert sent == {"AAPL", "MSFT"}
+
+    release_slow.set()
+    await asyncio.gather(*manager._in_flight.values())
+    assert manager.broadcast_market_data.await_count == 3
+
+async def test_fetch_concurrency_is_bounded(manager):
+    manager._fetch_slots = asyncio.Semaphore(2)
+    running = 0
+    peak = 0
+
+    async def fetch(symbol):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return make_bar(100.0)
+
+    manager._fetch_latest_bar = fetch
+    manager.subscriptions = {f"SYM{i}": set() for i in range(10)}
+    manager._schedule_tick()
+    await asyncio.gather(*manager._in_flight.values())
+
+    assert peak == 2
+    assert manager.broadcast_market_data.await_count == 10
+
+async def test_in_flight_symbol_is_not_rescheduled(manager):
+    release = asyncio.Event()
+    calls = []
+
+    async def fetch(symbol):
+        calls.append(symbol)
+        await release.wait()
+        return make_bar(100.0)
+
+    manager._fetch_latest_bar = fetch
+    manager.subscriptions = {"AAPL": set()}
+    manager._schedule_tick()
+    await asyncio.sleep(0)
+    manager._schedule_tick()
+    await asyncio.sleep(0)
+
+    assert calls == ["AAPL"]
+    release.set()
+    await asyncio.gather(*manager._in_flight.values())
+    assert not manager._in_flight
+
+async def test_fetch_errors_are_isolated_per_symbol(manager):
+    async def fetch(symbol):
+        if symbol == "BAD":
+            raise ValueError("upstream error")
+        return make_bar(100.0)
+
+    manager._fetch_latest_bar = fetch
+    manager.subscriptions = {"BAD": set(), "AAPL": set()}
+    manager._schedule_tick()
+    await asyncio.gather(*manager._in_flight.values())
+
+    sent = [call.args[0].symbol for call in manager.broadcast_market_data.await_args_list]
+    assert sent == ["AAPL"]
+
+async def test_market_data_only_reaches_subscribers(router):
+    aapl, msft = make_socket(), make_socket()
+    await router.connect(aapl, "client1")
+    await router.connect(msft, "client2")
+    router.subscribe(aapl, ["aapl"])
+    router.subscribe(msft, ["MSFT"])
+
+    await router.broadcast_market_data(make_market_data("AAPL"))
+    await settle()
+
+    aapl.send_text.assert_awaited_once()
+    message = json.loads(aapl.send_text.await_args.args[0])
+    assert message["type"] == "market_data"
+    assert message["symbol"] == "AAPL"
+    assert message["data"]["price"] == 100.0
+    msft.send_text.assert_not_awaited()
+    router.ensure_market_data_stream.assert_called()
+
+async def test_symbol_without_subscribers_is_not_polled(router):
+    first, second = make_socket(), make_socket()
+    await router.connect(first, "client1")
+    await router.connect(second, "client2")
+    router.subscribe(first, ["AAPL", "MSFT"])
+    router.subscribe(second, ["AAPL"])
+    assert router.symbols == {"AAPL", "MSFT"}
+
+    router.unsubscribe(first, ["MSFT"])
+    assert router.symbols == {"AAPL"}
+
+    router.disconnect(first, "client1")
+    assert router.symbols == {"AAPL"}
+    router.disconnect(second, "client2")
+    assert router.symbols == set()
+    assert router.active_connections == {}
+    assert router.socket_symbols == {}
+
+async def test_failed_socket_is_dropped(router):
+    broken = make_socket()
+    broken.send_text.side_effect = RuntimeError("closed")
+    await router.connect(broken, "client1")
+    router.subscribe(broken, ["AAPL"])
+
+    await router.broadcast_market_data(make_market_data("AAPL"))
+    await settle()
+
+    assert router.subscriptions == {}
+    assert router.active_connections == {}
+
+async def test_market_data_is_encoded_once_per_tick(router, monkeypatch):
+    sockets = [make_socket() for _ in range(5)]
+    for i, websocket in enumerate(sockets):
+        await router.connect(websocket, f"client{i}")
+        router.subscribe(websocket, ["AAPL"])
+    encode = MagicMock(wraps=encode_message)
+    monkeypatch.setattr("app.services.websocket.encode_message", encode)
+
+    await router.broadcast_market_data(make_market_data("AAPL"))
+    await settle()
+
+    encode.assert_called_once()
+    payloads = {websocket.send_text.await_args.args[0] for websocket in sockets}
+    assert len(payloads) == 1
+    assert json.loads(payloads.pop())["symbol"] == "AAPL"
+
+def test_non_finite_numbers_are_encoded_as_null():
+    payload = encode_message({"price": 1.5, "indicators": {"rsi": float("nan"), "bands": [float("inf"), 2.0]}})
+    assert json.loads(payload, parse_constant=pytest.fail) == {"price": 1.5, "indicators": {"rsi": None, "bands": [None, 2.0]}}
+
+async def test_slow_client_does_not_block_others(router):
+    stalled, healthy = make_socket(), make_socket()
+    stalled.send_text = AsyncMock(side_effect=stall)
+    await router.connect(stalled, "stalled")
+    await router.connect(healthy, "healthy")
+    router.subscribe(stalled, ["AAPL"])
+    router.subscribe(healthy, ["AAPL"])
+
+    for _ in range(3):
+        await router.broadcast_market_data(make_market_data("AAPL"))
+        await settle()
+
+    assert healthy.send_text.await_count == 3
+
+async def test_stale_ticks_are_coalesced_per_symbol(router):
+    release = asyncio.Event()
+    received = []
+
+    async def send_text(payload):
+        await release.wait()
+        received.append(json.loads(payload))
+
+    websocket = make_socket()
+    websocket.send_text = send_text
+    await router.connect(websocket, "client1")
+    router.subscribe(websocket, ["AAPL", "MSFT"])
+
+    await router.broadcast_market_data(make_market_data("AAPL"))
+    await settle()  # First tick is now in flight
+    for price in (101.0, 102.0, 103.0):
+        market_data = make_market_data("AAPL")
+        market_data.price = price
+        await router.broadcast_market_data(market_data)
+    await router.broadcast_market_data(make_market_data("MSFT"))
+
+    release.set()
+    await settle()
+
+    assert [(m["symbol"], m["data"]["price"]) for m in received] == [
+        ("AAPL", 100.0), ("AAPL", 103.0), ("MSFT", 100.0),
+    ]
+    assert router.client_stats()["client1"]["coalesced"] == 2
+
+async def test_queue_is_bounded_and_drops_are_counted(router):
+    websocket = make_socket()
+    websocket.send_text = AsyncMock(side_effect=stall)
+    await router.connect(websocket, "client1")
+    channel = router.channels[websocket]
+    channel.max_queue = 3
+
+    await router.broadcast({"type": "notice", "n": 0})
+    await settle()  # First message is now stuck in flight
+    for i in range(1, 10):
+        await router.broadcast({"type": "notice", "n": i})
+
+    stats = router.client_stats()["client1"]
+    assert stats["queued"] == 3
+    assert stats["dropped"] == 6
+
+async def test_client_over_limit_is_disconnected(router):
+    websocket = make_socket()
+    websocket.send_text = AsyncMock(side_effect=stall)
+    await router.connect(websocket, "client1")
+    router.subscribe(websocket, ["AAPL"])
+    channel = router.channels[websocket]
+    channel.max_queue = 1
+    channel.slow_client_timeout = 0
+
+    for i in range(4):
+        await router.broadcast({"type": "notice", "n": i})
+    await settle()
+
+    assert websocket not in router.channels
+    assert router.subscriptions == {}
+    websocket.close.assert_awaited_once()
+
+async def test_stalled_send_times_out(router):
+    websocket = make_socket()
+    websocket.send_text = AsyncMock(side_effect=stall)
+    await router.connect(websocket, "client1")
+    router.channels[websocket].send_timeout = 0.01
+
+    await router.broadcast({"type": "notice"})
+    await asyncio.sleep(0.05)
+
+    assert router.active_connections == {}
+
+async def test_throttled_client_receives_latest_value_batches(router):
+    throttled, live = make_socket(), make_socket()
+    await router.connect(throttled, "throttled")
+    await router.connect(live, "live")
+    router.subscribe(throttled, ["AAPL", "MSFT"], throttle_ms=50)
+    router.subscribe(live, ["AAPL"])
+
+    for price in (101.0, 102.0, 103.0):
+        market_data = make_market_data("AAPL")
+        market_data.price = price
+        await router.broadcast_market_data(market_data)
+        await settle()
+    await router.broadcast_market_data(make_market_data("MSFT"))
+    await settle()
+
+    throttled.send_text.assert_not_awaited()
+    assert live.send_text.await_count == 3
+
+    await asyncio.sleep(0.08)
+    throttled.send_text.assert_awaited_once()
+    frame = json.loads(throttled.send_text.await_args.args[0])
+    assert frame["type"] == "market_data_batch"
+    assert {u["symbol"]: u["data"]["price"] for u in frame["updates"]} == {"AAPL": 103.0, "MSFT": 100.0}
+    assert all(u["type"] == "market_data" for u in frame["updates"])
+    assert router.client_stats()["throttled"]["coalesced"] == 2
+
+    # Nothing new arrived, so no empty frame is sent
+    await asyncio.sleep(0.08)
+    throttled.send_text.assert_awaited_once()
+
+async def test_throttle_can_be_switched_off(router):
+    websocket = make_socket()
+    await router.connect(websocket, "client1")
+    router.subscribe(websocket, ["AAPL"], throttle_ms=1000)
+    await router.broadcast_market_data(make_market_data("AAPL"))
+
+    router.subscribe(websocket, [], throttle_ms=0)
+    await settle()
+
+    message = json.loads(websocket.send_text.await_args.args[0])
+    assert message["type"] == "market_data"
+
+async def test_invalid_throttle_is_rejected(router):
+    websocket = make_socket()
+    await router.connect(websocket, "client1")
+
+    with pytest.raises(ValueError):
+        router.subscribe(websocket, ["AAPL"], throttle_ms="fast")
+    assert router.subscriptions == {}
+
+async def test_compact_mode_sends_sequenced_deltas(router):
+    websocket = make_socket()
+    await router.connect(websocket, "client1")
+    router.subscribe(websocket, ["AAPL"], throttle_ms=50, mode="compact")
+
+    await router.broadcast_market_data(make_market_data("AAPL"))
+    await asyncio.sleep(0.08)
+    first = json.loads(websocket.send_text.await_args.args[0])
+    assert first["type"] == "market_data_delta"
+    assert first["seq"] == 1
+    assert first["updates"][0]["snapshot"] is True
+    assert first["updates"][0]["data"]["open"] == 100.0
+
+    market_data = make_market_data("AAPL")
+    market_data.price = 101.0
+    market_data.timestamp = datetime.fromisoformat(first["updates"][0]["data"]["timestamp"])
+    await router.broadcast_market_data(market_data)
+    await asyncio.sleep(0.08)
+    second = json.loads(websocket.send_text.await_args.args[0])
+    assert second["seq"] == 2
+    assert second["updates"] == [{"symbol": "AAPL", "data": {"price": 101.0}}]
+
+    # An unchanged tick produces no frame and no sequence number
+    await router.broadcast_market_data(market_data)
+    await asyncio.sleep(0.08)
+    assert websocket.send_text.await_count == 2
+
+async def test_resnapshot_resends_full_state(router):
+    websocket = make_socket()
+    await router.connect(websocket, "client1")
+    router.subscribe(websocket, ["AAPL"], throttle_ms=50, mode="compact")
+    await router.broadcast_market_data(make_market_data("AAPL"))
+    await asyncio.sleep(0.08)
+
+    router.resnapshot(websocket, ["aapl"])
+    await router.broadcast_market_data(make_market_data("AAPL"))
+    await asyncio.sleep(0.08)
+
+    frame = json.loads(websocket.send_text.await_args.args[0])
+    assert frame["seq"] == 2
+    assert frame["updates"][0]["snapshot"] is True
+
+def test_diff_fields_descends_into_indicators():
+    previous = {"price": 1.0, "volume": 5.0, "indicators": {"rsi": 40.0, "macd": 0.1}}
+    current = {"price": 1.0, "volume": 6.0, "indicators": {"rsi": 41.0, "macd": 0.1}}
+    assert diff_fields(previous, current) == {"volume": 6.0, "indicators": {"rsi": 41.0}}
+
+def test_diff_fields_treats_unchanged_nan_as_unchanged():
+    nan = float("nan")
+    previous = {"price": 1.0, "change": nan, "indicators": {"rsi": nan, "sma": nan}}
+    current = {"price": 1.0, "change": nan, "indicators": {"rsi": nan, "sma": 2.0}, "ema": nan}
+    assert diff_fields(previous, current) == {"indicators": {"sma": 2.0}, "ema": current["ema"]}
+
+async def test_one_worker_produces_each_symbol(monkeypatch):
+    monkeypatch.setattr("app.services.websocket.ai_trading_service", None)
+    hub = InProcessHub()
+    workers = [WebSocketManager(InProcessBackplane(hub)) for _ in range(3)]
+    sockets = []
+    fetched = []
+
+    async def fetch(symbol):
+        fetched.append(symbol)
+        return make_bar(100.0)
+
+    for i, worker in enumerate(workers):
+        worker.ensure_market_data_stream = MagicMock()
+        worker._fetch_latest_bar = fetch
+        websocket = make_socket()
+        await worker.connect(websocket, f"client{i}")
+        worker.subscribe(websocket, ["AAPL"])
+        sockets.append(websocket)
+
+    for worker in workers:
+        worker._schedule_tick()
+        await asyncio.gather(*worker._in_flight.values())
+    await settle()
+
+    assert fetched == ["AAPL"]
+    assert [len(worker.leases) for worker in workers] == [1, 0, 0]
+    for websocket in sockets:
+        message = json.loads(websocket.send_text.await_args.args[0])
+        assert message["symbol"] == "AAPL"
+
+async def test_released_lease_fails_over_to_another_worker():
+    hub = InProcessHub()
+    first, second = InProcessBackplane(hub), InProcessBackplane(hub)
+
+    assert await first.claim("producer:AAPL", "worker1", ttl=60)
+    assert not await second.claim("producer:AAPL", "worker2", ttl=60)
+    assert await first.claim("producer:AAPL", "worker1", ttl=60)  # Renewal
+
+    await first.release("producer:AAPL", "worker1")
+    assert await second.claim("producer:AAPL", "worker2", ttl=60)
+
+async def test_expired_lease_can_be_taken_over():
+    backplane = InProcessBackplane()
+    assert await backplane.claim("producer:AAPL", "worker1", ttl=0)
+    assert await backplane.claim("producer:AAPL", "worker2", ttl=60)
+
+async def test_close_releases_leases_and_the_backplane(monkeypatch):
+    monkeypatch.setattr("app.services.websocket.ai_trading_service", None)
+    hub = InProcessHub()
+    worker, standby = WebSocketManager(InProcessBackplane(hub)), InProcessBackplane(hub)
+    worker._fetch_latest_bar = AsyncMock(return_value=make_bar(100.0))
+    websocket = make_socket()
+    await worker.connect(websocket, "client1")
+    worker.subscribe(websocket, ["AAPL"])
+    await settle()
+    assert worker.leases == {"AAPL"}
+
+    await worker.close()
+
+    assert worker._stream_task.done() and not worker.leases
+    assert hub.handlers == []
+    assert await standby.claim("producer:AAPL", "worker2", ttl=60)
+
+def test_backplane_is_abstract():
+    with pytest.raises(TypeError):
+        Backplane()
+
+async def test_broadcast_reaches_sockets_on_every_worker():
+    hub = InProcessHub()
+    workers = [WebSocketManager(InProcessBackplane(hub)) for _ in range(2)]
+    sockets = [make_socket() for _ in workers]
+    for i, (worker, websocket) in enumerate(zip(workers, sockets)):
+        await worker.connect(websocket, f"client{i}")
+
+    await workers[0].broadcast({"type": "notice"})
+    await settle()
+
+    for websocket in sockets:
+        assert json.loads(websocket.send_text.await_args.args[0]) == {"type": "notice"}
+
+async def test_job_updates_reach_watchers_on_every_worker():
+    hub = InProcessHub()
+    workers = [WebSocketManager(InProcessBackplane(hub)) for _ in range(2)]
+    watcher, other, remote = make_socket(), make_socket(), make_socket()
+    await workers[0].connect(watcher, "client1")
+    await workers[0].connect(other, "client2")
+    await workers[1].connect(remote, "client3")
+    workers[0].watch_job(watcher, "job1")
+    workers[1].watch_job(remote, "job1")
+
+    await workers[0].publish_job_update("job1", {"type": "backtest_job", "status": "running"})
+    await settle()
+
+    for websocket in (watcher, remote):
+        assert json.loads(websocket.send_text.await_args.args[0])["status"] == "running"
+    other.send_text.assert_not_awaited()
+
+    workers[0].disconnect(watcher, "client1")
+    assert "job1" not in workers[0].job_watchers
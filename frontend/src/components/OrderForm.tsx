@@ -1,11 +1,18 @@
 import React, { useState } from 'react';
-import { useMutation, useQueryClient } from '@tanstack/react-query';
+import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
 
 interface OrderFormProps {
   symbol: string;
   currentPrice: number;
   availableFunds: number;
   onOrderSubmit?: () => void;
+  onSymbolChange?: (symbol: string) => void;
+}
+
+interface AssetSuggestion {
+  symbol: string;
+  name: string;
+  exchange: string;
 }
 
 const OrderForm: React.FC<OrderFormProps> = ({
@@ -13,13 +20,36 @@ const OrderForm: React.FC<OrderFormProps> = ({
   currentPrice,
   availableFunds,
   onOrderSubmit,
+  onSymbolChange,
 }) => {
+  const [symbolQuery, setSymbolQuery] = useState<string>(symbol);
   const [orderType, setOrderType] = useState<'market' | 'limit'>('market');
   const [side, setSide] = useState<'buy' | 'sell'>('buy');
   const [quantity, setQuantity] = useState<string>('');
   const [limitPrice, setLimitPrice] = useState<string>('');
   const queryClient = useQueryClient();
 
+  // Symbol autocomplete, served from the backend's in-memory asset catalog
+  const prefix = symbolQuery.trim().toUpperCase();
+  const { data: suggestions = [] } = useQuery<AssetSuggestion[]>({
+    queryKey: ['assets', prefix],
+    queryFn: async () => {
+      const response = await fetch(`/api/v1/trading/assets/search?q=${encodeURIComponent(prefix)}`);
+      if (!response.ok) throw new Error('Failed to search assets');
+      return response.json();
+    },
+    enabled: prefix.length > 0 && prefix !== symbol,
+    staleTime: 5 * 60 * 1000,
+  });
+
+  const handleSymbolChange = (value: string) => {
+    setSymbolQuery(value);
+    const match = suggestions.find(asset => asset.symbol === value.trim().toUpperCase());
+    if (match) {
+      onSymbolChange?.(match.symbol);
+    }
+  };
+
   const createOrderMutation = useMutation({
     mutationFn: async (order: any) => {
       const response = await fetch('/api/v1/trading/orders', {
@@ -69,6 +99,29 @@ const OrderForm: React.FC<OrderFormProps> = ({
 
   return (
     <form onSubmit={handleSubmit} className="space-y-4">
+      {/* Symbol Selection */}
+      <div>
+        <label className="block text-sm font-medium text-gray-700 dark:text-gray-300">
+          Symbol
+        </label>
+        <div className="mt-1">
+          <input
+            type="text"
+            list="order-form-symbols"
+            value={symbolQuery}
+            onChange={(e) => handleSymbolChange(e.target.value)}
+            className="block w-full rounded-md border-gray-300 dark:border-gray-600 dark:bg-gray-700 shadow-sm focus:border-indigo-500 focus:ring-indigo-500"
+          />
+          <datalist id="order-form-symbols">
+            {suggestions.map(asset => (
+              <option key={asset.symbol} value={asset.symbol}>
+                {asset.name} ({asset.exchange})
+              </option>
+            ))}
+          </datalist>
+        </div>
+      </div>
+
       <div className="grid grid-cols-2 gap-4">
         {/* Order Type Selection */}
         <div>
@@ -136,6 +136,7 @@ const TradingDashboard: React.FC<TradingDashboardProps> = ({
                 currentPrice={marketData[selectedSymbol].price}
                 availableFunds={portfolio.buying_power}
                 onOrderSubmit={() => setShowOrderForm(false)}
+                onSymbolChange={handleSymbolSearch}
               />
             )}
           </div>
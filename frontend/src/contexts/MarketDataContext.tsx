@@ -1,11 +1,11 @@
-import React, { createContext, useContext, useState, useCallback } from 'react';
+import React, { createContext, useContext, useState, useCallback, useRef } from 'react';
 import { v4 as uuidv4 } from 'uuid';
-import { useWebSocket, MarketData, WebSocketMessage } from '../hooks/useWebSocket';
+import { useWebSocket, MarketData, SubscribeOptions, WebSocketMessage } from '../hooks/useWebSocket';
 
 interface MarketDataContextType {
   marketData: Record<string, MarketData>;
   subscribedSymbols: Set<string>;
-  subscribe: (symbols: string[]) => void;
+  subscribe: (symbols: string[], options?: SubscribeOptions) => void;
   unsubscribe: (symbols: string[]) => void;
   isConnected: boolean;
   error: string | null;
@@ -24,6 +24,8 @@ export const useMarketData = () => {
 export const MarketDataProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
   const [marketData, setMarketData] = useState<Record<string, MarketData>>({});
   const [subscribedSymbols, setSubscribedSymbols] = useState<Set<string>>(new Set());
+  const lastSeqRef = useRef<number | null>(null);
+  const resnapshotRef = useRef<(symbols?: string[]) => void>();
   
   const handleMessage = useCallback((message: WebSocketMessage) => {
     if (message.type === 'market_data' && message.symbol && message.data) {
@@ -31,10 +33,52 @@ export const MarketDataProvider: React.FC<{ children: React.ReactNode }> = ({ ch
         ...prev,
         [message.symbol]: message.data,
       }));
+    } else if (message.type === 'market_data_batch' && message.updates) {
+      // Conflated frame: apply every symbol's latest value in a single render
+      setMarketData(prev => {
+        const next = { ...prev };
+        message.updates?.forEach(update => {
+          if (update.symbol && update.data) {
+            next[update.symbol] = update.data;
+          }
+        });
+        return next;
+      });
+    } else if (message.type === 'market_data_delta' && message.updates && message.seq !== undefined) {
+      // Compact frame: a gap in seq means a frame was dropped, so ask for full state
+      const expected = lastSeqRef.current === null || message.seq === 1 ? message.seq : lastSeqRef.current + 1;
+      lastSeqRef.current = message.seq;
+      if (message.seq !== expected) {
+        resnapshotRef.current?.();
+      }
+      setMarketData(prev => {
+        const next = { ...prev };
+        message.updates?.forEach(update => {
+          if (!update.symbol || !update.data) {
+            return;
+          }
+          const previous = next[update.symbol] as (MarketData & { indicators?: Record<string, number> }) | undefined;
+          const delta = update.data as Partial<MarketData> & { indicators?: Record<string, number> };
+          next[update.symbol] = update.snapshot || !previous
+            ? update.data
+            : {
+                ...previous,
+                ...delta,
+                ...(delta.indicators && { indicators: { ...previous.indicators, ...delta.indicators } }),
+              };
+        });
+        return next;
+      });
     }
   }, []);
 
-  const { isConnected, error, subscribe: wsSubscribe, unsubscribe: wsUnsubscribe } = useWebSocket(
+  const {
+    isConnected,
+    error,
+    subscribe: wsSubscribe,
+    unsubscribe: wsUnsubscribe,
+    resnapshot,
+  } = useWebSocket(
     uuidv4(),
     {
       onMessage: handleMessage,
@@ -44,13 +88,15 @@ export const MarketDataProvider: React.FC<{ children: React.ReactNode }> = ({ ch
     }
   );
 
-  const subscribe = useCallback((symbols: string[]) => {
+  resnapshotRef.current = resnapshot;
+
+  const subscribe = useCallback((symbols: string[], options?: SubscribeOptions) => {
     setSubscribedSymbols(prev => {
       const newSymbols = new Set(prev);
       symbols.forEach(symbol => newSymbols.add(symbol));
       return newSymbols;
     });
-    wsSubscribe(symbols);
+    wsSubscribe(symbols, options);
   }, [wsSubscribe]);
 
   const unsubscribe = useCallback((symbols: string[]) => {
@@ -12,11 +12,21 @@ export interface WebSocketMessage {
   type: string;
   symbol?: string;
   data?: MarketData;
+  updates?: WebSocketMessage[];
+  seq?: number;
+  snapshot?: boolean;
   status?: string;
   client_id?: string;
   message?: string;
 }
 
+export interface SubscribeOptions {
+  // Receive one batched frame per interval with the latest update per symbol
+  throttleMs?: number;
+  // Receive sequenced frames carrying only the fields changed since the last one
+  compact?: boolean;
+}
+
 export interface UseWebSocketOptions {
   onMessage?: (message: WebSocketMessage) => void;
   onConnect?: () => void;
@@ -108,12 +118,14 @@ export const useWebSocket = (clientId: string, options: UseWebSocketOptions = {}
     }
   }, []);
 
-  const subscribe = useCallback((symbols: string[]) => {
+  const subscribe = useCallback((symbols: string[], subscribeOptions: SubscribeOptions = {}) => {
     if (wsRef.current && isConnected) {
       console.log('Subscribing to symbols:', symbols);
       wsRef.current.send(JSON.stringify({
         type: 'subscribe',
         symbols,
+        ...(subscribeOptions.throttleMs !== undefined && { throttle_ms: subscribeOptions.throttleMs }),
+        ...(subscribeOptions.compact && { mode: 'compact' }),
       }));
     } else {
       console.warn('Cannot subscribe: WebSocket is not connected');
@@ -132,6 +144,16 @@ export const useWebSocket = (clientId: string, options: UseWebSocketOptions = {}
     }
   }, [isConnected]);
 
+  const resnapshot = useCallback((symbols?: string[]) => {
+    if (wsRef.current && isConnected) {
+      console.log('Requesting snapshot for symbols:', symbols ?? 'all');
+      wsRef.current.send(JSON.stringify({
+        type: 'resnapshot',
+        ...(symbols && { symbols }),
+      }));
+    }
+  }, [isConnected]);
+
   useEffect(() => {
     connect();
     return () => {
@@ -144,5 +166,6 @@ export const useWebSocket = (clientId: string, options: UseWebSocketOptions = {}
     error,
     subscribe,
     unsubscribe,
+    resnapshot,
   };
 }; 
\ No newline at end of file